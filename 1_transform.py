@@ -1,7 +1,15 @@
 import pandas as pd
+import numpy as np
 import os
-import glob
+import argparse
+import concurrent.futures
+import urllib.parse
 import warnings
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from transform_metrik import LaporanRun, Stopwatch, rss_mb
+from ingest_umum import baca_excel, buka_state, baca_state, catat_sumber, pilah_file, pindai, di_folder_dilewati
 
 # Matikan warning style openpyxl agar output bersih
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -14,51 +22,234 @@ root_folder = r"\\?\C:\Users\ACER\Documents\Dokumen\Magang Ramayana\2026_01_06_D
 # 2. Nama File Output
 output_file = "DETAIL_PAKET_TRANSAKSI_GABUNGAN_V3.xlsx"
 
-# 3. Mapping Angka -> Nama Bulan
+# 3. Mode Output: "xlsx" (1 file gabungan) atau "parquet" (partisi Tahun/Bulan/Folder_Asal)
+output_format = "xlsx"
+output_parquet_dir = "DETAIL_PAKET_TRANSAKSI_PARQUET"
+
+# 4. Manifest incremental load (path, size, mtime, hash + baris hasil per file sumber)
+manifest_file = "DETAIL_PAKET_MANIFEST.sqlite"
+
+# 5. Folder laporan run (waktu per tahap & per file, peak RSS) dalam JSON + CSV
+laporan_dir = "LAPORAN_TRANSFORM"
+
+# 6. Mapping Angka -> Nama Bulan
 map_angka_ke_bulan = {
     '01': 'Januari', '02': 'Februari', '03': 'Maret', '04': 'April',
     '05': 'Mei', '06': 'Juni', '07': 'Juli', '08': 'Agustus',
     '09': 'September', '10': 'Oktober', '11': 'November', '12': 'Desember'
 }
+
+# 7. Filter scan raw_data (pola fnmatch, tidak case-sensitive; pola dengan '/' = path relatif)
+pola_file = ["*.xlsx"]
+pola_kecuali = ["~$*", ".*"]        # file lock Excel & file tersembunyi
+folder_dilewati = [".*"]            # subfolder yang tidak di-scan, mis. "2023_*" yang sudah final
 # =====================================================
 
-def safe_float(val):
-    """Mengubah value menjadi float dengan aman."""
-    try:
-        if pd.isna(val) or str(val).strip() == '-' or str(val).strip() == '':
-            return 0.0
-        return float(val)
-    except:
-        return 0.0
-
-def get_col_safe(row, index):
-    """Mengambil data kolom dengan aman. Jika index melebihi panjang baris, return 0."""
-    if index < len(row):
-        return row[index]
-    return 0
-
-def get_existing_signatures(file_path):
-    """Cek database lama untuk incremental load."""
-    if not os.path.exists(file_path):
-        return set(), None
-    try:
-        print(f"📖 Membaca database eksisting: {file_path}")
-        df_exist = pd.read_excel(file_path)
-        for col in ['Folder_Asal', 'Tahun', 'Bulan']:
-            if col in df_exist.columns:
-                df_exist[col] = df_exist[col].astype(str)
-        signatures = set(
-            df_exist['Folder_Asal'] + "_" + df_exist['Tahun'] + "_" + df_exist['Bulan']
+# Urutan kolom hasil ekstraksi per file
+DETAIL_COLS = [
+    'Folder_Asal', 'Nama_Toko_Internal', 'Tahun', 'Bulan', 
+    'Tipe_Kartu', 'Paket', 'Jumlah_Dibeli', 'Biaya', 'Masuk_Kredit', 'Masuk_Bonus'
+]
+
+def to_float_vector(values):
+    """Versi vektor dari float(val).
+
+    Return (nilai, berhasil): nilai float64 (NaN jika gagal) dan mask elemen yang
+    berhasil di-float(). Sama persis dengan try: float(val) per sel.
+    """
+    n = len(values)
+    if values.dtype.kind in 'biuf':
+        return values.astype('float64'), np.ones(n, dtype=bool)
+    if values.dtype.kind != 'O' or pd.api.types.infer_dtype(values, skipna=True) in (
+        'datetime', 'datetime64', 'date', 'time', 'timedelta', 'timedelta64', 'period'
+    ):
+        # Tanggal/waktu tidak bisa di-float() (to_numeric malah mengubahnya jadi epoch)
+        return np.full(n, np.nan), np.zeros(n, dtype=bool)
+
+    nilai = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    berhasil = ~np.isnan(nilai)
+    # to_numeric lebih ketat dari float() (mis. '1_000', 'nan'), cek ulang sisa sel non-kosong saja
+    for i in np.flatnonzero(~berhasil & ~pd.isna(values)):
+        try:
+            nilai[i] = float(values[i])
+            berhasil[i] = True
+        except (TypeError, ValueError):
+            pass
+    return nilai, berhasil
+
+def safe_float_vector(values):
+    """Versi vektor safe_float: sel kosong/'-'/tidak valid menjadi 0.0."""
+    nilai, berhasil = to_float_vector(values)
+    return np.where(berhasil & ~pd.isna(values), nilai, 0.0)
+
+# ================= MANIFEST INCREMENTAL =================
+# Satu baris per file sumber (key = path relatif terhadap root_folder) + semua baris
+# hasil ekstraksinya. Startup cukup os.stat() per file; hash hanya dihitung jika
+# size/mtime berubah, dan hanya file yang isinya berubah yang di-parse ulang.
+# Tabel `sumber` dan logika cek perubahan dipakai bersama dengan ingest mesin (ingest_umum).
+def buka_manifest(path):
+    con = buka_state(path)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS baris (
+            path TEXT, Folder_Asal TEXT, Nama_Toko_Internal TEXT, Tahun TEXT, Bulan TEXT,
+            Tipe_Kartu TEXT, Paket TEXT, Jumlah_Dibeli REAL, Biaya REAL,
+            Masuk_Kredit REAL, Masuk_Bonus REAL
+        )""")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_baris_path ON baris(path)")
+    # Partisi parquet & file xlsx yang belum ditulis ulang sejak barisnya berubah
+    # (manifest dipakai bersama oleh kedua mode output)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS partisi_kotor (
+            Tahun TEXT, Bulan TEXT, Folder_Asal TEXT, PRIMARY KEY (Tahun, Bulan, Folder_Asal)
+        )""")
+    con.execute("CREATE TABLE IF NOT EXISTS status (kunci TEXT PRIMARY KEY, nilai TEXT)")
+    return con
+
+baca_manifest = baca_state
+
+def simpan_hasil_file(con, key, stat, sha256, df_rows):
+    """Ganti baris milik satu file sumber (delete + insert) dan update entry manifest-nya."""
+    con.execute("DELETE FROM baris WHERE path = ?", (key,))
+    if not df_rows.empty:
+        df_rows = df_rows[DETAIL_COLS].copy()
+        df_rows.insert(0, 'path', key)
+        df_rows.to_sql('baris', con, if_exists='append', index=False)
+        # Baris warisan output lama untuk toko x bulan yang sama diganti hasil parse file ini
+        con.executemany(
+            "DELETE FROM baris WHERE path LIKE ? AND Tahun = ? AND Bulan = ? AND Folder_Asal = ?",
+            [(KUNCI_OUTPUT_LAMA + "/%", *partisi) for partisi in partisi_milik_file(con, key)]
         )
-        return signatures, df_exist
+    catat_sumber(con, key, stat, sha256, len(df_rows))
+
+# Manifest baru tetapi output lama (xlsx / store parquet) sudah ada: barisnya dimasukkan
+# ke manifest dengan key "<KUNCI_OUTPUT_LAMA>/<Folder_Asal>/<Tahun>_<Bulan>", supaya data
+# historis yang workbook-nya sudah tidak ada di raw_data tidak hilang saat output ditulis
+# ulang dari manifest (sama seperti dulu: output lama + data baru). Key ini tidak masuk
+# tabel `sumber`; barisnya diganti begitu file sumber toko x bulan yang sama diproses.
+KUNCI_OUTPUT_LAMA = "<output_lama>"
+
+def isi_dari_output_lama(con, output_file, output_format, parquet_dir):
+    """Salin baris output lama ke manifest (sekali, saat manifest baru dibuat). Return jumlah baris."""
+    ada_parquet = os.path.isdir(parquet_dir) and any(
+        nama.endswith(".parquet") for _, _, files in os.walk(parquet_dir) for nama in files
+    )
+    if output_format == "parquet" and ada_parquet:
+        sumber = parquet_dir
+    elif os.path.exists(output_file):
+        sumber = output_file
+    else:
+        return 0
+
+    print(f"📖 Memindahkan data output lama ke manifest: {sumber}")
+    try:
+        df = baca_parquet_store(sumber) if sumber == parquet_dir else pd.read_excel(sumber)
     except Exception as e:
-        print(f"⚠️ Gagal membaca database lama: {e}. Membuat baru...")
-        return set(), None
+        # Jangan lanjut: output akan ditulis ulang dari manifest dan data lama bisa hilang
+        raise RuntimeError(
+            f"Output lama {sumber} gagal dibaca ({e}), proses dihentikan supaya output "
+            f"tidak ditimpa. Perbaiki file tersebut (atau pindahkan jika memang tidak dipakai) "
+            f"lalu jalankan ulang."
+        ) from e
+
+    for col in DETAIL_COLS:
+        if col not in df.columns:
+            df[col] = None
+    df = df[DETAIL_COLS].dropna(how='all').astype({'Tipe_Kartu': object})
+    for col in PARTITION_COLS:
+        df[col] = df[col].astype(str)
+    if df.empty:
+        return 0
+    df.insert(0, 'path', KUNCI_OUTPUT_LAMA + "/" + df['Folder_Asal'] + "/" + df['Tahun'] + "_" + df['Bulan'])
+    df.to_sql('baris', con, if_exists='append', index=False)
+    con.commit()
+    return len(df)
+
+def tandai_kotor(con, partitions):
+    con.executemany("INSERT OR IGNORE INTO partisi_kotor VALUES (?, ?, ?)", sorted(partitions))
+    con.execute("INSERT OR REPLACE INTO status VALUES ('xlsx_kotor', '1')")
+
+def partisi_perlu_ditulis(con, dataset_dir):
+    """Partisi kotor + partisi di manifest yang file parquet-nya belum ada."""
+    partitions = set(con.execute("SELECT Tahun, Bulan, Folder_Asal FROM partisi_kotor"))
+    for partisi in con.execute("SELECT DISTINCT Tahun, Bulan, Folder_Asal FROM baris"):
+        if not os.path.exists(os.path.join(get_partition_dir(dataset_dir, *partisi), "part-0.parquet")):
+            partitions.add(partisi)
+    return partitions
+
+def partisi_milik_file(con, key):
+    """Kombinasi Tahun/Bulan/Folder_Asal yang saat ini berisi baris dari file ini."""
+    return set(con.execute(
+        "SELECT DISTINCT Tahun, Bulan, Folder_Asal FROM baris WHERE path = ?", (key,)
+    ))
+
+def baca_baris_manifest(con, partisi=None):
+    """Baca baris hasil dari manifest (urut per file sumber), opsional hanya satu partisi."""
+    query = f"SELECT {', '.join(DETAIL_COLS)} FROM baris"
+    params = ()
+    if partisi is not None:
+        query += " WHERE Tahun = ? AND Bulan = ? AND Folder_Asal = ?"
+        params = tuple(partisi)
+    return pd.read_sql_query(query + " ORDER BY path, rowid", con, params=params)
+
+# ================= PARQUET STORE =================
+# Layout: <output_parquet_dir>/Tahun=2025/Bulan=Januari/Folder_Asal=<toko>/part-0.parquet
+# Satu file sumber (toko x bulan) = satu partisi, jadi bulan baru cukup menambah
+# partisi baru tanpa membaca/menulis ulang partisi lain.
+# Catatan: Tahun/Bulan/Folder_Asal di dalam manifest memakai nama bulan (bukan angka).
+PARTITION_COLS = ['Tahun', 'Bulan', 'Folder_Asal']
+
+PARQUET_SCHEMA = pa.schema([
+    ('Nama_Toko_Internal', pa.string()),
+    ('Tipe_Kartu', pa.dictionary(pa.int8(), pa.string())),
+    ('Paket', pa.string()),
+    ('Jumlah_Dibeli', pa.float64()),
+    ('Biaya', pa.float64()),
+    ('Masuk_Kredit', pa.float64()),
+    ('Masuk_Bonus', pa.float64()),
+])
 
-def proses_detail_paket(file_path):
+def get_partition_dir(dataset_dir, tahun, bulan, folder_asal):
+    """Path folder partisi hive-style. Nilai di-quote agar aman sebagai nama folder."""
+    return os.path.join(
+        dataset_dir,
+        "Tahun=" + urllib.parse.quote(str(tahun), safe=''),
+        "Bulan=" + urllib.parse.quote(str(bulan), safe=''),
+        "Folder_Asal=" + urllib.parse.quote(str(folder_asal), safe=''),
+    )
+
+def tulis_partisi_parquet(df, dataset_dir):
+    """Tulis setiap kombinasi Tahun/Bulan/Folder_Asal sebagai satu partisi (replace partisi itu saja)."""
+    jumlah_partisi = 0
+    for (tahun, bulan, folder_asal), df_part in df.groupby(PARTITION_COLS, sort=True):
+        part_dir = get_partition_dir(dataset_dir, tahun, bulan, folder_asal)
+        os.makedirs(part_dir, exist_ok=True)
+        table = pa.Table.from_pandas(
+            df_part[PARQUET_SCHEMA.names], schema=PARQUET_SCHEMA, preserve_index=False
+        )
+        # Tulis ke file sementara lalu rename, supaya partisi tidak pernah setengah jadi
+        tmp_path = os.path.join(part_dir, "part-0.parquet.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(part_dir, "part-0.parquet"))
+        jumlah_partisi += 1
+    return jumlah_partisi
+
+def baca_parquet_store(dataset_dir):
+    """Baca seluruh store Parquet (kolom partisi ikut dikembalikan sebagai string)."""
+    partitioning = ds.partitioning(
+        pa.schema([(c, pa.string()) for c in PARTITION_COLS]), flavor="hive"
+    )
+    return pq.read_table(dataset_dir, partitioning=partitioning).to_pandas()
+
+def proses_detail_paket(file_path, metrik=None):
+    """
+    Ekstrak baris paket dari satu workbook. Return None jika file gagal dibaca.
+    `metrik` (dict, opsional) diisi engine yang dipakai dan waktu baca excel.
+    """
+    if metrik is None:
+        metrik = {}
     try:
         filename = os.path.basename(file_path)
-        if filename.startswith("~$"): return [] 
+        if filename.startswith("~$"): return pd.DataFrame(columns=DETAIL_COLS)
 
         parts = filename.split('_')
         if len(parts) >= 2:
@@ -69,13 +260,10 @@ def proses_detail_paket(file_path):
         folder_asal = os.path.basename(os.path.dirname(file_path))
         
         try:
-            df = pd.read_excel(file_path, header=None, engine='calamine')
-        except:
-            try:
-                df = pd.read_excel(file_path, header=None)
-            except Exception as e:
-                print(f"   [!] Gagal baca excel {filename}: {e}")
-                return []
+            df = baca_excel(file_path, metrik, header=None)
+        except Exception as e:
+            print(f"   [!] Gagal baca excel {filename}: {e}")
+            return None
 
         try:
             nama_toko_internal = df.iloc[4, 5]
@@ -84,145 +272,245 @@ def proses_detail_paket(file_path):
         except:
             nama_toko_internal = "Unknown"
 
-        extracted_data = []
-        current_section = "Unknown" 
+        # --- 1. DETEKSI SECTION (per kolom, bukan per baris) ---
+        # to_numpy() memberi nilai sel yang sama dengan yang dilihat df.iterrows()
+        data = df.to_numpy()
+        n_rows, n_cols = data.shape
+        # Kita butuh minimal sampai index 8 (Qty) untuk tahu ini baris data
+        if n_rows == 0 or n_cols < 9:
+            return pd.DataFrame(columns=DETAIL_COLS)
 
-        for i, row in df.iterrows():
-            # Validasi Dasar
-            col_0 = str(get_col_safe(row, 0)).strip() 
-            col_2 = str(get_col_safe(row, 2)).strip()
-            
-            # --- 1. DETEKSI SECTION ---
-            if "Kiddie Land" in col_0 and len(col_0) < 50: 
-                current_section = "Kiddie Land"
-                continue 
-            elif "Zone" in col_0 and "2000" in col_0:
-                current_section = "Zone 2000"
-                continue
-            elif ("Staf" in col_0 or "Staff" in col_0) and len(col_0) < 50:
-                current_section = "Staf"
-                continue
+        col_0 = np.strings.strip(data[:, 0].astype(str))
+        col_2 = np.strings.strip(data[:, 2].astype(str))
+        pendek = np.strings.str_len(col_0) < 50
 
-            # --- 2. VALIDASI DATA ---
-            # Kita butuh minimal sampai index 8 (Qty) untuk tahu ini baris data
-            if len(row) < 9: continue
+        is_kiddie = (np.strings.find(col_0, "Kiddie Land") >= 0) & pendek
+        is_zone = (np.strings.find(col_0, "Zone") >= 0) & (np.strings.find(col_0, "2000") >= 0)
+        is_staf = (np.strings.find(col_0, "Staf") >= 0) & pendek
+        section = np.select([is_kiddie, is_zone, is_staf], ["Kiddie Land", "Zone 2000", "Staf"], default="")
+        is_section = is_kiddie | is_zone | is_staf
+        # Label section di-forward-fill ke baris di bawahnya
+        current_section = (
+            pd.Series(section, dtype=object).where(is_section).ffill().fillna("Unknown").to_numpy()
+        )
 
-            # --- 3. AMBIL DATA (INDEX DIPERBAIKI SESUAI DUMMY) ---
-            val_qty    = get_col_safe(row, 8)   # Kolom I (Index 8)
-            val_biaya  = get_col_safe(row, 15)  # Kolom P (Index 15) <--- FIX
-            val_kredit = get_col_safe(row, 17)  # Kolom R (Index 17)
-            val_bonus  = get_col_safe(row, 20)  # Kolom U (Index 20) <--- FIX
-            
-            # Validasi Baris Paket: Harus punya nama paket dan Qty berupa angka
-            is_valid_row = False
-            if col_0 and col_0.lower() != "paket" and "total" not in col_2.lower():
-                try:
-                    float_qty = float(val_qty)
-                    # Kita ambil jika Qty ada isinya (bisa 0 atau lebih)
-                    if pd.notna(float_qty):
-                        is_valid_row = True
-                except:
-                    is_valid_row = False
-
-            if is_valid_row:
-                extracted_data.append({
-                    'Folder_Asal': str(folder_asal),
-                    'Nama_Toko_Internal': str(nama_toko_internal),
-                    'Tahun': str(tahun),
-                    'Bulan': str(bulan_angka), 
-                    'Tipe_Kartu': current_section,
-                    'Paket': col_0,              
-                    'Jumlah_Dibeli': safe_float(val_qty),
-                    'Biaya': safe_float(val_biaya),        
-                    'Masuk_Kredit': safe_float(val_kredit),
-                    'Masuk_Bonus': safe_float(val_bonus)
-                })
+        # --- 2. AMBIL DATA (INDEX SESUAI DUMMY) ---
+        # Kolom I (8) = Qty, P (15) = Biaya, R (17) = Kredit, U (20) = Bonus
+        def ambil_kolom(index):
+            if index < n_cols:
+                return data[:, index]
+            return np.zeros(n_rows)
+
+        val_qty, qty_valid = to_float_vector(data[:, 8])
+
+        # --- 3. VALIDASI BARIS PAKET: harus punya nama paket dan Qty berupa angka ---
+        is_valid_row = (
+            ~is_section
+            & (np.strings.str_len(col_0) > 0)
+            & (np.strings.lower(col_0) != "paket")
+            & (np.strings.find(np.strings.lower(col_2), "total") < 0)
+            & qty_valid
+            & ~np.isnan(val_qty)
+        )
+
+        extracted_data = pd.DataFrame({
+            'Folder_Asal': str(folder_asal),
+            'Nama_Toko_Internal': str(nama_toko_internal),
+            'Tahun': str(tahun),
+            'Bulan': str(bulan_angka),
+            'Tipe_Kartu': current_section[is_valid_row],
+            'Paket': col_0[is_valid_row].astype(object),
+            'Jumlah_Dibeli': val_qty[is_valid_row],
+            'Biaya': safe_float_vector(ambil_kolom(15)[is_valid_row]),
+            'Masuk_Kredit': safe_float_vector(ambil_kolom(17)[is_valid_row]),
+            'Masuk_Bonus': safe_float_vector(ambil_kolom(20)[is_valid_row]),
+        }, columns=DETAIL_COLS)
 
         return extracted_data
 
     except Exception as e:
         print(f"❌ Error script pada file {os.path.basename(file_path)}: {e}")
-        return []
+        return None
 
 # ================= MAIN EXECUTION =================
-existing_signatures, df_old = get_existing_signatures(output_file)
+def proses_file_terukur(file_path):
+    """proses_detail_paket + metrik per file untuk laporan run (juga dipanggil di worker paralel)."""
+    metrik = {'ukuran_bytes': os.path.getsize(file_path)}
+    sw = Stopwatch()
+    res = proses_detail_paket(file_path, metrik)
+    total = sw.lap()
+    metrik['total_s'] = round(total, 4)
+    if 'baca_s' in metrik and res is not None:
+        metrik['ekstrak_s'] = round(total - metrik['baca_s'], 4)
+    metrik['baris'] = 0 if res is None else len(res)
+    metrik['status'] = 'ok' if res is not None else 'gagal'
+    metrik['rss_mb'] = round(rss_mb(), 1)
+    return res, metrik
 
-print(f"🚀 Memulai proses scanning di folder:\n   {root_folder}")
-print("-" * 50)
+def main():
+    parser = argparse.ArgumentParser(description="Gabungkan detail paket transaksi dari raw_data.")
+    parser.add_argument("--format", choices=["xlsx", "parquet"], default=output_format,
+                        help="xlsx = tulis ulang 1 file gabungan, parquet = tulis ulang partisi yang berubah saja")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Jumlah proses paralel untuk parsing workbook (default 1 = tanpa paralel)")
+    parser.add_argument("--laporan", default=laporan_dir,
+                        help=f"Folder laporan run JSON/CSV (default: {laporan_dir})")
+    args = parser.parse_args()
+    jalankan_kartu(root_folder, output_file, args.format, output_parquet_dir, manifest_file,
+                   workers=args.workers, laporan_dir=args.laporan)
 
-search_pattern = os.path.join(root_folder, "**", "*.xlsx")
-files = glob.glob(search_pattern, recursive=True)
+def jalankan_kartu(root, output_file, output_format, parquet_dir, manifest_path,
+                   workers=1, laporan_dir=laporan_dir, executor=None,
+                   pola=pola_file, kecuali=pola_kecuali, lewati=folder_dilewati):
+    """
+    Pipeline kartu: scan root -> parse file baru/berubah -> manifest -> output xlsx/parquet.
+    `executor` (opsional) = ProcessPoolExecutor bersama (mis. dari ingest.py all); jika
+    tidak diberikan dan workers > 1, pool dibuat sendiri untuk run ini.
+    `pola` / `kecuali` / `lewati` = filter scan (lihat ingest_umum.pindai).
+    """
+    # Laporan selalu ditulis, termasuk saat run berhenti lebih awal atau gagal
+    laporan = LaporanRun("transform_kartu", laporan_dir, format=output_format, workers=workers)
+    try:
+        _proses_kartu(root, output_file, output_format, parquet_dir, manifest_path, workers, laporan, executor,
+                      (pola, kecuali, lewati))
+    finally:
+        laporan.tulis()
 
-print(f"📦 Total file ditemukan: {len(files)}")
-print("🔍 Memilah file baru vs file lama...\n")
+def _proses_kartu(root, output_file, output_format, parquet_dir, manifest_path, workers, laporan, executor_bersama,
+                  filter_scan):
+    manifest_baru = not os.path.exists(manifest_path)
+    con = buka_manifest(manifest_path)
+    manifest = baca_manifest(con)
+    if manifest_baru:
+        print(f"🆕 Manifest belum ada, semua file di raw_data akan diproses sekali: {manifest_path}")
+        try:
+            n_lama = isi_dari_output_lama(con, output_file, output_format, parquet_dir)
+        except Exception:
+            # Manifest dibuang lagi supaya run berikutnya tetap mencoba memindahkan output lama
+            con.close()
+            os.remove(manifest_path)
+            raise
+        if n_lama:
+            print(f"   {n_lama} baris output lama disimpan di manifest (tetap ada walau workbook-nya sudah tidak ada)")
+    else:
+        print(f"📖 Manifest eksisting: {len(manifest)} file sumber ({manifest_path})")
 
-new_data = []
-processed_count = 0
-skipped_count = 0
-long_path_prefix = "\\\\?\\"
+    print(f"🚀 Memulai proses scanning di folder:\n   {root}")
+    print("-" * 50)
 
-for i, file in enumerate(files):
-    if not file.startswith(long_path_prefix) and ":" in file:
-         file = long_path_prefix + os.path.abspath(file)
-    
-    filename = os.path.basename(file)
-    if filename.startswith("~$"): continue 
+    pola, kecuali, lewati = filter_scan
+    # scandir: stat ikut dari listing, subfolder di `lewati` tidak dimasuki sama sekali
+    with laporan.ukur('glob'):
+        files = pindai(root, pola, kecuali, lewati)
 
-    folder_name = os.path.basename(os.path.dirname(file))
-    parts = filename.split('_')
-    
-    if len(parts) >= 2:
-        thn, bln_angka = parts[0], parts[1]
-        bln_nama = map_angka_ke_bulan.get(bln_angka, bln_angka)
-        
-        current_signature = f"{folder_name}_{thn}_{bln_nama}"
-        
-        if current_signature in existing_signatures:
-            skipped_count += 1
-            continue
-    
-    processed_count += 1
-    if processed_count % 10 == 0:
-        print(f"   ...Sedang memproses Data Baru ke-{processed_count} ({filename})")
+    print(f"📦 Total file ditemukan: {len(files)}")
+    print("🔍 Memilah file baru/berubah vs file lama...\n")
 
-    res = proses_detail_paket(file)
-    if res:
-        new_data.append(res)
+    # Cukup stat; hash hanya dihitung jika size/mtime berbeda dari manifest
+    sw = Stopwatch()
+    files_to_process, skipped_count = pilah_file(con, manifest, files)
 
-print("\n" + "="*40)
-print(f"📊 LAPORAN AKHIR:")
-print(f"⏩ File Di-skip (Sudah ada): {skipped_count}")
-print(f"✅ File Baru Diproses     : {processed_count}")
-print("="*40)
+    laporan.tahap['cek_manifest'] = round(sw.lap(), 4)
+    laporan.info['file_ditemukan'] = len(files)
+    laporan.info['file_dilewati'] = skipped_count
 
-if new_data:
-    print("\n💾 Sedang menggabungkan dan menyimpan data...")
-    flat_data = [item for sublist in new_data for item in sublist]
-    df_new = pd.DataFrame(flat_data)
-    
-    df_new['Bulan'] = df_new['Bulan'].map(map_angka_ke_bulan).fillna(df_new['Bulan'])
-    
-    cols_order = [
-        'Folder_Asal', 'Nama_Toko_Internal', 'Tahun', 'Bulan', 
-        'Tipe_Kartu', 'Paket', 'Jumlah_Dibeli', 'Biaya', 'Masuk_Kredit', 'Masuk_Bonus'
-    ]
-    
-    for col in cols_order:
-        if col not in df_new.columns:
-            df_new[col] = None
-            
-    if df_old is not None:
-        for col in cols_order:
-            if col not in df_old.columns:
-                df_old[col] = None
-        final_df = pd.concat([df_old[cols_order], df_new[cols_order]], ignore_index=True)
+    processed_count = len(files_to_process)
+    paths = [file for file, _, _, _ in files_to_process]
+
+    executor = None
+    if executor_bersama is not None and processed_count > 1:
+        print("⚙️ Parsing paralel dengan pool proses bersama...")
+        results = executor_bersama.map(proses_file_terukur, paths, chunksize=4)
+    elif workers > 1 and processed_count > 1:
+        print(f"⚙️ Parsing paralel dengan {workers} proses...")
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        # executor.map mengembalikan hasil sesuai urutan input -> hasil deterministik
+        results = executor.map(proses_file_terukur, paths, chunksize=4)
     else:
-        final_df = df_new[cols_order]
-        
-    final_df.dropna(how='all', inplace=True)
+        results = map(proses_file_terukur, paths)
+
+    new_rows = 0
+    failed_count = 0
+    sw = Stopwatch()
+    try:
+        for n, ((file, key, stat, sha256), (res, metrik)) in enumerate(zip(files_to_process, results), start=1):
+            if n % 10 == 0:
+                print(f"   ...Sedang memproses Data Baru ke-{n} ({os.path.basename(file)})")
+            laporan.catat_file(key, metrik)
+            if res is None:
+                # Tidak dicatat di manifest supaya dicoba lagi pada run berikutnya
+                failed_count += 1
+                continue
+
+            res['Bulan'] = res['Bulan'].map(map_angka_ke_bulan).fillna(res['Bulan'])
+            res = res.dropna(how='all')
+
+            changed_partitions = partisi_milik_file(con, key)
+            simpan_hasil_file(con, key, stat, sha256, res)
+            tandai_kotor(con, changed_partitions | partisi_milik_file(con, key))
+            new_rows += len(res)
+        con.commit()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        # Termasuk tulis ke manifest; waktu baca/ekstrak per file ada di laporan per file
+        laporan.tahap['parsing'] = round(sw.lap(), 4)
+
+    # File di subfolder yang dilewati memang tidak di-scan, jadi tidak dihitung hilang
+    missing = {
+        key for key in set(manifest) - {key for _, key, _ in files}
+        if not di_folder_dilewati(key, lewati)
+    }
+
+    print("\n" + "="*40)
+    print(f"📊 LAPORAN AKHIR:")
+    print(f"⏩ File Di-skip (Tidak berubah): {skipped_count}")
+    print(f"✅ File Baru/Berubah Diproses : {processed_count - failed_count}")
+    if failed_count:
+        print(f"❌ File Gagal Dibaca          : {failed_count}")
+    if missing:
+        print(f"⚠️ File di manifest tapi tidak ada di raw_data (barisnya tetap disimpan): {len(missing)}")
+    print("="*40)
+
+    if output_format == "parquet":
+        changed_partitions = partisi_perlu_ditulis(con, parquet_dir)
+        if not changed_partitions:
+            print("\n💤 Tidak ada data baru yang perlu ditambahkan.")
+            con.close()
+            return
+        # Hanya partisi yang berubah yang ditulis ulang, partisi lain tidak disentuh
+        print("\n💾 Sedang menulis partisi yang berubah...")
+        for partisi in sorted(changed_partitions):
+            with laporan.ukur('gabung'):
+                df_part = baca_baris_manifest(con, partisi)
+            with laporan.ukur('tulis'):
+                if df_part.empty:
+                    part_file = os.path.join(get_partition_dir(parquet_dir, *partisi), "part-0.parquet")
+                    if os.path.exists(part_file):
+                        os.remove(part_file)
+                else:
+                    tulis_partisi_parquet(df_part, parquet_dir)
+        con.execute("DELETE FROM partisi_kotor")
+        con.commit()
+        con.close()
+        print(f"✅ SUKSES! {len(changed_partitions)} partisi diperbarui di: {parquet_dir}")
+        print(f"   Baris Data Baru: {new_rows}")
+        return
+
+    xlsx_kotor = con.execute("SELECT nilai FROM status WHERE kunci = 'xlsx_kotor'").fetchone()
+    if os.path.exists(output_file) and (xlsx_kotor is None or xlsx_kotor[0] != '1'):
+        print("\n💤 Tidak ada data baru yang perlu ditambahkan.")
+        con.close()
+        return
+
+    # File xlsx dibangun dari manifest, tanpa membaca ulang output lama
+    print("\n💾 Sedang menggabungkan dan menyimpan data...")
+    with laporan.ukur('gabung'):
+        final_df = baca_baris_manifest(con)
     
     try:
-        final_df.to_excel(output_file, index=False)
+        with laporan.ukur('tulis'):
+            final_df.to_excel(output_file, index=False)
         print(f"✅ SUKSES! File tersimpan sebagai: {output_file}")
         print(f"   Total Baris Data: {len(final_df)}")
         
@@ -231,12 +519,17 @@ if new_data:
             print(f"   💰 Total Biaya Terdeteksi: {final_df['Biaya'].sum():,.0f}")
         if 'Masuk_Bonus' in final_df.columns:
             print(f"   🎁 Total Bonus Terdeteksi: {final_df['Masuk_Bonus'].sum():,.0f}")
+
+        con.execute("INSERT OR REPLACE INTO status VALUES ('xlsx_kotor', '0')")
+        con.commit()
             
     except Exception as e:
         print(f"❌ Gagal menyimpan file: {e}")
-        backup_name = "BACKUP_" + output_file
+        backup_name = os.path.join(os.path.dirname(output_file), "BACKUP_" + os.path.basename(output_file))
         final_df.to_excel(backup_name, index=False)
         print(f"   -> Data diselamatkan ke: {backup_name}")
+    finally:
+        con.close()
 
-else:
-    print("\n💤 Tidak ada data baru yang perlu ditambahkan.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,163 @@
 import pandas as pd
 import os
+import argparse
+import concurrent.futures
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from transform_metrik import LaporanRun, Stopwatch, rss_mb
+from ingest_umum import baca_excel, buka_state, baca_state, catat_sumber, pilah_file, pindai, POLA_EXCEL, POLA_KECUALI
 
 # ================= KONFIGURASI =================
 FOLDER_PATH = r"C:\Users\ACER\Documents\Dokumen\Magang Ramayana\2026_06_01_Dashboard Kartu\data-mesin"
 OUTPUT_FILENAME = "REKAP_DATA_MESIN_FULL.xlsx"
+# Mode --stream: satu file parquet per file mesin (memori maksimal = 1 file terbesar)
+OUTPUT_PARQUET_DIR = "REKAP_DATA_MESIN_PARQUET"
+# State incremental mode --stream: file yang tidak berubah tidak dibaca ulang
+MANIFEST_FILE = "REKAP_DATA_MESIN_MANIFEST.sqlite"
+# Laporan run (waktu per tahap & per file, peak RSS) dalam JSON + CSV
+LAPORAN_DIR = "LAPORAN_TRANSFORM"
+# Filter scan folder mesin (tidak rekursif; pola fnmatch, tidak case-sensitive)
+POLA_FILE = list(POLA_EXCEL)
+POLA_KECUALI_FILE = list(POLA_KECUALI)
 
-def gabung_file_mesin(folder_path):
+NUMERIC_COLS = ['Jumlah Diaktifkan', 'Kredit yg Digunakan', 'Bonus yg Digunakan']
+
+def baca_file_mesin(file_full_path, filename, nama_folder_asal, metrik=None):
+    """
+    Baca & bersihkan satu file mesin. Return None jika nama file tidak standar.
+    `metrik` (dict, opsional) diisi waktu baca excel dan waktu cleaning.
+    """
+    if metrik is None:
+        metrik = {}
+    # ================= PARSING BULAN & TAHUN =================
+    nama_bersih = os.path.splitext(filename)[0]
+    parts = nama_bersih.split('_')
+
+    print(f"   🔎 parts filename: {parts}")
+
+    if len(parts) >= 3:
+        bulan = parts[1].title()
+        tahun = parts[2]
+    else:
+        print("   ⚠️ Format nama file tidak standar → FILE DI-SKIP")
+        return None  # ❗ LEBIH AMAN SKIP DARIPADA SALAH
+
+    # ================= BACA EXCEL =================
+    df = baca_excel(file_full_path, metrik)
+    sw = Stopwatch()
+
+    # ================= KUNCI KOLOM NUMERIK (CLEANING) =================
+    # Jumlah Diaktifkan, Kredit yg Digunakan, Bonus yg Digunakan
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(
+                df[col], errors='coerce'
+            ).fillna(0)
+
+    # ================= TAMBAH METADATA =================
+    df['Bulan'] = bulan
+    df['Tahun'] = tahun
+    df['Asal_Folder'] = nama_folder_asal
+    df['Nama_File_Asal'] = filename
+    metrik['ekstrak_s'] = round(sw.lap(), 4)
+    return df
+
+def normalisasi_untuk_parquet(df):
+    """
+    Samakan tipe antar file: kolom numerik -> float64, kolom lain -> string apa pun dtype-nya.
+    Kolom yang kosong semua terbaca float64 (NaN) dan kolom tanggal bisa datetime di satu file
+    tapi teks di file lain; tanpa cast ini skema antar parquet bentrok saat digabung.
+    """
+    for col in df.columns:
+        if col in NUMERIC_COLS:
+            df[col] = df[col].astype('float64')
+        else:
+            df[col] = df[col].astype('string')
+    return df
+
+def baca_rekap_parquet(dataset_dir):
+    """Baca hasil mode --stream. Skema digabung karena tiap file bisa punya kolom berbeda."""
+    files = sorted(
+        os.path.join(dataset_dir, f) for f in os.listdir(dataset_dir) if f.endswith('.parquet')
+    )
+    schema = pa.unify_schemas([pq.read_schema(f) for f in files], promote_options="permissive")
+    return ds.dataset(files, schema=schema).to_table().to_pandas()
+
+def proses_file_mesin(file_full_path, filename, nama_folder_asal):
+    """baca_file_mesin + metrik per file untuk laporan run (juga dipanggil di worker paralel)."""
+    metrik = {'ukuran_bytes': os.path.getsize(file_full_path), 'status': 'gagal', 'baris': 0}
+    sw = Stopwatch()
+    print(f"\n📄 Memproses: {filename}")
+    try:
+        df = baca_file_mesin(file_full_path, filename, nama_folder_asal, metrik)
+        if df is None:
+            metrik['status'] = 'skip'
+        else:
+            metrik['status'] = 'ok'
+            metrik['baris'] = len(df)
+            print("   ✅ OK")
+    except Exception as e:
+        print(f"   ❌ Gagal proses file ini: {e}")
+        df = None
+    metrik['total_s'] = round(sw.lap(), 4)
+    metrik['rss_mb'] = round(rss_mb(), 1)
+    return df, metrik
+
+EKSTENSI_PARQUET = ".parquet"
+
+def proses_file_mesin_parquet(file_full_path, filename, nama_folder_asal, parquet_path):
+    """
+    Mode --stream: proses_file_mesin lalu tulis parquet (atomic) di proses yang sama.
+    Return (ringkasan kecil, metrik) bukan DataFrame, jadi hasil yang menunggu giliran di
+    proses utama tidak menumpuk memori saat --workers > 1.
+    """
+    df, metrik = proses_file_mesin(file_full_path, filename, nama_folder_asal)
+    if df is None:
+        return None, metrik
+    sw = Stopwatch()
+    table = pa.Table.from_pandas(normalisasi_untuk_parquet(df), preserve_index=False)
+    tmp_path = parquet_path + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, parquet_path)
+    metrik['tulis_s'] = round(sw.lap(), 4)
+    ringkasan = {
+        'baris': len(df),
+        'bulan': df['Bulan'].iat[0] if len(df) else None,
+        'tahun': df['Tahun'].iat[0] if len(df) else None,
+        'bonus': float(df['Bonus yg Digunakan'].sum()) if 'Bonus yg Digunakan' in df.columns else None,
+    }
+    return ringkasan, metrik
+
+def _path_parquet(dataset_dir, filename):
+    # Ekstensi sumber ikut di nama (X.xlsx.parquet) agar X.xls dan X.xlsx tidak saling timpa
+    return os.path.join(dataset_dir, filename + EKSTENSI_PARQUET)
+
+def gabung_file_mesin(folder_path, stream=False, laporan_dir=None, output_file=None, parquet_dir=None,
+                      manifest_path=None, workers=1, executor=None, pola=None, kecuali=None):
+    """
+    Pipeline mesin: baca semua file mesin di folder_path.
+    - stream=False: gabung & tulis ulang 1 file xlsx (output_file).
+    - stream=True : satu parquet per file di parquet_dir; hanya file baru/berubah
+      (menurut state di manifest_path) yang dibaca ulang.
+    `executor` (opsional) = ProcessPoolExecutor bersama (mis. dari ingest.py all).
+    `pola` / `kecuali` = pola file yang diambil / diabaikan (lihat ingest_umum.pindai).
+    """
+    # Laporan selalu ditulis, termasuk saat run berhenti lebih awal atau gagal
+    laporan = LaporanRun("transform_mesin", laporan_dir or LAPORAN_DIR, stream=stream, workers=workers)
+    try:
+        _gabung_file_mesin(
+            folder_path, stream, laporan,
+            output_file or OUTPUT_FILENAME, parquet_dir or OUTPUT_PARQUET_DIR,
+            manifest_path or MANIFEST_FILE, workers, executor,
+            pola or POLA_FILE, kecuali or POLA_KECUALI_FILE,
+        )
+    finally:
+        laporan.tulis()
+
+def _gabung_file_mesin(folder_path, stream, laporan, output_file, parquet_dir, manifest_path, workers, executor_bersama,
+                       pola, kecuali):
     print(f"📂 Membaca file dari: {folder_path}")
-    
-    all_data = []
 
     if not os.path.exists(folder_path):
         print(f"❌ Error: Folder tidak ditemukan: {folder_path}")
@@ -16,73 +165,118 @@ def gabung_file_mesin(folder_path):
 
     nama_folder_asal = os.path.basename(os.path.normpath(folder_path))
 
-    for filename in os.listdir(folder_path):
+    # scandir: stat ikut dari listing, dipakai langsung untuk cek state
+    with laporan.ukur('glob'):
+        files = pindai(folder_path, pola, kecuali, rekursif=False)
+    daftar_file = {key for _, key, _ in files}
+
+    con = None
+    if stream:
+        # Parquet per file ditulis langsung ke parquet_dir (atomic per file), jadi
+        # file yang tidak berubah sejak run sebelumnya cukup dilewati
+        os.makedirs(parquet_dir, exist_ok=True)
+        con = buka_state(manifest_path)
+        state_semua = baca_state(con)
+        state = {
+            key: nilai for key, nilai in state_semua.items()
+            if os.path.exists(_path_parquet(parquet_dir, key))
+        }
+        with laporan.ukur('cek_manifest'):
+            diproses, skipped = pilah_file(con, state, files)
+        laporan.info['file_dilewati'] = skipped
+        if skipped:
+            print(f"⏩ File Di-skip (Tidak berubah): {skipped}")
 
-        # ================= FILTER FILE =================
-        if not filename.lower().endswith(('.xlsx', '.xls')):
-            continue
-        if filename.startswith('~$'):
-            continue
+        # Output mengikuti hasil scan: parquet milik file sumber yang sudah dihapus (atau kini
+        # dikecualikan lewat pola) ikut dihapus
+        # (termasuk parquet lama bernama tanpa ekstensi sumber)
+        for f in os.listdir(parquet_dir):
+            if f.endswith(EKSTENSI_PARQUET) and f[:-len(EKSTENSI_PARQUET)] not in daftar_file:
+                os.remove(os.path.join(parquet_dir, f))
+                print(f"🗑️ Sumber sudah tidak ada/dikecualikan, parquet dihapus: {f}")
+        con.executemany("DELETE FROM sumber WHERE path = ?",
+                        [(key,) for key in state_semua if key not in daftar_file])
+    else:
+        diproses = [(path, key, stat, None) for path, key, stat in files]
 
-        file_full_path = os.path.join(folder_path, filename)
-        print(f"\n📄 Memproses: {filename}")
+    if stream:
+        # Parquet ditulis di worker; yang kembali ke proses utama hanya ringkasan, jadi
+        # executor.map (yang menahan hasil sampai gilirannya) tidak menumpuk DataFrame
+        fungsi = proses_file_mesin_parquet
+        args = [(path, key, nama_folder_asal, _path_parquet(parquet_dir, key)) for path, key, _, _ in diproses]
+    else:
+        fungsi = proses_file_mesin
+        args = [(path, key, nama_folder_asal) for path, key, _, _ in diproses]
+    executor = None
+    if executor_bersama is not None and len(args) > 1:
+        results = executor_bersama.map(fungsi, *zip(*args))
+    elif workers > 1 and len(args) > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(fungsi, *zip(*args))
+    else:
+        results = (fungsi(*a) for a in args)
 
-        try:
-            # ================= PARSING BULAN & TAHUN =================
-            nama_bersih = os.path.splitext(filename)[0]
-            parts = nama_bersih.split('_')
+    all_data = []
+    total_rows, total_bonus = 0, 0.0
+    bulan_set, tahun_set = set(), set()
+    ada_bonus = False
+    try:
+        # Termasuk tulis parquet per file; waktu baca per file ada di laporan per file
+        with laporan.ukur('parsing'):
+            for (path, key, stat, sha256), (hasil, metrik) in zip(diproses, results):
+                laporan.catat_file(key, metrik)
+                if hasil is None:
+                    continue
+                if not stream:
+                    all_data.append(hasil)
+                    continue
 
-            print(f"   🔎 parts filename: {parts}")
+                # Parquet sudah ditulis di worker, DataFrame tidak pernah sampai ke sini
+                laporan.tambah('tulis', metrik['tulis_s'])
+                catat_sumber(con, key, stat, sha256, hasil['baris'])
+                con.commit()
+                total_rows += hasil['baris']
+                bulan_set.add(hasil['bulan'])
+                tahun_set.add(hasil['tahun'])
+                if hasil['bonus'] is not None:
+                    ada_bonus = True
+                    total_bonus += hasil['bonus']
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if con is not None:
+            con.commit()
+            con.close()
 
-            if len(parts) >= 3:
-                bulan = parts[1].title()
-                tahun = parts[2]
+    if stream:
+        bulan_set.discard(None)
+        tahun_set.discard(None)
+        n_parquet = len([f for f in os.listdir(parquet_dir) if f.endswith('.parquet')])
+        if total_rows or diproses:
+            print(f"\n🎉 SUKSES! Data tersimpan di: {parquet_dir} ({n_parquet} file)")
+            print(f"📊 Baris Data Baru: {total_rows}")
+            print("📅 Bulan:", sorted(bulan_set))
+            print("📅 Tahun:", sorted(tahun_set))
+            if ada_bonus:
+                print(f"💰 Total Bonus Terbaca: {total_bonus:,.0f}")
             else:
-                print("   ⚠️ Format nama file tidak standar → FILE DI-SKIP")
-                continue  # ❗ LEBIH AMAN SKIP DARIPADA SALAH
-
-            # ================= BACA EXCEL =================
-            df = pd.read_excel(file_full_path)
-
-            # ================= KUNCI KOLOM NUMERIK (CLEANING) =================
-            # 1. Jumlah Diaktifkan
-            if 'Jumlah Diaktifkan' in df.columns:
-                df['Jumlah Diaktifkan'] = pd.to_numeric(
-                    df['Jumlah Diaktifkan'], errors='coerce'
-                ).fillna(0)
-
-            # 2. Kredit yg Digunakan
-            if 'Kredit yg Digunakan' in df.columns:
-                df['Kredit yg Digunakan'] = pd.to_numeric(
-                    df['Kredit yg Digunakan'], errors='coerce'
-                ).fillna(0)
-            
-            # 3. Bonus yg Digunakan (BARU DITAMBAHKAN)
-            if 'Bonus yg Digunakan' in df.columns:
-                df['Bonus yg Digunakan'] = pd.to_numeric(
-                    df['Bonus yg Digunakan'], errors='coerce'
-                ).fillna(0)
-
-            # ================= TAMBAH METADATA =================
-            df['Bulan'] = bulan
-            df['Tahun'] = tahun
-            df['Asal_Folder'] = nama_folder_asal
-            df['Nama_File_Asal'] = filename
-
-            all_data.append(df)
-            print("   ✅ OK")
-
-        except Exception as e:
-            print(f"   ❌ Gagal proses file ini: {e}")
+                print("⚠️ Kolom 'Bonus yg Digunakan' tidak ditemukan di file manapun.")
+        elif n_parquet:
+            print(f"\n💤 Tidak ada file baru/berubah. Data tetap di: {parquet_dir} ({n_parquet} file)")
+        else:
+            print("\n⚠️ Tidak ada file yang berhasil diproses.")
+        return
 
     # ================= GABUNGKAN =================
     if all_data:
         print("\n🔄 Menggabungkan semua data...")
-        final_df = pd.concat(all_data, ignore_index=True)
+        with laporan.ukur('gabung'):
+            final_df = pd.concat(all_data, ignore_index=True)
 
-        final_df.to_excel(OUTPUT_FILENAME, index=False)
+        with laporan.ukur('tulis'):
+            final_df.to_excel(output_file, index=False)
 
-        print(f"\n🎉 SUKSES! Data tersimpan di: {OUTPUT_FILENAME}")
+        print(f"\n🎉 SUKSES! Data tersimpan di: {output_file}")
         print(f"📊 Total Baris Data: {len(final_df)}")
         print("📅 Bulan:", final_df['Bulan'].unique())
         print("📅 Tahun:", final_df['Tahun'].unique())
@@ -98,4 +292,12 @@ def gabung_file_mesin(folder_path):
         print("\n⚠️ Tidak ada file yang berhasil diproses.")
 
 if __name__ == "__main__":
-    gabung_file_mesin(FOLDER_PATH)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gabungkan file data mesin per bulan.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Tulis per file ke Parquet (memori terbatas) alih-alih 1 file xlsx")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Jumlah proses paralel untuk membaca file (default 1 = tanpa paralel)")
+    parser.add_argument("--laporan", default=LAPORAN_DIR,
+                        help=f"Folder laporan run JSON/CSV (default: {LAPORAN_DIR})")
+    args = parser.parse_args()
+    gabung_file_mesin(FOLDER_PATH, stream=args.stream, laporan_dir=args.laporan, workers=args.workers)
@@ -0,0 +1,300 @@
+import pandas as pd
+import os
+import sys
+import io
+import csv
+import json
+import time
+import shutil
+import argparse
+import importlib
+import contextlib
+import subprocess
+import tempfile
+import psutil
+
+import benchmark_data
+import dashboard_data
+import dashboard_agg
+
+# ================= BENCHMARK PIPELINE =================
+# Mengukur waktu tiap tahap pada data sintetis (benchmark_data.py):
+#   transform_kartu  : 1_transform.py (--format parquet, manifest baru)
+#   transform_mesin  : 1_transform_mesin.py (--stream)
+#   load_*           : bersihkan + cube + indeks filter atas cube (isi load_data_* di dashboard)
+#   snapshot_*       : baca_bersih dari xlsx (cold) lalu dari snapshot Feather (warm)
+#   agregasi_*       : filter_indeks + KPI / tren / peringkat + tren spesifik (di cube)
+# Hasil ditambahkan ke benchmark_results/hasil.jsonl & hasil.csv, lalu dibandingkan
+# dengan run sebelumnya untuk ukuran & tahap yang sama supaya regresi terlihat.
+# VERSI_BENCHMARK dinaikkan jika isi suatu tahap berubah: run dengan versi lain tidak
+# dibandingkan (baseline baru).
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, "benchmark_data")
+RESULT_DIR = os.path.join(HERE, "benchmark_results")
+RESULT_JSONL = os.path.join(RESULT_DIR, "hasil.jsonl")
+RESULT_CSV = os.path.join(RESULT_DIR, "hasil.csv")
+KOLOM_HASIL = ['waktu', 'commit', 'versi', 'ukuran', 'tahap', 'detik', 'baris', 'baris_per_detik', 'rss_mb']
+# 2: indeks filter & agregasi diukur di cube (seperti dashboard), bukan data bersih
+VERSI_BENCHMARK = 2
+
+# Batas baris sheet Excel; snapshot dari xlsx hanya diukur di bawah batas ini
+MAX_BARIS_XLSX = 1_048_575
+
+# Regresi jika lebih lambat dari ambang ini dibanding run sebelumnya
+AMBANG_REGRESI = 0.20
+
+METRIK = {'kartu': 'Total_Sales', 'mesin': 'Total'}
+
+def commit_sekarang():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+def rss_mb():
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+@contextlib.contextmanager
+def senyap(aktif=True):
+    """Redam print dari skrip transform supaya output benchmark tetap terbaca."""
+    if not aktif:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+class Pencatat:
+    def __init__(self, ukuran):
+        self.ukuran = ukuran
+        self.commit = commit_sekarang()
+        self.waktu = pd.Timestamp.now().isoformat(timespec='seconds')
+        self.hasil = []
+
+    def catat(self, tahap, detik, baris):
+        baris = int(baris)
+        row = {
+            'waktu': self.waktu, 'commit': self.commit, 'versi': VERSI_BENCHMARK, 'ukuran': self.ukuran, 'tahap': tahap,
+            'detik': round(detik, 4), 'baris': baris,
+            'baris_per_detik': round(baris / detik) if detik > 0 else None,
+            'rss_mb': round(rss_mb(), 1),
+        }
+        self.hasil.append(row)
+        print(f"   ⏱️ {tahap:<40} {detik:>9.3f} s  {baris:>12,} baris  RSS {row['rss_mb']:,.0f} MB")
+        return row
+
+    @contextlib.contextmanager
+    def ukur(self, tahap, baris=0):
+        """with pencatat.ukur('tahap') as info: ...; info['baris'] = n (opsional)."""
+        info = {'baris': baris}
+        t0 = time.perf_counter()
+        yield info
+        self.catat(tahap, time.perf_counter() - t0, info['baris'])
+
+# ================= DATA SINTETIS =================
+def siapkan_data(ukuran, n_baris, seed, buat_ulang=False):
+    """Workbook raw di-cache per ukuran di benchmark_data/<ukuran> (pembuatan 10m lama)."""
+    base = os.path.join(DATA_DIR, ukuran)
+    penanda = os.path.join(base, ".lengkap")
+    if buat_ulang:
+        shutil.rmtree(base, ignore_errors=True)
+    if not os.path.exists(penanda):
+        shutil.rmtree(base, ignore_errors=True)
+        print(f"🛠️ Membuat workbook sintetis {n_baris:,} baris di {base} (sekali per ukuran)")
+        t0 = time.perf_counter()
+        benchmark_data.buat_raw_kartu(os.path.join(base, "raw_data"), n_baris, seed=seed)
+        benchmark_data.buat_raw_mesin(os.path.join(base, "data-mesin"), n_baris, seed=seed)
+        with open(penanda, "w") as f:
+            f.write(f"{n_baris} {seed}\n")
+        print(f"   ✅ Selesai dalam {time.perf_counter() - t0:.1f} s")
+    return base
+
+# ================= TAHAP: TRANSFORM =================
+def bench_transform_kartu(pencatat, raw_dir, kerja, workers, verbose):
+    transform = importlib.import_module("1_transform")
+    transform.root_folder = raw_dir
+    transform.manifest_file = os.path.join(kerja, "manifest.sqlite")
+    transform.output_parquet_dir = os.path.join(kerja, "detail_parquet")
+    transform.output_file = os.path.join(kerja, "detail.xlsx")
+    transform.laporan_dir = os.path.join(kerja, "laporan")
+
+    argv_lama = sys.argv
+    sys.argv = ["1_transform.py", "--format", "parquet", "--workers", str(workers)]
+    try:
+        with pencatat.ukur(f"transform_kartu_w{workers}") as info:
+            with senyap(not verbose):
+                transform.main()
+            info['baris'] = len(transform.baca_parquet_store(transform.output_parquet_dir))
+    finally:
+        sys.argv = argv_lama
+
+def bench_transform_mesin(pencatat, mesin_dir, kerja, verbose):
+    transform_mesin = importlib.import_module("1_transform_mesin")
+    transform_mesin.OUTPUT_PARQUET_DIR = os.path.join(kerja, "mesin_parquet")
+    with pencatat.ukur("transform_mesin_stream") as info:
+        with senyap(not verbose):
+            transform_mesin.gabung_file_mesin(mesin_dir, stream=True, laporan_dir=os.path.join(kerja, "laporan"),
+                                              manifest_path=os.path.join(kerja, "mesin_manifest.sqlite"))
+        info['baris'] = len(transform_mesin.baca_rekap_parquet(transform_mesin.OUTPUT_PARQUET_DIR))
+
+# ================= TAHAP: LOAD DASHBOARD =================
+def bench_load(pencatat, dataset, df_mentah, bersihkan, bangun_cube):
+    with pencatat.ukur(f"load_{dataset}_bersihkan", len(df_mentah)):
+        df = bersihkan(df_mentah.copy())
+    with pencatat.ukur(f"load_{dataset}_cube") as info:
+        cube = bangun_cube(df)
+        info['baris'] = len(cube)
+    # Dashboard mengindeks cube, jadi filter & agregasi di bawah juga berjalan di cube
+    with pencatat.ukur(f"load_{dataset}_indeks", len(cube)):
+        indeks = dashboard_agg.bangun_indeks(cube, dataset)
+    return indeks
+
+def bench_snapshot(pencatat, dataset, df_mentah, bersihkan, kerja):
+    """baca_bersih dari xlsx (cold, termasuk tulis snapshot) lalu dari snapshot (warm)."""
+    if len(df_mentah) > MAX_BARIS_XLSX:
+        print(f"   ⏭️ snapshot_{dataset}: dilewati, {len(df_mentah):,} baris melebihi batas xlsx")
+        return
+    source = os.path.join(kerja, f"{dataset}_bersih.xlsx")
+    if not os.path.exists(source):
+        df_mentah.to_excel(source, index=False)
+    cwd = os.getcwd()
+    os.chdir(kerja)  # SNAPSHOT_DIR relatif terhadap cwd
+    try:
+        shutil.rmtree(dashboard_data.SNAPSHOT_DIR, ignore_errors=True)
+        with pencatat.ukur(f"snapshot_{dataset}_cold") as info:
+            info['baris'] = len(dashboard_data.baca_bersih(dataset, source, bersihkan))
+        with pencatat.ukur(f"snapshot_{dataset}_warm") as info:
+            info['baris'] = len(dashboard_data.baca_bersih(dataset, source, bersihkan))
+    finally:
+        os.chdir(cwd)
+
+# ================= TAHAP: AGREGASI =================
+def _skenario_filter(indeks):
+    """Kombinasi filter yang umum dipakai di sidebar: semua data, 1 kuartal 3 toko, + filter lokal."""
+    dataset = indeks['dataset']
+    tanggal = indeks['tanggal']
+    start, end = pd.Timestamp(tanggal[0]), pd.Timestamp(tanggal[-1])
+    toko = list(indeks['kode'][dashboard_agg.KOLOM_TOKO[dataset]][0][:3])
+    col_lokal = dashboard_agg.KOLOM_FILTER_LOKAL[dataset][0]
+    nilai_lokal = tuple(indeks['kode'][col_lokal][0][:2])
+    return {
+        'semua': (start, end, (), ()),
+        'kuartal_3toko': (start, start + pd.DateOffset(months=3), tuple(toko), ()),
+        'lokal': (start, end, (), ((col_lokal, nilai_lokal),)),
+    }
+
+def bench_agregasi(pencatat, indeks):
+    dataset = indeks['dataset']
+    metrik = METRIK[dataset]
+    breakdown = dashboard_agg.KOLOM_FILTER_LOKAL[dataset][0]
+    for nama, (start, end, tokos, filters) in _skenario_filter(indeks).items():
+        with pencatat.ukur(f"agregasi_{dataset}_{nama}_filter") as info:
+            baris = dashboard_agg.filter_indeks(indeks, start, end, tokos, filters)
+            info['baris'] = len(baris)
+        for bagian in dashboard_agg.AGREGASI[dataset]:
+            with pencatat.ukur(f"agregasi_{dataset}_{nama}_{bagian}", len(baris)):
+                dashboard_agg.agregasi(indeks, bagian, baris, metrik)
+        with pencatat.ukur(f"agregasi_{dataset}_{nama}_spesifik", len(baris)):
+            dashboard_agg.tren_spesifik_indeks(indeks, baris, breakdown, metrik)
+
+# ================= HASIL =================
+def baca_hasil_lama():
+    if not os.path.exists(RESULT_JSONL):
+        return []
+    with open(RESULT_JSONL, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def simpan_hasil(hasil):
+    os.makedirs(RESULT_DIR, exist_ok=True)
+    with open(RESULT_JSONL, "a", encoding="utf-8") as f:
+        for row in hasil:
+            f.write(json.dumps(row) + "\n")
+    # CSV ditulis ulang dari jsonl supaya header selalu sesuai KOLOM_HASIL
+    # (run lama tanpa kolom 'versi' = versi 1)
+    with open(RESULT_CSV, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=KOLOM_HASIL, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows({'versi': 1, **row} for row in baca_hasil_lama())
+
+def bandingkan(hasil, hasil_lama):
+    """Bandingkan tiap tahap dengan run terakhir sebelumnya (ukuran, tahap & versi sama)."""
+    terakhir = {}
+    for row in hasil_lama:
+        if row.get('versi', 1) == VERSI_BENCHMARK:
+            terakhir[(row['ukuran'], row['tahap'])] = row
+    regresi = []
+    print("\n📊 Perbandingan dengan run sebelumnya:")
+    for row in hasil:
+        lama = terakhir.get((row['ukuran'], row['tahap']))
+        if lama is None or not lama['detik']:
+            print(f"   🆕 {row['ukuran']:<4} {row['tahap']:<40} {row['detik']:>9.3f} s")
+            continue
+        rasio = row['detik'] / lama['detik'] - 1
+        tanda = "🔴" if rasio > AMBANG_REGRESI else ("🟢" if rasio < -AMBANG_REGRESI else "⚪")
+        print(f"   {tanda} {row['ukuran']:<4} {row['tahap']:<40} {lama['detik']:>9.3f} s -> "
+              f"{row['detik']:>9.3f} s ({rasio:+.0%}, commit {lama['commit'] or '?'})")
+        if rasio > AMBANG_REGRESI:
+            regresi.append(row['tahap'])
+    return regresi
+
+# ================= MAIN =================
+TAHAP = ['transform', 'load', 'snapshot', 'agregasi']
+
+def jalankan(ukuran, args):
+    n_baris = benchmark_data.parse_ukuran(ukuran)
+    print(f"\n🚀 Benchmark ukuran {ukuran} ({n_baris:,} baris)")
+    pencatat = Pencatat(ukuran)
+    kerja = tempfile.mkdtemp(prefix=f"bench_{ukuran}_")
+    try:
+        if 'transform' in args.tahap:
+            base = siapkan_data(ukuran, n_baris, args.seed, args.buat_ulang)
+            bench_transform_kartu(pencatat, os.path.join(base, "raw_data"), kerja, args.workers, args.verbose)
+            bench_transform_mesin(pencatat, os.path.join(base, "data-mesin"), kerja, args.verbose)
+
+        for dataset, buat, bersihkan, bangun_cube in [
+            ('kartu', benchmark_data.buat_bersih_kartu, dashboard_data.bersihkan_kartu, dashboard_data.bangun_cube_kartu),
+            ('mesin', benchmark_data.buat_bersih_mesin, dashboard_data.bersihkan_mesin, dashboard_data.bangun_cube_mesin),
+        ]:
+            if not {'load', 'snapshot', 'agregasi'} & set(args.tahap):
+                break
+            df_mentah = buat(n_baris, seed=args.seed)
+            indeks = None
+            if 'load' in args.tahap or 'agregasi' in args.tahap:
+                indeks = bench_load(pencatat, dataset, df_mentah, bersihkan, bangun_cube)
+            if 'snapshot' in args.tahap:
+                bench_snapshot(pencatat, dataset, df_mentah, bersihkan, kerja)
+            if 'agregasi' in args.tahap:
+                bench_agregasi(pencatat, indeks)
+            del df_mentah, indeks
+    finally:
+        shutil.rmtree(kerja, ignore_errors=True)
+    return pencatat.hasil
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transform, load, dan agregasi dashboard pada data sintetis.")
+    parser.add_argument("--ukuran", default="10k",
+                        help="Daftar ukuran dipisah koma: 10k,1m,10m atau angka (default: 10k)")
+    parser.add_argument("--tahap", default=",".join(TAHAP),
+                        help=f"Tahap yang dijalankan, dipisah koma (default: {','.join(TAHAP)})")
+    parser.add_argument("--workers", type=int, default=1, help="--workers untuk 1_transform.py (default: 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--buat-ulang", action="store_true", help="Buat ulang workbook sintetis walau sudah ada")
+    parser.add_argument("--tanpa-simpan", action="store_true", help="Jangan tambahkan hasil ke benchmark_results/")
+    parser.add_argument("--verbose", action="store_true", help="Tampilkan output skrip transform")
+    args = parser.parse_args()
+    args.tahap = [t.strip() for t in args.tahap.split(",") if t.strip()]
+    tidak_dikenal = set(args.tahap) - set(TAHAP)
+    if tidak_dikenal:
+        parser.error(f"tahap tidak dikenal: {sorted(tidak_dikenal)}")
+
+    hasil = []
+    for ukuran in [u.strip() for u in args.ukuran.split(",") if u.strip()]:
+        hasil.extend(jalankan(ukuran, args))
+
+    regresi = bandingkan(hasil, baca_hasil_lama())
+    if not args.tanpa_simpan:
+        simpan_hasil(hasil)
+        print(f"\n💾 Hasil ditambahkan ke: {RESULT_JSONL} & {RESULT_CSV}")
+    if regresi:
+        print(f"⚠️ {len(regresi)} tahap lebih lambat > {AMBANG_REGRESI:.0%}: {', '.join(regresi)}")
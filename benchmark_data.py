@@ -0,0 +1,180 @@
+import pandas as pd
+import numpy as np
+import os
+import argparse
+import math
+import xlsxwriter
+
+# ================= GENERATOR DATA SINTETIS UNTUK BENCHMARK =================
+# - Workbook kartu dengan layout yang dibaca proses_detail_paket (1_transform.py):
+#   nama toko internal di iloc[4, 5], baris section (Kiddie Land / Zone 2000 / Staf),
+#   nilai di kolom 8 (Qty), 15 (Biaya), 17 (Kredit), 20 (Bonus).
+# - Workbook mesin dengan nama mesin_<bulan>_<tahun>_<n>.xlsx untuk 1_transform_mesin.py.
+# - DataFrame "data bersih" dengan kolom yang dibaca dashboard (dashboard_data.bersihkan_*).
+
+UKURAN = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+BARIS_PER_WORKBOOK_KARTU = 2_000
+BARIS_PER_WORKBOOK_MESIN = 200_000  # di bawah batas 1.048.576 baris xlsx
+
+JUMLAH_TOKO = 40
+JUMLAH_GAME = 300
+TAHUN = [2024, 2025]
+
+NAMA_BULAN_FILE = ['januari', 'februari', 'maret', 'april', 'mei', 'juni',
+                   'juli', 'agustus', 'september', 'oktober', 'november', 'desember']
+
+SECTION_KARTU = ['Regular', 'Kiddie Land', 'Zone 2000 Arena', 'Staf Only']
+TIPE_GRUP = ['Regular Top Up', 'Bundling F&B/Barang', 'Kiddie Land', 'Regular Top Up dengan Bonus',
+             'Kartu Perdana', 'Top Up Promo Tiket.com']
+NOMINAL = ['50K', '100K', '150K', '200K', '300K', '500K', '1JT']
+KATEGORI_GAME = ['Racing', 'Shooter', 'Redemption', 'Kids', 'Music', 'Sport']
+
+def parse_ukuran(teks):
+    """'10k' / '1m' / '10m' atau angka biasa -> jumlah baris."""
+    teks = str(teks).lower().strip()
+    if teks in UKURAN:
+        return UKURAN[teks]
+    return int(float(teks))
+
+def _bulan_ke(i):
+    """Indeks file -> (tahun, bulan 1-12), berputar di 24 bulan."""
+    i = i % (12 * len(TAHUN))
+    return TAHUN[i // 12], i % 12 + 1
+
+# ================= WORKBOOK KARTU =================
+def tulis_workbook_kartu(path, nama_toko_internal, n_baris, rng):
+    wb = xlsxwriter.Workbook(path, {'constant_memory': True})
+    ws = wb.add_worksheet()
+    ws.write(4, 5, nama_toko_internal)
+    ws.write(5, 0, "Paket")
+    ws.write(5, 2, "Keterangan")
+    ws.write(5, 8, "Qty")
+
+    qty = rng.integers(1, 200, n_baris)
+    nominal = rng.choice([50_000, 100_000, 150_000, 200_000, 500_000], n_baris)
+    paket = rng.integers(0, 60, n_baris)
+    baris_per_section = math.ceil(n_baris / len(SECTION_KARTU))
+
+    r = 6
+    for i in range(n_baris):
+        if i % baris_per_section == 0:
+            ws.write(r, 0, SECTION_KARTU[i // baris_per_section])
+            r += 1
+        # Nama paket tidak boleh mengandung kata kunci section (Kiddie Land / Zone 2000 / Staf)
+        ws.write(r, 0, f"Top Up {NOMINAL[paket[i] % len(NOMINAL)]} #{paket[i]}")
+        ws.write(r, 2, "-")
+        ws.write_number(r, 8, int(qty[i]))
+        ws.write_number(r, 15, int(qty[i]) * 5_000)
+        ws.write_number(r, 17, int(qty[i]) * int(nominal[i]))
+        ws.write_number(r, 20, int(qty[i]) * int(nominal[i]) // 10)
+        r += 1
+    # Baris subtotal (harus diabaikan oleh parser)
+    ws.write(r, 0, "Grand")
+    ws.write(r, 2, "Total")
+    ws.write_number(r, 8, int(qty.sum()))
+    wb.close()
+
+def buat_raw_kartu(root, n_baris, seed=0):
+    """Folder raw_data: <root>/<Toko>/<tahun>_<bulan>_<n>.xlsx. Return jumlah file."""
+    rng = np.random.default_rng(seed)
+    n_file = max(1, math.ceil(n_baris / BARIS_PER_WORKBOOK_KARTU))
+    sisa = n_baris
+    for i in range(n_file):
+        toko = f"Toko_{i % JUMLAH_TOKO:02d}"
+        tahun, bulan = _bulan_ke(i // JUMLAH_TOKO)
+        folder = os.path.join(root, toko)
+        os.makedirs(folder, exist_ok=True)
+        n = min(BARIS_PER_WORKBOOK_KARTU, sisa)
+        sisa -= n
+        path = os.path.join(folder, f"{tahun}_{bulan:02d}_{i:05d}.xlsx")
+        tulis_workbook_kartu(path, f"{toko}_INTERNAL", n, rng)
+    return n_file
+
+# ================= WORKBOOK MESIN =================
+def buat_raw_mesin(root, n_baris, seed=0):
+    """Folder data-mesin: <root>/mesin_<bulan>_<tahun>_<n>.xlsx. Return jumlah file."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(root, exist_ok=True)
+    n_file = max(1, math.ceil(n_baris / BARIS_PER_WORKBOOK_MESIN))
+    sisa = n_baris
+    for i in range(n_file):
+        tahun, bulan = _bulan_ke(i)
+        n = min(BARIS_PER_WORKBOOK_MESIN, sisa)
+        sisa -= n
+        path = os.path.join(root, f"mesin_{NAMA_BULAN_FILE[bulan - 1]}_{tahun}_{i:04d}.xlsx")
+        game = rng.integers(0, JUMLAH_GAME, n)
+        aktif = rng.integers(0, 500, n)
+        wb = xlsxwriter.Workbook(path, {'constant_memory': True})
+        ws = wb.add_worksheet()
+        ws.write_row(0, 0, ['Tanggal', 'Game', 'Jumlah Diaktifkan', 'Kredit yg Digunakan',
+                            'Bonus yg Digunakan', 'Center'])
+        tanggal = f"{tahun}-{bulan:02d}-01"
+        for r in range(n):
+            ws.write_row(r + 1, 0, [tanggal, f"Game {game[r]}", int(aktif[r]), int(aktif[r]) * 3_000,
+                                    int(aktif[r]) * 300, f"Center {r % JUMLAH_TOKO:02d}"])
+        wb.close()
+    return n_file
+
+# ================= DATA BERSIH (INPUT DASHBOARD) =================
+def _tanggal_bulanan(n, rng):
+    tahun = rng.choice(TAHUN, n)
+    bulan = rng.integers(1, 13, n)
+    return pd.to_datetime(pd.DataFrame({'year': tahun, 'month': bulan, 'day': 1}))
+
+def buat_bersih_kartu(n_baris, seed=0):
+    """DataFrame dengan kolom file CLEAN_DATA_TRANSAKSI (sebelum dashboard_data.bersihkan_kartu)."""
+    rng = np.random.default_rng(seed)
+    tipe = rng.integers(0, len(TIPE_GRUP), n_baris)
+    nominal = rng.integers(0, len(NOMINAL), n_baris)
+    qty = rng.integers(1, 200, n_baris)
+    tipe_str = np.array(TIPE_GRUP, dtype=object)[tipe]
+    nominal_str = np.array(NOMINAL, dtype=object)[nominal]
+    toko = np.array([f"Toko_{i:02d}" for i in range(JUMLAH_TOKO)], dtype=object)[rng.integers(0, JUMLAH_TOKO, n_baris)]
+    return pd.DataFrame({
+        'Tanggal': _tanggal_bulanan(n_baris, rng),
+        'Folder_Asal': toko,
+        'Nama_Toko_Internal': toko + "_INTERNAL",
+        'Tipe_Grup': tipe_str,
+        'Nominal_Grup': nominal_str,
+        'Kategori_Paket': tipe_str + " " + nominal_str,
+        'Paket': tipe_str + " " + nominal_str,
+        'Jumlah_Dibeli': qty,
+        'Biaya': qty * 5_000.0,
+        'Masuk_Kredit': qty * 100_000.0,
+        'Masuk_Bonus': qty * 10_000.0,
+        'Total_Sales': qty * 105_000.0,
+    })
+
+def buat_bersih_mesin(n_baris, seed=0):
+    """DataFrame dengan kolom file dashboard_in_scope_compact (sebelum dashboard_data.bersihkan_mesin)."""
+    rng = np.random.default_rng(seed)
+    game = rng.integers(0, JUMLAH_GAME, n_baris)
+    aktif = rng.integers(0, 500, n_baris)
+    kredit = aktif * 3_000.0
+    bonus = aktif * 300.0
+    return pd.DataFrame({
+        'Tanggal': _tanggal_bulanan(n_baris, rng),
+        'Center_MAPPED': np.array([f"Center {i:02d}" for i in range(JUMLAH_TOKO)], dtype=object)[rng.integers(0, JUMLAH_TOKO, n_baris)],
+        'GT_FINAL': np.array([f"Game {i}" for i in range(JUMLAH_GAME)], dtype=object)[game],
+        'Kategori Game': np.array(KATEGORI_GAME, dtype=object)[game % len(KATEGORI_GAME)],
+        'Jumlah Diaktifkan': aktif,
+        'Kredit yg Digunakan': kredit,
+        'Bonus yg Digunakan': bonus,
+        'Total': kredit + bonus,
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Buat workbook sintetis (raw kartu & mesin) untuk benchmark.")
+    parser.add_argument("ukuran", help="Jumlah baris: 10k, 1m, 10m, atau angka")
+    parser.add_argument("--output", default="benchmark_data", help="Folder tujuan (default: benchmark_data)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n = parse_ukuran(args.ukuran)
+    base = os.path.join(args.output, args.ukuran)
+    print(f"🛠️ Membuat data sintetis {n:,} baris di {base}")
+    n_kartu = buat_raw_kartu(os.path.join(base, "raw_data"), n, seed=args.seed)
+    print(f"   ✅ Kartu: {n_kartu} workbook")
+    n_mesin = buat_raw_mesin(os.path.join(base, "data-mesin"), n, seed=args.seed)
+    print(f"   ✅ Mesin: {n_mesin} workbook")
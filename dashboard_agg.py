@@ -0,0 +1,325 @@
+import pandas as pd
+import numpy as np
+
+# ================= AGREGASI DASHBOARD =================
+# Fungsi murni pandas (tanpa streamlit) yang menghasilkan nilai KPI dan tabel grafik.
+# Dashboard membungkusnya dengan st.cache_data supaya kombinasi filter yang sama
+# tidak dihitung ulang pada setiap rerun.
+
+KOLOM_TOKO = {'kartu': 'Folder_Asal', 'mesin': 'Center'}
+
+# Kolom filter spesifik (lokal) per dataset
+KOLOM_FILTER_LOKAL = {
+    'kartu': ['Tipe_Grup', 'Kategori_Paket'],
+    'mesin': ['Kategori Game', 'GT_FINAL'],
+}
+
+KOMPONEN_KARTU = ['Total_Sales', 'Biaya', 'Masuk_Kredit', 'Masuk_Bonus']
+LABEL_KOMPONEN_KARTU = {'Total_Sales': 'Total Sales', 'Biaya': 'Biaya Kartu', 'Masuk_Kredit': 'Top Up Kredit', 'Masuk_Bonus': 'Bonus Top Up'}
+KOMPONEN_MESIN = ['Kredit yg Digunakan', 'Bonus yg Digunakan']
+
+# ================= FILTER ENGINE =================
+# Data diurutkan per Tanggal sekali, jadi rentang tanggal cukup dicari dengan
+# searchsorted (tanpa scan). Filter toko/kategori memakai kode category + tabel
+# lookup boolean per nilai, dan hanya dijalankan di dalam potongan rentang tanggal.
+def bangun_indeks(df, dataset):
+    """Siapkan data terurut + kode kategori untuk filter_indeks. Dibangun sekali per versi data."""
+    df = df.sort_values('Tanggal', kind='stable').reset_index(drop=True)
+    kode = {}
+    for col in [KOLOM_TOKO[dataset]] + KOLOM_FILTER_LOKAL[dataset]:
+        if col not in df.columns:
+            continue
+        cat = df[col].array if isinstance(df[col].dtype, pd.CategoricalDtype) else pd.Categorical(df[col])
+        kode[col] = (cat.categories, np.asarray(cat.codes))
+    return {'dataset': dataset, 'df': df, 'tanggal': df['Tanggal'].to_numpy(), 'kode': kode}
+
+def _mask_nilai(indeks, col, values, lo, hi):
+    categories, codes = indeks['kode'][col]
+    # slot terakhir (indeks -1) untuk NaN / nilai tidak dikenal, selalu False
+    lut = np.zeros(len(categories) + 1, dtype=bool)
+    posisi = categories.get_indexer(list(values))
+    lut[posisi[posisi >= 0]] = True
+    return lut[codes[lo:hi]]
+
+def filter_indeks(indeks, start_date, end_date, tokos=(), filters=()):
+    """
+    Filter rentang tanggal, toko, dan filter lokal ((kolom, (nilai, ...)), ...).
+    Return posisi baris (array int64 terurut) di indeks['df'], bukan salinan data;
+    baris diambil lewat ambil() hanya untuk kolom yang dibutuhkan.
+    """
+    tanggal = indeks['tanggal']
+    lo = np.searchsorted(tanggal, pd.Timestamp(start_date).to_datetime64(), side='left')
+    hi = np.searchsorted(tanggal, pd.Timestamp(end_date).to_datetime64(), side='right')
+    mask = None
+    for col, values in [(KOLOM_TOKO[indeks['dataset']], tokos), *filters]:
+        if not values:
+            continue
+        m = _mask_nilai(indeks, col, values, lo, hi)
+        mask = m if mask is None else (mask & m)
+    if mask is None:
+        return np.arange(lo, hi)
+    return lo + np.flatnonzero(mask)
+
+def ambil(indeks, baris, kolom=None):
+    """
+    DataFrame untuk posisi `baris` dari filter_indeks. Baris berurutan (tanpa filter
+    toko/lokal) -> potongan (view) data terurut tanpa salinan; selain itu hanya `kolom`
+    (yang ada di data) yang diambil dengan take.
+    """
+    df = indeks['df']
+    if len(baris) == 0 or baris[-1] - baris[0] + 1 == len(baris):
+        awal = baris[0] if len(baris) else 0
+        return df.iloc[awal:awal + len(baris)]
+    if kolom is None:
+        return df.take(baris)
+    # take per array kolom: lebih murah daripada iloc[baris, kolom] (tanpa alignment/blok)
+    return pd.DataFrame({c: df[c].array.take(baris) for c in dict.fromkeys(kolom) if c in df.columns})
+
+def opsi_filter_lokal(df, dataset):
+    """Pilihan untuk multiselect filter lokal, dari data yang sudah difilter tanggal & toko."""
+    return {
+        col: sorted(df[col].dropna().unique().tolist())
+        for col in KOLOM_FILTER_LOKAL[dataset] if col in df.columns
+    }
+
+def _sum_per(df, by, metrik):
+    """groupby-sum (hanya kategori yang muncul) dengan kolom kunci kembali ke teks untuk grafik."""
+    out = df.groupby(by, observed=True)[metrik].sum().reset_index()
+    for col in ([by] if isinstance(by, str) else by):
+        if isinstance(out[col].dtype, pd.CategoricalDtype) or col == 'Tahun':
+            out[col] = out[col].astype(str)
+    return out
+
+def _komponen(df, cols):
+    df_comp = df[cols].sum().reset_index()
+    df_comp.columns = ['Komponen', 'Nilai']
+    return df_comp
+
+# Grafik tahunan & bulanan (YoY) dibaca dari matriks dashboard_yoy yang dibangun saat
+# load; tabel bulanan terfilter hanya dihitung saat filter spesifik aktif.
+def _tren_umum(df, metrik):
+    return {
+        'harian': _sum_per(df, 'Tanggal', metrik).sort_values('Tanggal'),
+    }
+
+def bulanan(df, metrik):
+    return _sum_per(df, ['Tahun', 'Bulan_Urut'], metrik).sort_values(['Tahun', 'Bulan_Urut'])
+
+# ================= PERINGKAT (TOP / BOTTOM) =================
+# Semua dimensi peringkat dihitung dalam satu panggilan: kolom metrik diubah ke array
+# sekali, lalu total per nilai = np.bincount atas kode kategori tiap dimensi (tanpa
+# groupby/hash per dimensi). Top/bottom-k dipilih dengan nlargest/nsmallest (seleksi
+# parsial, tanpa sort penuh). Hasil per dimensi: {'kolom', 'top', 'bottom', 'jumlah'},
+# sudah berurutan untuk bar horizontal (baris terakhir tampil paling atas).
+TOP_K_PERINGKAT = 10
+DIMENSI_PERINGKAT = {
+    'kartu': {'peringkat_tipe': 'Tipe_Grup', 'peringkat_toko': 'Folder_Asal'},
+    'mesin': {'peringkat_kategori': 'Kategori Game', 'peringkat_mesin': 'GT_FINAL', 'peringkat_toko': 'Center'},
+}
+
+def _kode_kategori(kolom):
+    if isinstance(kolom.dtype, pd.CategoricalDtype):
+        return np.asarray(kolom.cat.codes), kolom.cat.categories
+    return pd.factorize(kolom, sort=True)
+
+def total_per_dimensi(df, kolom, metrik):
+    """{kolom: Series total metrik per nilai yang muncul (tanpa NaN), urut nilai} = groupby-sum per kolom."""
+    bobot = df[metrik].to_numpy(dtype='float64', na_value=0.0)
+    bulat = pd.api.types.is_integer_dtype(df[metrik].dtype)
+    hasil = {}
+    for col in kolom:
+        codes, nilai = _kode_kategori(df[col])
+        ada = codes >= 0
+        codes = codes[ada]
+        muncul = np.bincount(codes, minlength=len(nilai)) > 0
+        total = np.bincount(codes, weights=bobot[ada], minlength=len(nilai))[muncul]
+        # float64 eksak untuk jumlah bilangan bulat < 2**53, jadi aman dikembalikan ke int
+        hasil[col] = pd.Series(total.astype(np.int64) if bulat else total, index=nilai[muncul], name=metrik)
+    return hasil
+
+def top_bottom(total, kolom, metrik, k=TOP_K_PERINGKAT):
+    """Top-k (naik) & bottom-k (turun) dari Series total, sebagai tabel grafik (kolom, metrik)."""
+    def _tabel(s):
+        out = s.iloc[::-1].rename(metrik).rename_axis(kolom).reset_index()
+        out[kolom] = out[kolom].astype(object)
+        return out
+    return {
+        'kolom': kolom,
+        'top': _tabel(total.nlargest(k)),
+        'bottom': _tabel(total.nsmallest(k)),
+        'jumlah': len(total),
+    }
+
+def peringkat(df, dataset, metrik, k=TOP_K_PERINGKAT):
+    dims = {nama: col for nama, col in DIMENSI_PERINGKAT[dataset].items() if col in df.columns}
+    total = total_per_dimensi(df, dict.fromkeys(dims.values()), metrik)
+    return {nama: top_bottom(total[col], col, metrik, k) for nama, col in dims.items()}
+
+# Agregasi dipecah per bagian halaman (KPI, tab tren, tab peringkat) supaya tab yang
+# tidak dibuka tidak ikut dihitung.
+def kpi_kartu(df, metrik):
+    return {
+        'nilai': df[metrik].sum(),
+        'transaksi': df['Jumlah_Dibeli'].sum(),
+        'toko_aktif': df['Folder_Asal'].nunique(),
+        'kategori_aktif': df['Tipe_Grup'].nunique(),
+    }
+
+def tren_kartu(df, metrik):
+    df_comp = _komponen(df, KOMPONEN_KARTU)
+    df_comp['Komponen'] = df_comp['Komponen'].map(LABEL_KOMPONEN_KARTU)
+    return {
+        'komponen': df_comp,
+        **_tren_umum(df, metrik),
+        'proporsi_toko': _sum_per(df, 'Folder_Asal', metrik),
+    }
+
+def peringkat_kartu(df, metrik):
+    return peringkat(df, 'kartu', metrik)
+
+def kpi_mesin(df, metrik):
+    return {
+        'nilai': df[metrik].sum(),
+        'aktivasi': df['Jumlah Diaktifkan'].sum(),
+        'mesin_aktif': df['GT_FINAL'].nunique(),
+        'toko_aktif': df['Center'].nunique(),
+    }
+
+def tren_mesin(df, metrik):
+    return {
+        'komponen': _komponen(df, KOMPONEN_MESIN),
+        **_tren_umum(df, metrik),
+        'proporsi_toko': _sum_per(df, 'Center', metrik),
+    }
+
+def peringkat_mesin(df, metrik):
+    return peringkat(df, 'mesin', metrik)
+
+AGREGASI = {
+    'kartu': {'kpi': kpi_kartu, 'tren': tren_kartu, 'peringkat': peringkat_kartu, 'bulanan': bulanan},
+    'mesin': {'kpi': kpi_mesin, 'tren': tren_mesin, 'peringkat': peringkat_mesin, 'bulanan': bulanan},
+}
+
+# Kolom yang dibaca tiap bagian selain metrik: baris terfilter hanya diambil untuk kolom ini
+KOLOM_BAGIAN = {
+    'kartu': {
+        'kpi': ['Jumlah_Dibeli', 'Folder_Asal', 'Tipe_Grup'],
+        'tren': ['Tanggal', 'Folder_Asal', *KOMPONEN_KARTU],
+        'peringkat': list(DIMENSI_PERINGKAT['kartu'].values()),
+        'bulanan': ['Tahun', 'Bulan_Urut'],
+    },
+    'mesin': {
+        'kpi': ['Jumlah Diaktifkan', 'GT_FINAL', 'Center'],
+        'tren': ['Tanggal', 'Center', *KOMPONEN_MESIN],
+        'peringkat': list(DIMENSI_PERINGKAT['mesin'].values()),
+        'bulanan': ['Tahun', 'Bulan_Urut'],
+    },
+}
+
+def agregasi(indeks, bagian, baris, metrik):
+    """AGREGASI[dataset][bagian] atas posisi `baris` dari filter_indeks."""
+    dataset = indeks['dataset']
+    df = ambil(indeks, baris, [metrik, *KOLOM_BAGIAN[dataset][bagian]])
+    return AGREGASI[dataset][bagian](df, metrik)
+
+def tren_spesifik(df, breakdown_col, metrik):
+    return _sum_per(df, ['Tanggal', breakdown_col], metrik)
+
+def tren_spesifik_indeks(indeks, baris, breakdown_col, metrik):
+    """tren_spesifik atas posisi `baris` dari filter_indeks."""
+    return tren_spesifik(ambil(indeks, baris, ['Tanggal', breakdown_col, metrik]), breakdown_col, metrik)
+
+def opsi_filter_indeks(indeks, baris):
+    """opsi_filter_lokal atas posisi `baris` dari filter_indeks."""
+    dataset = indeks['dataset']
+    return opsi_filter_lokal(ambil(indeks, baris, KOLOM_FILTER_LOKAL[dataset]), dataset)
+
+# ================= REDUKSI DATA GRAFIK =================
+# Grafik garis dengan timeline panjang / ratusan seri (mis. per GT_FINAL) menghasilkan
+# JSON plotly berukuran MB. Sebelum digambar, data diringkas di server:
+# 1. seri di luar top-N (total metrik) digabung jadi satu seri "Lainnya"
+# 2. titik per seri > MAKS_TITIK_SERI -> resample ke minggu, lalu ke bulan jika masih banyak
+# 3. jika masih > MAKS_TITIK_SERI (rentang sangat panjang) -> LTTB per seri
+# Jumlah titik per grafik jadi paling banyak (TOP_N_SERI + 1) x MAKS_TITIK_SERI.
+MAKS_TITIK_SERI = 150
+TOP_N_SERI = 9          # + "Lainnya" = 10 seri, sesuai jumlah warna palet default plotly
+LABEL_LAINNYA = "Lainnya"
+# (frekuensi period, keterangan); tanggal hasil = awal periode (Senin / tanggal 1)
+FREKUENSI_RESAMPLE = [('W-SUN', 'per minggu'), ('M', 'per bulan')]
+
+def lttb(x, y, n_out):
+    """
+    Indeks titik terpilih dengan Largest-Triangle-Three-Buckets: titik pertama & terakhir
+    selalu ikut, lalu satu titik per bucket yang membentuk segitiga terbesar dengan titik
+    terpilih sebelumnya dan rata-rata bucket berikutnya (bentuk puncak/lembah terjaga).
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    # n_out - 2 bucket di antara titik pertama dan terakhir
+    batas = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = batas[i], batas[i + 1]
+        if i + 2 < len(batas):
+            avg_x, avg_y = x[hi:batas[i + 2]].mean(), y[hi:batas[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        luas = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(luas))
+        idx[i + 1] = a
+    return idx
+
+def _gabung_lainnya(df, seri, metrik, top_n):
+    total = df.groupby(seri, observed=True)[metrik].sum()
+    if len(total) <= top_n:
+        return df, 0
+    top = set(total.nlargest(top_n).index)
+    lain = ~df[seri].isin(top)
+    label = f"{LABEL_LAINNYA} ({len(total) - top_n} seri)"
+    df_lain = df[lain].groupby('Tanggal', observed=True)[metrik].sum().reset_index()
+    df_lain[seri] = label
+    return pd.concat([df[~lain], df_lain], ignore_index=True), len(total) - top_n
+
+def reduksi_tren(df, metrik, seri=None, maks_titik=MAKS_TITIK_SERI, top_n=TOP_N_SERI):
+    """
+    Ringkas tabel tren (Tanggal [, seri], metrik) untuk grafik garis. Hasil tetap urut
+    Tanggal (lalu seri); keterangan reduksi ada di df.attrs['reduksi'] (teks, kosong jika
+    data tidak diubah), untuk judul grafik.
+    """
+    keterangan = []
+    if seri is not None:
+        df, n_lain = _gabung_lainnya(df, seri, metrik, top_n)
+        if n_lain:
+            keterangan.append(f"top {top_n} + {LABEL_LAINNYA}")
+    by = [seri] if seri is not None else []
+
+    n_tanggal = df['Tanggal'].nunique()
+    if n_tanggal > maks_titik:
+        for freq, label in FREKUENSI_RESAMPLE:
+            periode = df['Tanggal'].dt.to_period(freq).dt.start_time
+            n_periode = periode.nunique()
+            # Frekuensi terkasar tetap dipakai jika mengurangi titik (sisanya dirapikan LTTB)
+            if n_periode <= maks_titik or (freq == FREKUENSI_RESAMPLE[-1][0] and n_periode < n_tanggal):
+                df = df.assign(Tanggal=periode).groupby(['Tanggal'] + by, observed=True)[metrik].sum().reset_index()
+                keterangan.append(label)
+                break
+
+    if df['Tanggal'].nunique() > maks_titik:
+        bagian = []
+        for _, d in (df.groupby(seri, observed=True, sort=False) if seri is not None else [(None, df)]):
+            d = d.sort_values('Tanggal')
+            bagian.append(d.iloc[lttb(d['Tanggal'].to_numpy().astype('int64'), d[metrik].to_numpy(), maks_titik)])
+        df = pd.concat(bagian, ignore_index=True)
+        keterangan.append(f"maks {maks_titik} titik")
+
+    if keterangan:
+        df = df.sort_values(['Tanggal'] + by, kind='stable').reset_index(drop=True)
+    else:
+        df = df.copy(deep=False)
+    df.attrs['reduksi'] = ", ".join(keterangan)
+    return df
@@ -0,0 +1,347 @@
+import pandas as pd
+import numpy as np
+import pyarrow.feather as feather
+import os
+import io
+import gzip
+import re
+import argparse
+import glob
+import threading
+import time
+from ingest_umum import hash_file
+
+# ================= KONFIGURASI DATA DASHBOARD =================
+# File bersih yang dibaca dashboard lokal
+FILE_KARTU = os.path.join("output", "CLEAN_DATA_TRANSAKSI_FINAL_V4.xlsx")
+FILE_MESIN = os.path.join("output", "dashboard_in_scope_compact_v3.xlsx")
+
+# Cube agregat (ditulis di samping data bersih, lihat bagian __main__)
+FILE_CUBE_KARTU = os.path.join("output", "CUBE_KARTU.parquet")
+FILE_CUBE_MESIN = os.path.join("output", "CUBE_MESIN.parquet")
+
+# Snapshot Arrow/Feather dari data yang sudah dibersihkan (lihat baca_bersih)
+SNAPSHOT_DIR = os.path.join("output", "snapshot")
+# Naikkan jika logika cleaning / skema berubah supaya snapshot lama (dan cache Google
+# Sheets di gsheet_sync) tidak dipakai
+VERSI_SNAPSHOT = 1
+
+MAP_BULAN_INDO = {
+    1: 'Januari', 2: 'Februari', 3: 'Maret', 4: 'April', 5: 'Mei', 6: 'Juni',
+    7: 'Juli', 8: 'Agustus', 9: 'September', 10: 'Oktober', 11: 'November', 12: 'Desember'
+}
+
+NUM_COLS_KARTU = ['Total_Sales', 'Jumlah_Dibeli', 'Biaya', 'Masuk_Kredit', 'Masuk_Bonus']
+STR_COLS_KARTU = ['Folder_Asal', 'Nama_Toko_Internal', 'Tipe_Grup', 'Kategori_Paket', 'Nominal_Grup', 'Paket']
+COUNT_COLS_KARTU = ['Jumlah_Dibeli']
+
+NUM_COLS_MESIN = ['Jumlah Diaktifkan', 'Kredit yg Digunakan', 'Bonus yg Digunakan', 'Total']
+STR_COLS_MESIN = ['Center', 'GT_FINAL', 'Kategori Game']
+COUNT_COLS_MESIN = ['Jumlah Diaktifkan']
+
+EXCLUSIONS_MESIN = [
+    'KIDDIE LAND', 'KIDDIE LAND 1 JAM', 'KIDDIELAND MINI', 'KIDDIELAND SEPUASNYA', 'KIDDIE ZONE 1 JAM',
+    'Cek Saldo', 'E-TICKET', 'E-Ticket', 'CEK SALDO'
+]
+
+# Dimensi cube: grain Tanggal mengikuti data (data kartu & mesin sudah per bulan)
+CUBE_DIMS_KARTU = ['Tanggal', 'Folder_Asal', 'Tipe_Grup', 'Kategori_Paket']
+CUBE_DIMS_MESIN = ['Tanggal', 'Center', 'Kategori Game', 'GT_FINAL']
+
+# ================= CLEANING =================
+def _bersihkan_angka(df, num_cols, angka_format_id):
+    for col in num_cols:
+        if col in df.columns:
+            if angka_format_id and df[col].dtype == object:
+                # Hapus titik ribuan, ganti koma desimal jadi titik (format Google Sheets)
+                df[col] = df[col].astype(str).str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        else:
+            df[col] = 0
+    return df
+
+def tambah_kolom_waktu(df):
+    tahun = df['Tanggal'].dt.year
+    bulan = df['Tanggal'].dt.month
+    df['Tahun'] = tahun.astype('int16')
+    df['Bulan_Urut'] = bulan.astype('int8')
+    df['Bulan_Key'] = (tahun * 100 + bulan).astype('int32')  # yyyymm
+    df['Nama_Bulan'] = pd.Categorical(bulan.map(MAP_BULAN_INDO), categories=list(MAP_BULAN_INDO.values()), ordered=True)
+    return df
+
+# ================= SKEMA KOMPAK =================
+# Dimensi teks -> category (groupby/isin jalan di kode integer), hitungan -> int32.
+# Kolom uang tetap float64: float32 hanya ~7 digit, total Rupiah (miliar) akan bergeser.
+def kompakkan(df, str_cols, count_cols):
+    for c in str_cols:
+        if c not in df.columns:
+            continue
+        if isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].cat.remove_unused_categories()
+        else:
+            df[c] = df[c].astype('category')
+    for c in count_cols:
+        if c in df.columns and df[c].dtype.kind in 'iuf':
+            v = df[c].to_numpy()
+            if np.isfinite(v).all() and (v == np.round(v)).all() and (np.abs(v) < 2**31).all():
+                df[c] = v.astype('int32')
+    return df
+
+def bersihkan_kartu(df, angka_format_id=False):
+    """Cleaning data kartu. Return None jika kolom Tanggal tidak ada."""
+    if 'Tanggal' not in df.columns:
+        return None
+    df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
+    df = df.dropna(subset=['Tanggal'])
+
+    df = _bersihkan_angka(df, NUM_COLS_KARTU, angka_format_id)
+    df = tambah_kolom_waktu(df)
+
+    for c in STR_COLS_KARTU:
+        if c in df.columns:
+            df[c] = df[c].astype(str).str.strip()
+    return kompakkan(df, STR_COLS_KARTU, COUNT_COLS_KARTU)
+
+def bersihkan_mesin(df, angka_format_id=False):
+    """Cleaning data mesin + buang GT_FINAL non-game. Return None jika kolom Tanggal tidak ada."""
+    if 'Center_MAPPED' in df.columns:
+        df = df.rename(columns={'Center_MAPPED': 'Center'})
+    if 'Tanggal' not in df.columns:
+        return None
+    if df['Tanggal'].dtype == object:
+        # Handle empty strings first (sel kosong dari Google Sheets)
+        df = df[df['Tanggal'] != '']
+    df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
+    df = df.dropna(subset=['Tanggal'])
+
+    df = _bersihkan_angka(df, NUM_COLS_MESIN, angka_format_id)
+    df = tambah_kolom_waktu(df)
+
+    for c in STR_COLS_MESIN:
+        if c in df.columns:
+            df[c] = df[c].astype(str).str.strip()
+
+    if 'GT_FINAL' in df.columns:
+        pattern = '|'.join([re.escape(x) for x in EXCLUSIONS_MESIN])
+        df = df[~df['GT_FINAL'].str.contains(pattern, case=False, na=False)]
+    return kompakkan(df, STR_COLS_MESIN, COUNT_COLS_MESIN)
+
+# ================= SNAPSHOT DATA BERSIH =================
+# pd.read_excel (openpyxl) + cleaning mendominasi cold start. Hasil cleaning disimpan
+# sebagai Feather tanpa kompresi dengan kunci hash isi file sumber, lalu dibaca lagi
+# dengan memory-map pada start berikutnya. Hash memakai ingest_umum.hash_file (sama
+# dengan state ingest).
+_KOLOM_INDEX_SNAPSHOT = '__index_level_0__'
+
+def _path_snapshot(nama, sha256):
+    return os.path.join(SNAPSHOT_DIR, f"{nama}_v{VERSI_SNAPSHOT}_{sha256[:16]}.arrow")
+
+def baca_bersih(nama, source_path, bersihkan):
+    """
+    Data bersih dari `source_path` (xlsx). Pakai snapshot jika hash file sumber sama,
+    selain itu baca xlsx, bersihkan, lalu tulis snapshot baru. Return None jika
+    `bersihkan` mengembalikan None.
+    """
+    snap_path = _path_snapshot(nama, hash_file(source_path))
+    if os.path.exists(snap_path):
+        try:
+            df = feather.read_table(snap_path, memory_map=True).to_pandas()
+            df = df.set_index(_KOLOM_INDEX_SNAPSHOT)
+            df.index.name = None
+            return df
+        except Exception as e:
+            print(f"⚠️ Snapshot {snap_path} tidak bisa dibaca, baca ulang sumber: {e}")
+
+    df = bersihkan(pd.read_excel(source_path))
+    if df is None:
+        return None
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp_path = snap_path + ".tmp"
+        feather.write_feather(df.reset_index(names=_KOLOM_INDEX_SNAPSHOT), tmp_path, compression='uncompressed')
+        os.replace(tmp_path, snap_path)
+        # Buang snapshot lama dari sumber yang sama
+        for old in glob.glob(os.path.join(SNAPSHOT_DIR, f"{nama}_v*.arrow")):
+            if os.path.abspath(old) != os.path.abspath(snap_path):
+                os.remove(old)
+    except Exception as e:
+        print(f"⚠️ Gagal menulis snapshot {snap_path}: {e}")
+    return df
+
+# ================= CUBE AGREGAT =================
+# Semua grafik KPI/tren/peringkat hanya butuh SUM dan jumlah nilai unik per dimensi,
+# jadi cukup dihitung dari tabel yang sudah di-sum per (Tanggal x toko x kategori).
+def _bangun_cube(df, dims, metrics, str_cols, count_cols):
+    dims = [d for d in dims if d in df.columns]
+    cube = df.groupby(dims, dropna=False, sort=True, observed=True)[metrics].sum().reset_index()
+    return kompakkan(tambah_kolom_waktu(cube), str_cols, count_cols)
+
+def bangun_cube_kartu(df):
+    return _bangun_cube(df, CUBE_DIMS_KARTU, NUM_COLS_KARTU, STR_COLS_KARTU, COUNT_COLS_KARTU)
+
+def bangun_cube_mesin(df):
+    return _bangun_cube(df, CUBE_DIMS_MESIN, NUM_COLS_MESIN, STR_COLS_MESIN, COUNT_COLS_MESIN)
+
+def versi_data(df):
+    """Hash isi DataFrame (hex). Dipakai sebagai kunci cache: berubah hanya jika isi data berubah."""
+    return format(int(pd.util.hash_pandas_object(df, index=False).sum()) & 0xFFFFFFFFFFFFFFFF, '016x')
+
+def baca_cube(cube_path, source_path):
+    """Baca cube jika ada dan tidak lebih lama dari file sumbernya, selain itu None."""
+    if not os.path.exists(cube_path):
+        return None
+    if os.path.exists(source_path) and os.path.getmtime(cube_path) < os.path.getmtime(source_path):
+        return None
+    return pd.read_parquet(cube_path)
+
+# ================= CACHE DATA BERSAMA (SATU PROSES) =================
+# Modul yang di-import tetap hidup selama proses Streamlit berjalan, jadi dict di sini
+# dipakai bersama oleh semua sesi/pengguna. Data dimuat ulang hanya jika versinya
+# berubah; selama pemuatan ulang berjalan di background, sesi lain tetap memakai
+# data versi lama (tidak ada request yang menunggu, kecuali belum ada data sama sekali).
+_DATA_BERSAMA = {}   # nama -> {'versi': ..., 'data': ..., 'tutup': ...}
+_PEMUAT = {}         # nama -> job pemuatan yang sedang berjalan
+_LOCK_BERSAMA = threading.Lock()
+# Data lama yang punya resource (mis. koneksi DuckDB) ditutup setelah jeda ini, supaya
+# rerun sesi yang masih memegang data lama sempat selesai
+JEDA_TUTUP_DETIK = 60
+
+def versi_file(*paths):
+    """Versi murah dari mtime + ukuran file (dicek setiap rerun). File yang tidak ada ikut tercatat."""
+    bagian = []
+    for path in paths:
+        try:
+            st_ = os.stat(path)
+            bagian.append(f"{st_.st_mtime_ns}-{st_.st_size}")
+        except OSError:
+            bagian.append("-")
+    return "|".join(bagian)
+
+def versi_waktu(interval_detik):
+    """Versi berbasis slot waktu, untuk sumber yang tidak bisa dicek murah (mis. Google Sheets)."""
+    return str(int(time.time() // interval_detik))
+
+def _tutup_nanti(entry):
+    # entry = isi _DATA_BERSAMA yang baru saja diganti / dibuang
+    if entry is None or entry.get('tutup') is None:
+        return
+
+    def _tutup():
+        try:
+            entry['tutup'](entry['data'])
+        except Exception as e:
+            print(f"⚠️ Gagal menutup data lama (versi {entry['versi']}): {e}")
+
+    timer = threading.Timer(JEDA_TUTUP_DETIK, _tutup)
+    timer.daemon = True
+    timer.start()
+
+def _mulai_muat(nama, versi, loader, tutup=None):
+    # Dipanggil dengan _LOCK_BERSAMA dipegang
+    job = _PEMUAT.get(nama)
+    if job is not None and job['versi'] == versi:
+        return job
+    job = {'versi': versi, 'selesai': threading.Event(), 'error': None}
+
+    def _jalankan():
+        try:
+            data = loader()
+            with _LOCK_BERSAMA:
+                lama = _DATA_BERSAMA.get(nama)
+                _DATA_BERSAMA[nama] = {'versi': versi, 'data': data, 'tutup': tutup}
+            _tutup_nanti(lama)
+        except Exception as e:
+            job['error'] = e
+            print(f"❌ Gagal memuat {nama} (versi {versi}): {e}")
+        finally:
+            with _LOCK_BERSAMA:
+                if _PEMUAT.get(nama) is job:
+                    del _PEMUAT[nama]
+            job['selesai'].set()
+
+    _PEMUAT[nama] = job
+    threading.Thread(target=_jalankan, name=f"muat-{nama}", daemon=True).start()
+    return job
+
+def preload(nama, versi, loader, tutup=None):
+    """Mulai memuat data di background jika versi ini belum ada / belum sedang dimuat."""
+    with _LOCK_BERSAMA:
+        entry = _DATA_BERSAMA.get(nama)
+        if entry is None or entry['versi'] != versi:
+            _mulai_muat(nama, versi, loader, tutup)
+
+def muat_bersama(nama, versi, loader, tutup=None):
+    """
+    Data `nama` untuk `versi` dari cache proses.
+    - Versi sama: langsung dikembalikan (objek yang sama untuk semua sesi, jangan dimodifikasi).
+    - Versi berubah & ada data lama: muat ulang di background, kembalikan data lama.
+    - Belum ada data: tunggu pemuatan selesai; error loader di-raise ke pemanggil.
+    `tutup(data)` (opsional) dipanggil untuk data lama setelah diganti / di-invalidasi.
+    """
+    with _LOCK_BERSAMA:
+        entry = _DATA_BERSAMA.get(nama)
+        if entry is not None and entry['versi'] == versi:
+            return entry['data']
+        job = _mulai_muat(nama, versi, loader, tutup)
+        if entry is not None:
+            return entry['data']
+    job['selesai'].wait()
+    if job['error'] is not None:
+        raise job['error']
+    with _LOCK_BERSAMA:
+        return _DATA_BERSAMA[nama]['data']
+
+def invalidasi(nama=None):
+    """Buang data bersama (semua jika nama None); akses berikutnya memuat ulang."""
+    with _LOCK_BERSAMA:
+        dibuang = [_DATA_BERSAMA.pop(key, None) for key in ([nama] if nama else list(_DATA_BERSAMA))]
+    for entry in dibuang:
+        _tutup_nanti(entry)
+
+# ================= EXPORT DATA MENTAH =================
+# format -> (label tombol, ekstensi, mime)
+FORMAT_EXPORT = {
+    'xlsx': ("Excel (.xlsx)", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    'csv': ("CSV (.csv)", ".csv", "text/csv"),
+    'csv.gz': ("CSV terkompresi (.csv.gz)", ".csv.gz", "application/gzip"),
+    'parquet': ("Parquet (.parquet)", ".parquet", "application/octet-stream"),
+}
+
+def export_bytes(df, fmt, sheet_name="Data"):
+    """Serialisasi DataFrame ke bytes sesuai format di FORMAT_EXPORT."""
+    if fmt == 'xlsx':
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+            df.to_excel(writer, index=False, sheet_name=sheet_name)
+        return buffer.getvalue()
+    if fmt == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    if fmt == 'csv.gz':
+        return gzip.compress(df.to_csv(index=False).encode('utf-8'), compresslevel=6)
+    if fmt == 'parquet':
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    raise ValueError(f"Format export tidak dikenal: {fmt}")
+
+# ================= MAIN: BANGUN CUBE SETELAH DATA BERSIH DIPERBARUI =================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bangun cube agregat untuk dashboard dari data bersih di folder output.")
+    parser.parse_args()
+
+    for nama, source_path, cube_path, bersihkan, bangun in [
+        ("Kartu", FILE_KARTU, FILE_CUBE_KARTU, bersihkan_kartu, bangun_cube_kartu),
+        ("Mesin", FILE_MESIN, FILE_CUBE_MESIN, bersihkan_mesin, bangun_cube_mesin),
+    ]:
+        if not os.path.exists(source_path):
+            print(f"⚠️ {nama}: file tidak ditemukan, dilewati: {source_path}")
+            continue
+        print(f"📖 {nama}: membaca {source_path}")
+        # Sekalian menyiapkan snapshot data bersih untuk cold start dashboard
+        df = baca_bersih(nama.lower(), source_path, bersihkan)
+        if df is None:
+            print(f"❌ {nama}: kolom Tanggal tidak ditemukan")
+            continue
+        cube = bangun(df)
+        cube.to_parquet(cube_path, index=False)
+        print(f"✅ {nama}: {len(df):,} baris -> cube {len(cube):,} baris ({cube_path})")
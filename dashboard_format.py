@@ -0,0 +1,117 @@
+import numpy as np
+
+# ================= FORMAT ANGKA INDONESIA =================
+# Versi skalar dipakai untuk KPI (satu nilai per metric). Label grafik memakai versi
+# vektor (*_vektor): satu operasi numpy per kolom alih-alih .apply per baris, dengan
+# string hasil yang sama persis dengan versi skalar.
+
+def format_rupiah(nilai):
+    return f"Rp {nilai:,.0f}".replace(',', '.')
+
+def format_id(x):
+    return f"{int(x):,}".replace(",", ".")
+
+def format_angka(nilai):
+    return f"{nilai:,.0f}".replace(',', '.')
+
+def format_label_chart(nilai):
+    if nilai >= 1_000_000_000:
+        val = f"{nilai/1_000_000_000:.1f}".replace('.', ',')
+        if val.endswith(",0"): val = val[:-2]
+        return f"{val} M"
+    elif nilai >= 1_000_000:
+        val = f"{nilai/1_000_000:.1f}".replace('.', ',')
+        if val.endswith(",0"): val = val[:-2]
+        return f"{val} Jt"
+    elif nilai >= 1_000:
+        val = f"{nilai/1_000:.0f}".replace('.', ',')
+        return f"{val} Rb"
+    else:
+        return str(int(nilai))
+
+# ================= VERSI VEKTOR =================
+# Teks dibangun sebagai matriks byte (satu baris per nilai, digit ditulis dari kanan),
+# lalu dibaca sebagai array bytes numpy; penyambungan prefix/suffix memakai np.strings
+# (ufunc), dan konversi ke str Python hanya sekali di akhir.
+# Pembulatan f-string (.0f/.1f) = pembulatan tepat nilai biner, half-even. np.rint pada
+# nilai itu sendiri identik; untuk .1f nilainya dikali 10 dulu sehingga bisa bergeser
+# tepat di sekitar ,x5 -> elemen yang "hampir setengah" (dan nilai di luar jangkauan
+# int64 / bukan angka) diformat dengan versi skalar. Jumlahnya praktis nol.
+_TOLERANSI_SETENGAH = 1e-6
+_BATAS_EKSAK = 2.0 ** 53
+
+def _digit(v, pemisah=b'.'):
+    """int64 >= 0 -> array bytes angka desimal, dengan pemisah ribuan (None = tanpa)."""
+    lebar = 19 + (6 if pemisah else 0)
+    buf = np.full((len(v), lebar), ord(' '), dtype=np.uint8)
+    x = v.copy()
+    pos, k = lebar - 1, 0
+    while True:
+        buf[:, pos] = np.where((x > 0) | (k == 0), ord('0') + x % 10, ord(' '))
+        x //= 10
+        pos, k = pos - 1, k + 1
+        if not x.any():
+            break
+        if pemisah and k % 3 == 0:
+            buf[:, pos] = np.where(x > 0, ord(pemisah), ord(' '))
+            pos -= 1
+    teks = np.ascontiguousarray(buf[:, pos + 1:]).view(f'S{lebar - pos - 1}').ravel()
+    return np.strings.lstrip(teks)
+
+def _bertanda(teks, minus):
+    return np.where(minus, np.strings.add(b'-', teks), teks)
+
+def _selesai(teks, nilai, mask, fungsi):
+    """bytes -> array object berisi str, elemen mask diformat dengan fungsi skalar."""
+    out = teks.astype(str).astype(object)
+    for i in np.flatnonzero(mask):
+        out[i] = fungsi(nilai[i])
+    return out
+
+def _siapkan(values):
+    """(nilai float64, mask elemen untuk versi skalar, nilai aman untuk numpy)."""
+    nilai = np.asarray(values, dtype='float64').ravel()
+    aneh = ~np.isfinite(nilai) | (np.abs(nilai) >= _BATAS_EKSAK)
+    return nilai, aneh, np.where(aneh, 0.0, nilai)
+
+def _angka(aman):
+    # -0.0 (mis. -0.4 dibulatkan) tetap bertanda "-0" seperti f-string
+    return _bertanda(_digit(np.abs(np.rint(aman)).astype(np.int64)), np.signbit(aman))
+
+def format_angka_vektor(values):
+    nilai, aneh, aman = _siapkan(values)
+    return _selesai(_angka(aman), nilai, aneh, format_angka)
+
+def format_rupiah_vektor(values):
+    nilai, aneh, aman = _siapkan(values)
+    return _selesai(np.strings.add(b'Rp ', _angka(aman)), nilai, aneh, format_rupiah)
+
+def format_id_vektor(values):
+    nilai, aneh, aman = _siapkan(values)
+    v = np.trunc(aman).astype(np.int64)
+    return _selesai(_bertanda(_digit(np.abs(v)), v < 0), nilai, aneh, format_id)
+
+def _satu_desimal(q, satuan):
+    """Teks "12,3 <satuan>" / "12 <satuan>" (",0" dibuang) dari q >= 0, plus mask ragu (hampir ,x5)."""
+    t = q * 10
+    ragu = np.abs(t - np.floor(t) - 0.5) < _TOLERANSI_SETENGAH
+    r = np.rint(t).astype(np.int64)
+    utuh, desimal = _digit(r // 10, None), r % 10
+    koma = np.strings.add(np.strings.add(utuh, b','), _digit(desimal, None))
+    return np.strings.add(np.where(desimal == 0, utuh, koma), satuan), ragu
+
+def format_label_chart_vektor(values):
+    nilai, aneh, aman = _siapkan(values)
+    teks = np.empty(len(nilai), dtype='S32')
+    ragu = aneh.copy()
+
+    is_m = aman >= 1_000_000_000
+    is_jt = ~is_m & (aman >= 1_000_000)
+    is_rb = ~is_m & ~is_jt & (aman >= 1_000)
+    kecil = ~(is_m | is_jt | is_rb)
+    v = np.trunc(aman[kecil]).astype(np.int64)
+    teks[kecil] = _bertanda(_digit(np.abs(v), None), v < 0)
+    teks[is_m], ragu[is_m] = _satu_desimal(aman[is_m] / 1_000_000_000, b' M')
+    teks[is_jt], ragu[is_jt] = _satu_desimal(aman[is_jt] / 1_000_000, b' Jt')
+    teks[is_rb] = np.strings.add(_digit(np.rint(aman[is_rb] / 1_000).astype(np.int64), None), b' Rb')
+    return _selesai(teks, nilai, ragu, format_label_chart)
@@ -0,0 +1,759 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from dateutil.relativedelta import relativedelta
+import dashboard_data
+import dashboard_agg
+import dashboard_yoy
+from dashboard_format import format_rupiah, format_id, format_id_vektor, format_label_chart_vektor
+import dashboard_profil
+import dashboard_sql
+
+# Halaman, getter ber-cache, login & navigasi yang dipakai bersama oleh dashboard.py (file lokal /
+# DuckDB) dan dashboard_gsheet.py (Google Sheets). Entry point hanya berisi cara memuat datanya:
+# load_data_kartu() / load_data_mesin() mengembalikan dict {'raw', 'sumber', 'info', 'yoy'}
+# (lihat siapkan_dataset) atau None jika gagal.
+
+# ================= 1. PROFILING =================
+def mulai_profil(nama):
+    """Profiling render (opsional): env DASHBOARD_PROFIL=1 atau toggle "Mode Profiling" di sidebar.
+    Waktu tiap blok (load, filter, KPI, agregasi & grafik) tampil di sidebar dan masuk log."""
+    if 'profil' not in st.session_state:
+        st.session_state['profil'] = dashboard_profil.aktif_dari_env()
+    return dashboard_profil.Profiler(nama, aktif=st.session_state['profil'])
+
+# ================= 2. LOGIN & AUTH =================
+def check_login(users, username, password):
+    if username in users and users[username] == password:
+        st.session_state['logged_in'] = True
+        st.success("Login Berhasil!")
+        st.rerun() 
+    else:
+        st.error("Username atau Password salah!")
+
+def tampilkan_login(users):
+    st.markdown("<h1 style='text-align: center;'>🔐 Login Dashboard</h1>", unsafe_allow_html=True)
+    st.markdown("---")
+    c1, c2, c3 = st.columns([1, 1, 1])
+    with c2:
+        with st.form("login_form"):
+            user = st.text_input("Username")
+            pwd = st.text_input("Password", type="password")
+            if st.form_submit_button("Masuk"):
+                check_login(users, user, pwd)
+
+# Dipanggil entry point setelah warm-up dimulai, supaya data bisa dimuat di background
+# selama pengguna login
+def gerbang_login(users):
+    """Tampilkan form login dan hentikan script sampai pengguna berhasil login."""
+    if 'logged_in' not in st.session_state:
+        st.session_state['logged_in'] = False
+    if not st.session_state['logged_in']:
+        tampilkan_login(users)
+        st.stop()
+
+# ================= 3. HELPER FUNCTIONS =================
+# Format angka Indonesia (skalar untuk KPI, *_vektor untuk label grafik) ada di dashboard_format
+
+# Helper Filter Lokal
+def create_local_filter(opsi_lokal, label, col_name, key_prefix):
+    if col_name not in opsi_lokal: return []
+    options = opsi_lokal[col_name]
+    return st.multiselect(f"Filter {label}", options, default=[], key=f"loc_{key_prefix}_{col_name}", placeholder="Semua (Kosongkan untuk memilih semua)")
+
+def create_sidebar_filter_options(df, col_name):
+    if col_name not in df.columns: return []
+    return sorted(df[col_name].dropna().unique())
+
+def judul_grafik(judul, df):
+    """Judul + keterangan jika data grafik diringkas (dashboard_agg.reduksi_tren)."""
+    ket = df.attrs.get('reduksi')
+    return f"{judul} ({ket})" if ket else judul
+
+# ================= 4. DATA & AGREGASI =================
+def info_dataset(df, cube, dataset):
+    """Versi, rentang tanggal & daftar toko untuk filter sidebar (dihitung sekali per versi data)."""
+    return {
+        'versi': cube.attrs['versi'],
+        'versi_raw': df.attrs['versi'],
+        'tanggal_min': cube['Tanggal'].min(),
+        'tanggal_max': cube['Tanggal'].max(),
+        'toko': create_sidebar_filter_options(cube, dashboard_agg.KOLOM_TOKO[dataset]),
+        'n_raw': len(df),
+    }
+
+def siapkan_dataset(df, cube, dataset):
+    """Data bersih + cube agregat -> data halaman (dibangun sekali per versi data, read-only)."""
+    df.attrs['versi'] = dashboard_data.versi_data(df)
+    cube.attrs['versi'] = dashboard_data.versi_data(cube)
+    # Indeks filter (data terurut per Tanggal + kode kategori)
+    # Matriks tahun x bulan per toko untuk grafik tahunan & YoY (semua metrik, semua tahun)
+    return {'raw': df, 'sumber': dashboard_agg.bangun_indeks(cube, dataset), 'info': info_dataset(df, cube, dataset),
+            'yoy': dashboard_yoy.bangun_yoy(cube, dataset)}
+
+def pakai_sql(sumber):
+    """True jika sumber adalah koneksi DuckDB (dashboard_sql.buka), bukan indeks filter pandas."""
+    return 'con' in sumber
+
+# Pratinjau tab Data Mentah pada backend SQL (export tetap berisi semua baris)
+BATAS_PRATINJAU_SQL = 50_000
+
+# Backend SQL tidak memuat data bersih ke memori: data['raw'] None, baris dibaca dari DuckDB
+def data_mentah_terurut(data, dataset):
+    """Data bersih urut Tanggal terbaru dulu. Backend SQL: hanya BATAS_PRATINJAU_SQL baris teratas."""
+    if data['raw'] is None:
+        return dashboard_sql.data_mentah(data['sumber'], dataset, limit=BATAS_PRATINJAU_SQL)
+    return data['raw'].sort_values('Tanggal', ascending=False)
+
+def sumber_export(data, dataset):
+    """Data untuk get_export; backend SQL: callable, data penuh baru dibaca saat export dibuat."""
+    if data['raw'] is None:
+        return lambda: dashboard_sql.data_mentah(data['sumber'], dataset)
+    return data['raw']
+
+# Agregasi per kombinasi filter (versi data, rentang tanggal, toko, filter lokal, metrik).
+# max_entries membatasi memori: kombinasi yang paling lama tidak dipakai dibuang lebih dulu (LRU).
+# Argumen berawalan "_" tidak ikut di-hash; versi data sudah mewakili isi cube.
+# `_sumber` = indeks filter (pandas) atau koneksi DuckDB (backend SQL, lihat pakai_sql).
+@st.cache_data(max_entries=128, show_spinner=False)
+def get_opsi_filter(versi, dataset, start_date, end_date, tokos, _sumber):
+    if pakai_sql(_sumber):
+        return dashboard_sql.opsi_filter(_sumber, dataset, start_date, end_date, tokos)
+    baris = dashboard_agg.filter_indeks(_sumber, start_date, end_date, tokos)
+    return dashboard_agg.opsi_filter_indeks(_sumber, baris), len(baris)
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def get_agregasi(versi, dataset, bagian, start_date, end_date, tokos, filters, metrik, _sumber):
+    if pakai_sql(_sumber):
+        hasil = dashboard_sql.agregasi(_sumber, dataset, bagian, start_date, end_date, tokos, filters, metrik)
+    else:
+        baris = dashboard_agg.filter_indeks(_sumber, start_date, end_date, tokos, filters)
+        hasil = dashboard_agg.agregasi(_sumber, bagian, baris, metrik)
+    if bagian == 'tren':
+        # Timeline panjang diringkas di server supaya payload grafik tetap kecil
+        hasil['harian'] = dashboard_agg.reduksi_tren(hasil['harian'], metrik)
+    return hasil
+
+# Grafik tahunan & bulanan (YoY) dibaca dari matriks yang dibangun saat load. Hanya jika
+# filter spesifik aktif, tabel bulanan terfilter dihitung lalu diubah ke bentuk matriks.
+@st.cache_data(max_entries=128, show_spinner=False)
+def get_yoy(versi, dataset, start_date, end_date, tokos, filters, metrik, _yoy, _sumber):
+    if any(values for _, values in filters):
+        df_bulanan = get_agregasi(versi, dataset, 'bulanan', start_date, end_date, tokos, filters, metrik, _sumber)
+        return dashboard_yoy.dari_bulanan(df_bulanan, metrik)
+    return dashboard_yoy.pilih(_yoy, metrik, start_date, end_date, tokos)
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def get_tren_spesifik(versi, dataset, start_date, end_date, tokos, filters, breakdown_col, metrik, _sumber):
+    if pakai_sql(_sumber):
+        df_tren = dashboard_sql.tren_spesifik(_sumber, dataset, start_date, end_date, tokos, filters, breakdown_col, metrik)
+    else:
+        baris = dashboard_agg.filter_indeks(_sumber, start_date, end_date, tokos, filters)
+        df_tren = dashboard_agg.tren_spesifik_indeks(_sumber, baris, breakdown_col, metrik)
+    # Top-N seri + "Lainnya", resample minggu/bulan & LTTB untuk rentang panjang
+    return dashboard_agg.reduksi_tren(df_tren, metrik, seri=breakdown_col)
+
+# Export Data Mentah: dibuat hanya saat tombol download diklik (data callable) dan
+# di-cache per versi data + format, jadi klik berikutnya tidak menulis file ulang.
+# `_df` boleh callable (backend SQL): data penuh baru dibaca jika belum ada di cache.
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_export(versi, fmt, sheet_name, _df):
+    df = _df() if callable(_df) else _df
+    return dashboard_data.export_bytes(df.sort_values('Tanggal', ascending=False), fmt, sheet_name)
+
+# ================= 5. HALAMAN =================
+# ==============================================================================
+#                               DASHBOARD KARTU
+# ==============================================================================
+def halaman_kartu(prof, load_data_kartu):
+    with prof.blok("Load Data"):
+        data_kartu = load_data_kartu() or {}
+    indeks_kartu, info_kartu = data_kartu.get('sumber'), data_kartu.get('info')
+    yoy_kartu = data_kartu.get('yoy')
+    if info_kartu is None:
+        st.error("Gagal memuat Data Kartu.")
+        st.stop()
+    versi_kartu = info_kartu['versi']
+
+    # --- SIDEBAR FILTER GLOBAL (KARTU) ---
+    with prof.blok("Filter Global"):
+        with st.sidebar.form("filter_kartu_global"):
+            st.header("🎛️ Filter Kartu")
+        
+            min_date = info_kartu['tanggal_min'].date()
+            max_date = info_kartu['tanggal_max'].date()
+            month_range = pd.date_range(start=min_date, end=max_date, freq='MS')
+            month_labels = [d.strftime('%b %Y') for d in month_range]
+        
+            def_date = st.session_state.get('k_date', (month_labels[0], month_labels[-1]))
+            sel_range = st.select_slider("Rentang Bulan:", options=month_labels, value=def_date, key='k_date')
+        
+            tokos = info_kartu['toko']
+            def_toko = st.session_state.get('k_toko', [])
+            def_toko = [t for t in def_toko if t in tokos]
+            sel_toko = st.multiselect("Pilih Toko (Kosong = Semua)", tokos, default=def_toko, key="k_toko")
+            
+            submitted = st.form_submit_button("🚀 Terapkan Filter")
+
+        # --- PROCESSING ---
+        start_label, end_label = sel_range
+        start_date = month_range[month_labels.index(start_label)]
+        end_date = month_range[month_labels.index(end_label)] + relativedelta(months=1, days=-1)
+    
+        # Semua KPI & grafik dihitung dari cube agregat dan di-cache per kombinasi filter
+        sel_toko_key = tuple(sorted(sel_toko))
+        opsi_lokal_k, n_baris_k = get_opsi_filter(versi_kartu, 'kartu', start_date, end_date, sel_toko_key, indeks_kartu)
+
+    st.title("💳 Dashboard Kartu")
+    st.caption(f"Periode Data: {start_label} - {end_label}")
+
+    if n_baris_k > 0:
+        # --- PENGATURAN ANALISIS ---
+        with prof.blok("Filter Spesifik"):
+            with st.expander("⚙️ Pengaturan Analisis & Filter Spesifik", expanded=True):
+                with st.form("form_analisis_kartu"):
+                    c_set1, c_set2 = st.columns([1, 2])
+                    with c_set1:
+                        metric_map_k = {
+                            'Total Sales': 'Total_Sales',
+                            'Jumlah Transaksi': 'Jumlah_Dibeli',
+                            'Biaya Kartu': 'Biaya',
+                            'Top Up Murni (Kredit)': 'Masuk_Kredit',
+                            'Bonus Top Up': 'Masuk_Bonus'
+                        }
+                        def_met = st.session_state.get('k_metric', 'Total Sales')
+                        pilih_metrik_k_label = st.selectbox("Pilih Metrik Analisis:", list(metric_map_k.keys()), index=list(metric_map_k.keys()).index(def_met), key='k_metric')
+                        pilih_metrik_k = metric_map_k[pilih_metrik_k_label]
+                
+                    with c_set2:
+                        st.markdown("**Filter Data Spesifik**")
+                        c_f1, c_f2 = st.columns(2)
+                        with c_f1:
+                            f_tipe = create_local_filter(opsi_lokal_k, "Tipe Grup", "Tipe_Grup", "k_tipe")
+                        with c_f2:
+                            f_kat = create_local_filter(opsi_lokal_k, "Kategori Paket", "Kategori_Paket", "k_kat")
+                
+                    submitted_kartu = st.form_submit_button("🔄 Update Analisis")
+
+            filters_k = (('Tipe_Grup', tuple(sorted(f_tipe))), ('Kategori_Paket', tuple(sorted(f_kat))))
+
+        # --- FORMATTING & KPI ---
+        if pilih_metrik_k == 'Jumlah_Dibeli':
+            fmt_chart_k = format_id_vektor
+            fmt_kpi_k = format_id
+        else:
+            fmt_chart_k = format_label_chart_vektor
+            fmt_kpi_k = format_rupiah
+
+        c1, c2, c3, c4 = st.columns(4)
+        with prof.blok("KPI"):
+            kpi_k = get_agregasi(versi_kartu, 'kartu', 'kpi', start_date, end_date, sel_toko_key, filters_k, pilih_metrik_k, indeks_kartu)
+        
+            c1.metric(f"Total {pilih_metrik_k_label}", fmt_kpi_k(kpi_k['nilai']))
+            c2.metric("Total Transaksi", format_id(kpi_k['transaksi']))
+            c3.metric("Toko Aktif", f"{kpi_k['toko_aktif']}")
+            c4.metric("Kategori Aktif", f"{kpi_k['kategori_aktif']}")
+        st.markdown("---")
+
+        # Tab dipilih lewat radio: hanya isi tab yang aktif yang dihitung & dirender
+        # (st.tabs menjalankan isi semua tab pada setiap rerun)
+        tabs_k = ["📈 Analisis Tren & YoY", "📊 Tren Spesifik", "🏆 Peringkat & Detail", "🔎 Data Mentah"]
+        sel_tab_k = st.radio("Tab Kartu", tabs_k, horizontal=True, key="k_tab", label_visibility="collapsed")
+
+        if sel_tab_k == tabs_k[0]:
+            with prof.blok("Agregasi Tren"):
+                tren_k = get_agregasi(versi_kartu, 'kartu', 'tren', start_date, end_date, sel_toko_key, filters_k, pilih_metrik_k, indeks_kartu)
+                yoy_k = get_yoy(versi_kartu, 'kartu', start_date, end_date, sel_toko_key, filters_k, pilih_metrik_k, yoy_kartu, indeks_kartu)
+            st.subheader("📊 Komparasi Komponen Pendapatan")
+            st.caption("Grafik ini menampilkan perbandingan komponen pendapatan berdasarkan filter aktif, **TANPA** dipengaruhi oleh 'Pilih Metrik Analisis'.")
+            
+            with prof.blok("Grafik Komponen"):
+                df_comp = tren_k['komponen']
+                df_comp['Label_Nilai'] = format_label_chart_vektor(df_comp['Nilai'])
+            
+                fig_comp = px.bar(df_comp, x='Komponen', y='Nilai', text='Label_Nilai', color='Komponen', title="Perbandingan Komponen Pendapatan", color_discrete_sequence=px.colors.qualitative.Pastel)
+                fig_comp.update_yaxes(showticklabels=False, visible=False)
+                fig_comp.update_layout(separators=',.', showlegend=False)
+                st.plotly_chart(fig_comp, use_container_width=True)
+            st.markdown("---")
+
+            urutan_bulan = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni','Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
+            c_left, c_right = st.columns(2)
+            
+            with c_left:
+                st.subheader(f"Total {pilih_metrik_k_label} Tahunan")
+                with prof.blok("Grafik Tahunan"):
+                    df_yearly = dashboard_yoy.tabel_tahunan(yoy_k, pilih_metrik_k)
+                    # Growth tahun terakhir vs tahun sebelumnya; tahun dasar bisa dipilih jika > 2 tahun
+                    th_dasar, th_banding = dashboard_yoy.pasangan_default(yoy_k)
+                    if len(yoy_k['tahun']) > 2:
+                        th_dasar = st.selectbox(f"Growth {th_banding} dibanding:", yoy_k['tahun'][:-1], index=len(yoy_k['tahun']) - 2)
+                    gr = dashboard_yoy.pertumbuhan(yoy_k, th_dasar, th_banding)
+                
+                    df_yearly['Label'] = fmt_chart_k(df_yearly[pilih_metrik_k])
+                    fig_total = px.bar(df_yearly, x='Tahun', y=pilih_metrik_k, text='Label', title=f'Growth: {gr:.2f}%', color='Tahun', color_discrete_map=dashboard_yoy.warna_tahun(yoy_k['tahun'], '#27ae60', dashboard_yoy.WARNA_TAHUN_LAMA_BAR))
+                    fig_total.update_yaxes(showticklabels=False, visible=False)
+                    fig_total.update_layout(separators=',.')
+                    st.plotly_chart(fig_total, use_container_width=True)
+
+            with c_right:
+                st.subheader(f"Tren {pilih_metrik_k_label} Bulanan (YoY)")
+                with prof.blok("Grafik Bulanan (YoY)"):
+                    df_trend = dashboard_yoy.tabel_bulanan(yoy_k, pilih_metrik_k)
+                    df_trend['Label'] = fmt_chart_k(df_trend[pilih_metrik_k])
+                    fig_trend = px.line(df_trend, x='Nama_Bulan', y=pilih_metrik_k, color='Tahun', markers=True, text='Label', color_discrete_map=dashboard_yoy.warna_tahun(yoy_k['tahun'], 'green', dashboard_yoy.WARNA_TAHUN_LAMA_GARIS), category_orders={"Nama_Bulan": urutan_bulan})
+                    fig_trend.update_traces(textposition="top center")
+                    fig_trend.update_yaxes(showticklabels=False, visible=False)
+                    fig_trend.update_layout(separators=',.')
+                    st.plotly_chart(fig_trend, use_container_width=True)
+
+            st.markdown("---")
+            st.subheader(f"📈 Tren {pilih_metrik_k_label} Jangka Panjang")
+            with prof.blok("Grafik Jangka Panjang"):
+                df_cont = tren_k['harian']
+                fig_cont = px.line(df_cont, x='Tanggal', y=pilih_metrik_k, markers=True, title=judul_grafik(f"Pergerakan {pilih_metrik_k_label}", df_cont), line_shape='linear')
+                fig_cont.update_xaxes(dtick="M1", tickformat="%b %Y", tickangle=-45)
+                fig_cont.update_traces(line_color='#2ecc71', line_width=3)
+                fig_cont.update_yaxes(tickformat=',.0f') 
+                fig_cont.update_layout(separators=',.')
+                st.plotly_chart(fig_cont, use_container_width=True)
+
+            st.markdown("---")
+            st.markdown(f"### 🍰 Proporsi {pilih_metrik_k_label} per Toko")
+            with prof.blok("Grafik Proporsi Toko"):
+                df_pie = tren_k['proporsi_toko']
+                fig_pie = px.pie(df_pie, values=pilih_metrik_k, names='Folder_Asal', hole=0.4)
+                fig_pie.update_layout(separators=',.')
+                st.plotly_chart(fig_pie, use_container_width=True)
+
+        # --- SUBTAB 2: TREN SPESIFIK (DENGAN FORM) ---
+        elif sel_tab_k == tabs_k[1]:
+            st.subheader("📊 Analisis Tren Spesifik (Multi-Variable)")
+            st.caption("Eksplorasi tren mendalam. **Klik tombol 'Terapkan Tren' untuk memperbarui grafik.**")
+            
+            with st.form("form_tren_spesifik_kartu"):
+                c_spec1, c_spec2 = st.columns(2)
+                with c_spec1:
+                    x_breakdown_label = st.selectbox("Pecah Data Berdasarkan:", ["Tipe Grup", "Kategori Paket"], key="k_spec_x")
+                with c_spec2:
+                    y_spec_label = st.selectbox("Pilih Metrik untuk Tren:", list(metric_map_k.keys()), key="k_spec_y")
+                
+                submitted_tren_k = st.form_submit_button("🚀 Terapkan Tren")
+
+            x_breakdown_col = "Tipe_Grup" if x_breakdown_label == "Tipe Grup" else "Kategori_Paket"
+            y_spec_col = metric_map_k[y_spec_label]
+
+            with prof.blok("Agregasi Tren Spesifik"):
+                df_spec = get_tren_spesifik(versi_kartu, 'kartu', start_date, end_date, sel_toko_key, filters_k, x_breakdown_col, y_spec_col, indeks_kartu)
+            
+            with prof.blok("Grafik Tren Spesifik"):
+                if y_spec_col == 'Jumlah_Dibeli':
+                    df_spec['Label'] = format_id_vektor(df_spec[y_spec_col])
+                else:
+                    df_spec['Label'] = format_label_chart_vektor(df_spec[y_spec_col])
+
+                fig_spec = px.line(
+                    df_spec, x='Tanggal', y=y_spec_col, color=x_breakdown_col, markers=True,
+                    title=judul_grafik(f"Tren {y_spec_label} per {x_breakdown_label}", df_spec), template='plotly_white'
+                )
+                fig_spec.update_xaxes(dtick="M1", tickformat="%b %Y", tickangle=-45)
+                fig_spec.update_yaxes(tickformat=',.0f')
+                fig_spec.update_layout(separators=',.', legend_title_text=x_breakdown_label)
+                st.plotly_chart(fig_spec, use_container_width=True)
+
+        elif sel_tab_k == tabs_k[2]:
+            with prof.blok("Agregasi Peringkat"):
+                rank_k = get_agregasi(versi_kartu, 'kartu', 'peringkat', start_date, end_date, sel_toko_key, filters_k, pilih_metrik_k, indeks_kartu)
+            st.subheader(f"Peringkat Berdasarkan: {pilih_metrik_k_label}")
+            
+            c1, c2 = st.columns(2)
+            rank_cat = rank_k['peringkat_tipe']
+            with c1:
+                with prof.blok("Grafik Top Kategori"):
+                    df_cat_top = rank_cat['top']
+                    df_cat_top['Label'] = fmt_chart_k(df_cat_top[pilih_metrik_k])
+                    fig_cat_t = px.bar(df_cat_top, x=pilih_metrik_k, y='Tipe_Grup', orientation='h', text='Label', title="🏆 Top Kategori (Tipe Grup)", color_discrete_sequence=['#2980b9'])
+                    fig_cat_t.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_cat_t, use_container_width=True)
+            with c2:
+                with prof.blok("Grafik Bottom Kategori"):
+                    df_cat_worst = rank_cat['bottom']
+                    df_cat_worst['Label'] = fmt_chart_k(df_cat_worst[pilih_metrik_k])
+                    fig_cat_w = px.bar(df_cat_worst, x=pilih_metrik_k, y='Tipe_Grup', orientation='h', text='Label', title="⚠️ Bottom Kategori (Tipe Grup)", color_discrete_sequence=['#c0392b'])
+                    fig_cat_w.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_cat_w, use_container_width=True)
+
+            c3, c4 = st.columns(2)
+            rank_toko = rank_k['peringkat_toko']
+            with c3:
+                with prof.blok("Grafik Top Toko"):
+                    df_toko_top = rank_toko['top']
+                    df_toko_top['Label'] = fmt_chart_k(df_toko_top[pilih_metrik_k])
+                    fig_toko_t = px.bar(df_toko_top, x=pilih_metrik_k, y='Folder_Asal', orientation='h', text='Label', title="🏆 Top 10 Toko", color_discrete_sequence=['#27ae60'])
+                    fig_toko_t.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_toko_t, use_container_width=True)
+            with c4:
+                with prof.blok("Grafik Worst Toko"):
+                    df_toko_worst = rank_toko['bottom']
+                    df_toko_worst['Label'] = fmt_chart_k(df_toko_worst[pilih_metrik_k])
+                    fig_toko_w = px.bar(df_toko_worst, x=pilih_metrik_k, y='Folder_Asal', orientation='h', text='Label', title="⚠️ Worst 10 Toko", color_discrete_sequence=['#e67e22'])
+                    fig_toko_w.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_toko_w, use_container_width=True)
+
+        elif sel_tab_k == tabs_k[3]:
+            st.subheader(f"Detail Data Transaksi Kartu (FULL DATA - NO FILTER)")
+            with prof.blok("Data Mentah (sort)"):
+                df_raw_sorted = data_mentah_terurut(data_kartu, 'kartu')
+            fmt_k = st.radio("Format File:", list(dashboard_data.FORMAT_EXPORT.keys()), format_func=lambda f: dashboard_data.FORMAT_EXPORT[f][0], horizontal=True, key="k_export_fmt")
+            label_k, ext_k, mime_k = dashboard_data.FORMAT_EXPORT[fmt_k]
+            st.download_button(label=f"📥 Download {label_k}", data=prof.bungkus(f"Export Kartu ({fmt_k})", lambda: get_export(info_kartu['versi_raw'], fmt_k, 'Data_Kartu', sumber_export(data_kartu, 'kartu'))), file_name=f"data_transaksi_kartu_full{ext_k}", mime=mime_k)
+            if len(df_raw_sorted) < info_kartu['n_raw']:
+                st.caption(f"Menampilkan {format_id(len(df_raw_sorted))} baris terbaru dari {format_id(info_kartu['n_raw'])} baris; file download berisi semua baris.")
+            with prof.blok("Data Mentah (tabel)"):
+                st.dataframe(df_raw_sorted, use_container_width=True)
+    else:
+        st.warning("Data Kartu Kosong untuk periode/filter ini.")
+
+# ==============================================================================
+#                               DASHBOARD MESIN
+# ==============================================================================
+def halaman_mesin(prof, load_data_mesin):
+    with prof.blok("Load Data"):
+        data_mesin = load_data_mesin() or {}
+    indeks_mesin, info_mesin = data_mesin.get('sumber'), data_mesin.get('info')
+    yoy_mesin = data_mesin.get('yoy')
+    if info_mesin is None:
+        st.error("Gagal memuat Data Mesin.")
+        st.stop()
+    versi_mesin = info_mesin['versi']
+
+    # --- SIDEBAR FILTER MESIN ---
+    with prof.blok("Filter Global"):
+        with st.sidebar.form("filter_mesin_global"):
+            st.header("🎛️ Filter Mesin")
+        
+            min_date = info_mesin['tanggal_min'].date()
+            max_date = info_mesin['tanggal_max'].date()
+            month_range = pd.date_range(start=min_date, end=max_date, freq='MS')
+            month_labels = [d.strftime('%b %Y') for d in month_range]
+        
+            def_date_m = st.session_state.get('m_date', (month_labels[0], month_labels[-1]))
+            sel_range = st.select_slider("Rentang Bulan:", options=month_labels, value=def_date_m, key='m_date')
+        
+            tokos = info_mesin['toko']
+            def_toko_m = st.session_state.get('m_toko', [])
+            def_toko_m = [t for t in def_toko_m if t in tokos]
+            sel_toko = st.multiselect("Pilih Toko (Kosong = Semua)", tokos, default=def_toko_m, key="m_toko")
+            
+            submitted = st.form_submit_button("🚀 Terapkan Filter")
+
+        # --- PROCESSING ---
+        start_label, end_label = sel_range
+        start_date = month_range[month_labels.index(start_label)]
+        end_date = month_range[month_labels.index(end_label)] + relativedelta(months=1, days=-1)
+    
+        # Semua KPI & grafik dihitung dari cube agregat dan di-cache per kombinasi filter
+        sel_toko_key = tuple(sorted(sel_toko))
+        opsi_lokal_m, n_baris_m = get_opsi_filter(versi_mesin, 'mesin', start_date, end_date, sel_toko_key, indeks_mesin)
+
+    st.title("🎮 Dashboard Mesin")
+    st.caption(f"Periode Data: {start_label} - {end_label}")
+
+    if n_baris_m > 0:
+        # --- PENGATURAN ANALISIS ---
+        with prof.blok("Filter Spesifik"):
+            with st.expander("⚙️ Pengaturan Analisis & Filter Spesifik", expanded=True):
+                with st.form("form_analisis_mesin"):
+                    c_set_m1, c_set_m2 = st.columns([1, 2])
+                    with c_set_m1:
+                        metric_map_m = {
+                            'Total Sales': 'Total',
+                            'Jumlah Aktivasi': 'Jumlah Diaktifkan',
+                            'Kredit Terpakai': 'Kredit yg Digunakan',
+                            'Bonus Terpakai': 'Bonus yg Digunakan'
+                        }
+                        def_met_m = st.session_state.get('m_metric', 'Total Sales')
+                        y_metric_label = st.selectbox("Pilih Metrik Analisis:", list(metric_map_m.keys()), index=list(metric_map_m.keys()).index(def_met_m), key='m_metric')
+                        y_metric = metric_map_m[y_metric_label]
+                
+                    with c_set_m2:
+                        st.markdown("**Filter Spesifik**")
+                        c_mf1, c_mf2 = st.columns(2)
+                        with c_mf1:
+                            f_cat_m = create_local_filter(opsi_lokal_m, "Kategori Game", "Kategori Game", "m_cat")
+                        with c_mf2:
+                            f_gt = create_local_filter(opsi_lokal_m, "Game Title", "GT_FINAL", "m_gt")
+                
+                    submitted_mesin = st.form_submit_button("🔄 Update Analisis")
+            
+            filters_m = (('Kategori Game', tuple(sorted(f_cat_m))), ('GT_FINAL', tuple(sorted(f_gt))))
+
+        # LOGIKA FORMATTING
+        if y_metric == 'Jumlah Diaktifkan':
+            fmt_chart_m = format_id_vektor
+            fmt_kpi_m = format_id
+        else:
+            fmt_chart_m = format_label_chart_vektor
+            fmt_kpi_m = format_rupiah
+
+        k1, k2, k3, k4 = st.columns(4)
+        with prof.blok("KPI"):
+            kpi_m = get_agregasi(versi_mesin, 'mesin', 'kpi', start_date, end_date, sel_toko_key, filters_m, y_metric, indeks_mesin)
+        
+            k1.metric(f"Total {y_metric_label}", fmt_kpi_m(kpi_m['nilai']))
+            k2.metric("Total Aktivasi", format_id(kpi_m['aktivasi']))
+            k3.metric("Mesin Aktif", f"{kpi_m['mesin_aktif']}")
+            k4.metric("Toko Aktif", f"{kpi_m['toko_aktif']}")
+        st.markdown("---")
+        
+        # Tab dipilih lewat radio: hanya isi tab yang aktif yang dihitung & dirender
+        tabs_m = ["📈 Tren & Performa", "📊 Tren Spesifik", "🏆 Peringkat", "🔎 Data Mentah"]
+        sel_tab_m = st.radio("Tab Mesin", tabs_m, horizontal=True, key="m_tab", label_visibility="collapsed")
+
+        if sel_tab_m == tabs_m[0]:
+            with prof.blok("Agregasi Tren"):
+                tren_m = get_agregasi(versi_mesin, 'mesin', 'tren', start_date, end_date, sel_toko_key, filters_m, y_metric, indeks_mesin)
+                yoy_m = get_yoy(versi_mesin, 'mesin', start_date, end_date, sel_toko_key, filters_m, y_metric, yoy_mesin, indeks_mesin)
+            st.subheader("📊 Komparasi Komponen Pendapatan (Kredit vs Bonus)")
+            st.caption("Grafik ini menampilkan proporsi Kredit vs Bonus yang digunakan berdasarkan filter aktif, **TANPA** dipengaruhi oleh 'Pilih Metrik Analisis'.")
+            
+            with prof.blok("Grafik Komponen"):
+                df_comp_m = tren_m['komponen']
+            
+                fig_pie_comp_m = px.pie(
+                    df_comp_m, values='Nilai', names='Komponen',
+                    title="Proporsi Total Sales (Kredit + Bonus)", hole=0.4,
+                    color_discrete_sequence=['#2980b9', '#27ae60'] 
+                )
+                fig_pie_comp_m.update_layout(separators=',.')
+                st.plotly_chart(fig_pie_comp_m, use_container_width=True)
+            st.markdown("---")
+
+            urutan_bulan = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
+            st.subheader(f"Tren & Komparasi: {y_metric_label}")
+            
+            c_left, c_right = st.columns(2)
+            with c_left:
+                st.markdown(f"**Total {y_metric_label} Tahunan**")
+                with prof.blok("Grafik Tahunan"):
+                    df_yearly_m = dashboard_yoy.tabel_tahunan(yoy_m, y_metric)
+                    th_dasar_m, th_banding_m = dashboard_yoy.pasangan_default(yoy_m)
+                    if len(yoy_m['tahun']) > 2:
+                        th_dasar_m = st.selectbox(f"Growth {th_banding_m} dibanding:", yoy_m['tahun'][:-1], index=len(yoy_m['tahun']) - 2)
+                    growth_m = dashboard_yoy.pertumbuhan(yoy_m, th_dasar_m, th_banding_m)
+                
+                    df_yearly_m['Label'] = fmt_chart_m(df_yearly_m[y_metric])
+                    fig_total_m = px.bar(df_yearly_m, x='Tahun', y=y_metric, text='Label', title=f'Growth: {growth_m:.2f}%', color='Tahun', color_discrete_map=dashboard_yoy.warna_tahun(yoy_m['tahun'], '#2980b9', dashboard_yoy.WARNA_TAHUN_LAMA_BAR))
+                    fig_total_m.update_yaxes(showticklabels=False)
+                    fig_total_m.update_layout(separators=',.')
+                    st.plotly_chart(fig_total_m, use_container_width=True)
+
+            with c_right:
+                st.markdown(f"**Tren {y_metric_label} Bulanan (YoY)**")
+                with prof.blok("Grafik Bulanan (YoY)"):
+                    df_tm = dashboard_yoy.tabel_bulanan(yoy_m, y_metric)
+                    df_tm['Label'] = fmt_chart_m(df_tm[y_metric])
+                    fig_tm = px.line(df_tm, x='Nama_Bulan', y=y_metric, color='Tahun', markers=True, text='Label', color_discrete_map=dashboard_yoy.warna_tahun(yoy_m['tahun'], 'blue', dashboard_yoy.WARNA_TAHUN_LAMA_GARIS), category_orders={"Nama_Bulan": urutan_bulan})
+                    fig_tm.update_traces(textposition="top center")
+                    fig_tm.update_yaxes(showticklabels=False)
+                    fig_tm.update_layout(separators=',.')
+                    st.plotly_chart(fig_tm, use_container_width=True)
+
+            st.markdown("---")
+            st.subheader(f"📈 Tren {y_metric_label} Jangka Panjang")
+            with prof.blok("Grafik Jangka Panjang"):
+                df_cont_m = tren_m['harian']
+                fig_cont_m = px.line(df_cont_m, x='Tanggal', y=y_metric, markers=True, title=judul_grafik(f"Pergerakan {y_metric_label} (Timeline Lengkap)", df_cont_m), line_shape='linear')
+                fig_cont_m.update_xaxes(dtick="M1", tickformat="%b %Y", tickangle=-45)
+                fig_cont_m.update_traces(line_color='#3498db', line_width=3) 
+                fig_cont_m.update_yaxes(tickformat=',.0f')
+                fig_cont_m.update_layout(separators=',.')
+                st.plotly_chart(fig_cont_m, use_container_width=True)
+
+            st.markdown("---")
+            st.markdown(f"### 🍰 Proporsi {y_metric_label} per Center")
+            with prof.blok("Grafik Proporsi Toko"):
+                df_pie_m = tren_m['proporsi_toko']
+                fig_pie_m = px.pie(df_pie_m, values=y_metric, names='Center', hole=0.4)
+                fig_pie_m.update_layout(separators=',.')
+                st.plotly_chart(fig_pie_m, use_container_width=True)
+
+        elif sel_tab_m == tabs_m[1]:
+            st.subheader("📊 Analisis Tren Spesifik (Multi-Variable)")
+            st.caption("Eksplorasi tren mendalam. **Klik tombol 'Terapkan Tren' untuk memperbarui grafik.**")
+            
+            with st.form("form_tren_spesifik_mesin"):
+                c_mf1, c_mf2 = st.columns(2)
+                with c_mf1:
+                    x_m_breakdown_label = st.selectbox("Pecah Data Berdasarkan:", ["Kategori Game", "Game Title"], key="m_spec_x")
+                with c_mf2:
+                    y_m_spec_label = st.selectbox("Pilih Metrik untuk Tren:", list(metric_map_m.keys()), key="m_spec_y")
+                submitted_tren_m = st.form_submit_button("🚀 Terapkan Tren")
+
+            x_m_breakdown_col = "Kategori Game" if x_m_breakdown_label == "Kategori Game" else "GT_FINAL"
+            y_m_spec_col = metric_map_m[y_m_spec_label]
+
+            with prof.blok("Agregasi Tren Spesifik"):
+                df_m_spec = get_tren_spesifik(versi_mesin, 'mesin', start_date, end_date, sel_toko_key, filters_m, x_m_breakdown_col, y_m_spec_col, indeks_mesin)
+            
+            with prof.blok("Grafik Tren Spesifik"):
+                if y_m_spec_col == 'Jumlah Diaktifkan':
+                    df_m_spec['Label'] = format_id_vektor(df_m_spec[y_m_spec_col])
+                else:
+                    df_m_spec['Label'] = format_label_chart_vektor(df_m_spec[y_m_spec_col])
+
+                fig_m_spec = px.line(
+                    df_m_spec, x='Tanggal', y=y_m_spec_col, color=x_m_breakdown_col, markers=True,
+                    title=judul_grafik(f"Tren {y_m_spec_label} per {x_m_breakdown_label}", df_m_spec), template='plotly_white'
+                )
+                fig_m_spec.update_xaxes(dtick="M1", tickformat="%b %Y", tickangle=-45)
+                fig_m_spec.update_yaxes(tickformat=',.0f')
+                fig_m_spec.update_layout(separators=',.', legend_title_text=x_m_breakdown_label)
+                st.plotly_chart(fig_m_spec, use_container_width=True)
+
+        elif sel_tab_m == tabs_m[2]:
+            with prof.blok("Agregasi Peringkat"):
+                rank_m = get_agregasi(versi_mesin, 'mesin', 'peringkat', start_date, end_date, sel_toko_key, filters_m, y_metric, indeks_mesin)
+            st.subheader(f"Peringkat Berdasarkan: {y_metric_label}")
+            rank_m_met = y_metric 
+            
+            c_cat1, c_cat2 = st.columns(2)
+            rank_cat = rank_m['peringkat_kategori']
+            with c_cat1:
+                with prof.blok("Grafik Top Kategori"):
+                    df_top_cat = rank_cat['top']
+                    df_top_cat['Label'] = fmt_chart_m(df_top_cat[rank_m_met])
+                    fig_top_cat = px.bar(df_top_cat, x=rank_m_met, y='Kategori Game', orientation='h', text='Label', title="🔥 Top Kategori", color_discrete_sequence=['#8e44ad'])
+                    fig_top_cat.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_top_cat, use_container_width=True)
+            with c_cat2:
+                with prof.blok("Grafik Worst Kategori"):
+                    df_worst_cat = rank_cat['bottom']
+                    df_worst_cat['Label'] = fmt_chart_m(df_worst_cat[rank_m_met])
+                    fig_worst_cat = px.bar(df_worst_cat, x=rank_m_met, y='Kategori Game', orientation='h', text='Label', title="❄️ Worst Kategori", color_discrete_sequence=['#c0392b'])
+                    fig_worst_cat.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_worst_cat, use_container_width=True)
+
+            st.markdown("---")
+            c1, c2 = st.columns(2)
+            rank_mesin = rank_m['peringkat_mesin']
+            with c1:
+                with prof.blok("Grafik Top Mesin"):
+                    df_top_m = rank_mesin['top']
+                    df_top_m['Label'] = fmt_chart_m(df_top_m[rank_m_met])
+                    fig_top_m = px.bar(df_top_m, x=rank_m_met, y='GT_FINAL', orientation='h', text='Label', title="🔥 Top 10 Mesin", color_discrete_sequence=['#2980b9'])
+                    fig_top_m.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_top_m, use_container_width=True)
+            with c2:
+                with prof.blok("Grafik Worst Mesin"):
+                    df_worst_m = rank_mesin['bottom']
+                    df_worst_m['Label'] = fmt_chart_m(df_worst_m[rank_m_met])
+                    fig_worst_m = px.bar(df_worst_m, x=rank_m_met, y='GT_FINAL', orientation='h', text='Label', title="❄️ Worst 10 Mesin", color_discrete_sequence=['#e74c3c'])
+                    fig_worst_m.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_worst_m, use_container_width=True)
+
+            st.markdown("---")
+            c3, c4 = st.columns(2)
+            rank_toko = rank_m['peringkat_toko']
+            with c3:
+                with prof.blok("Grafik Top Toko"):
+                    df_top_toko = rank_toko['top']
+                    df_top_toko['Label'] = fmt_chart_m(df_top_toko[rank_m_met])
+                    fig_top_t = px.bar(df_top_toko, x=rank_m_met, y='Center', orientation='h', text='Label', title="🏆 Top 10 Toko", color_discrete_sequence=['#27ae60'])
+                    fig_top_t.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_top_t, use_container_width=True)
+            with c4:
+                with prof.blok("Grafik Worst Toko"):
+                    df_worst_toko = rank_toko['bottom']
+                    df_worst_toko['Label'] = fmt_chart_m(df_worst_toko[rank_m_met])
+                    fig_worst_t = px.bar(df_worst_toko, x=rank_m_met, y='Center', orientation='h', text='Label', title="⚠️ Worst 10 Toko", color_discrete_sequence=['#e67e22'])
+                    fig_worst_t.update_xaxes(showticklabels=False)
+                    st.plotly_chart(fig_worst_t, use_container_width=True)
+
+        elif sel_tab_m == tabs_m[3]:
+            st.subheader("Detail Data Mesin (FULL DATA - NO FILTER)")
+            with prof.blok("Data Mentah (sort)"):
+                df_mesin_sorted = data_mentah_terurut(data_mesin, 'mesin')
+            fmt_m = st.radio("Format File:", list(dashboard_data.FORMAT_EXPORT.keys()), format_func=lambda f: dashboard_data.FORMAT_EXPORT[f][0], horizontal=True, key="m_export_fmt")
+            label_m, ext_m, mime_m = dashboard_data.FORMAT_EXPORT[fmt_m]
+            st.download_button(label=f"📥 Download Full Data {label_m}", data=prof.bungkus(f"Export Mesin ({fmt_m})", lambda: get_export(info_mesin['versi_raw'], fmt_m, 'Data_Mesin', sumber_export(data_mesin, 'mesin'))), file_name=f"data_aktivitas_mesin_full{ext_m}", mime=mime_m)
+            if len(df_mesin_sorted) < info_mesin['n_raw']:
+                st.caption(f"Menampilkan {format_id(len(df_mesin_sorted))} baris terbaru dari {format_id(info_mesin['n_raw'])} baris; file download berisi semua baris.")
+            with prof.blok("Data Mentah (tabel)"):
+                st.dataframe(df_mesin_sorted, use_container_width=True)
+    else:
+        st.warning("Data Mesin Kosong untuk periode/filter ini.")
+
+# ==============================================================================
+#                               PENJELASAN TAMBAHAN
+# ==============================================================================
+def halaman_penjelasan():
+    st.title("ℹ️ Penjelasan Tambahan")
+    st.markdown("""
+# Penjelasan Metrik Dashboard Transaksi Kartu
+* **Jumlah_Dibeli**: Jumlah paket dibeli 
+* **Biaya**: Biaya kartu
+* **Masuk_Kredit**: Penjualan top up paket murni tanpa bonus
+* **Masuk_Bonus**: Jumlah bonus top up paket yang diberi pelanggan
+* **Total_Sales**: Masuk_Kredit + Biaya
+* **Tipe_Grup**: 
+    * Regular Top Up
+    * Bundling F&B/Barang
+    * Kiddie Land
+    * Regular Top Up dengan Bonus
+    * Kartu Perdana
+    * Top Up Promo Tiket.com
+* **Nominal_Grup**: Nominal paket transaksi
+* **Kategori_Paket**: Tipe_Grup + Nominal_Grup
+
+---
+
+# Penjelasan Metrik Dashboard Mesin
+* **Game**: Game Title mesin playzone
+* **Kategori Game**: Kategori game title 
+* **Jumlah Diaktifkan**: frekuensi game dimainkan
+* **Kredit yg Digunakan**: kredit yang masuk ke mesin
+* **Bonus yg Digunakan**: bonus main game untuk customer
+* **Total**: kredit + bonus
+""")
+
+# ================= 6. NAVIGASI =================
+def jalankan(prof, load_data_kartu, load_data_mesin):
+    """Sidebar navigasi + halaman terpilih + panel profiling. Dipanggil setelah gerbang_login."""
+    st.sidebar.header(f"👋 Halo, Admin")
+    st.sidebar.markdown("---")
+
+    selected_page = st.sidebar.radio(
+        "📂 PILIH DASHBOARD",
+        ["Dashboard Kartu", "Dashboard Mesin", "Penjelasan Tambahan"],
+        index=0,
+        key="nav_radio"
+    )
+    # Data dimuat ulang otomatis saat versi berubah (file lokal / slot sinkron Sheets);
+    # tombol ini memaksa muat ulang sekarang
+    if st.sidebar.button("🔄 Muat Ulang Data", key="reload_data"):
+        dashboard_data.invalidasi()
+        st.rerun()
+    st.sidebar.toggle("⏱️ Mode Profiling", key="profil", help=f"Ukur waktu tiap blok halaman (juga lewat env {dashboard_profil.ENV_PROFIL}=1)")
+    # Diisi di akhir script setelah semua blok halaman selesai diukur
+    panel_profil = st.sidebar.empty()
+    prof.halaman = selected_page
+    st.sidebar.markdown("---")
+
+    if selected_page == "Dashboard Kartu":
+        halaman_kartu(prof, load_data_kartu)
+    elif selected_page == "Dashboard Mesin":
+        halaman_mesin(prof, load_data_mesin)
+    elif selected_page == "Penjelasan Tambahan":
+        halaman_penjelasan()
+
+    # --- PANEL PROFILING ---
+    if prof.aktif:
+        total_profil = prof.selesai()
+        with panel_profil.container():
+            st.markdown(f"**⏱️ Waktu Render: {total_profil:.2f} s**")
+            st.dataframe(
+                pd.DataFrame(prof.ringkasan(), columns=['Blok', 'Detik']).round(3),
+                hide_index=True, use_container_width=True
+            )
+            st.caption(f"Log: {prof.path_log}")
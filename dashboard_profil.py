@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import datetime
+import threading
+import contextlib
+
+# ================= PROFILING RENDER DASHBOARD =================
+# Mode opsional (env DASHBOARD_PROFIL=1 atau toggle admin di sidebar) untuk mengukur
+# waktu tiap blok halaman: load data, filter, KPI, agregasi & pembuatan tiap grafik,
+# serta export. Hasil per rerun ditampilkan di panel sidebar dan ditambahkan ke file
+# log JSONL untuk dianalisis offline. Saat tidak aktif, blok() tidak mengukur apa pun.
+
+ENV_PROFIL = "DASHBOARD_PROFIL"
+FILE_LOG = os.path.join("output", "profil_dashboard.jsonl")
+
+_LOCK_LOG = threading.Lock()
+
+def aktif_dari_env():
+    return os.getenv(ENV_PROFIL, "").strip().lower() in ("1", "true", "ya", "yes", "on")
+
+def tulis_log(record, path=FILE_LOG):
+    """Tambahkan satu baris JSON ke log (aman dipanggil dari beberapa sesi sekaligus)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _LOCK_LOG:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+class Profiler:
+    def __init__(self, dashboard, aktif=False, path_log=FILE_LOG):
+        self.dashboard = dashboard
+        self.aktif = aktif
+        self.path_log = path_log
+        self.halaman = None
+        self.blok_list = []
+        self._t0 = time.perf_counter()
+
+    @contextlib.contextmanager
+    def blok(self, nama):
+        """with prof.blok('Grafik: Tren Bulanan'): ... -> durasi dicatat jika profiling aktif."""
+        if not self.aktif:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.blok_list.append((nama, time.perf_counter() - t0))
+
+    def bungkus(self, nama, fungsi):
+        """
+        Bungkus callable yang dijalankan di luar rerun (mis. data st.download_button).
+        Waktunya langsung ditulis ke log sebagai record tersendiri.
+        """
+        if not self.aktif:
+            return fungsi
+        dashboard, halaman, path_log = self.dashboard, self.halaman, self.path_log
+
+        def _terukur(*args, **kwargs):
+            t0 = time.perf_counter()
+            hasil = fungsi(*args, **kwargs)
+            detik = round(time.perf_counter() - t0, 4)
+            tulis_log({
+                'waktu': datetime.datetime.now().isoformat(timespec='seconds'),
+                'dashboard': dashboard, 'halaman': halaman,
+                'total_s': detik, 'blok': [{'nama': nama, 'detik': detik}],
+            }, path_log)
+            return hasil
+        return _terukur
+
+    def total(self):
+        return time.perf_counter() - self._t0
+
+    def ringkasan(self):
+        """[(nama blok, detik), ...] urut dari yang terlama."""
+        return sorted(self.blok_list, key=lambda b: b[1], reverse=True)
+
+    def selesai(self):
+        """Tulis record rerun ini ke log. Return total detik (None jika tidak aktif)."""
+        if not self.aktif:
+            return None
+        total = self.total()
+        tulis_log({
+            'waktu': datetime.datetime.now().isoformat(timespec='seconds'),
+            'dashboard': self.dashboard, 'halaman': self.halaman,
+            'total_s': round(total, 4),
+            'blok': [{'nama': n, 'detik': round(d, 4)} for n, d in self.blok_list],
+        }, self.path_log)
+        return total
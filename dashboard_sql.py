@@ -0,0 +1,327 @@
+import pandas as pd
+import os
+import re
+import argparse
+from datetime import datetime
+import dashboard_data
+from dashboard_agg import KOLOM_TOKO, KOLOM_FILTER_LOKAL, KOMPONEN_KARTU, LABEL_KOMPONEN_KARTU, KOMPONEN_MESIN
+from dashboard_agg import DIMENSI_PERINGKAT, top_bottom
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# ================= BACKEND SQL (DUCKDB) =================
+# Alternatif dari data in-memory: data bersih + cube disimpan di satu file DuckDB,
+# lalu filter (rentang tanggal, toko, filter lokal) dan groupby dijalankan sebagai SQL.
+# Proses dashboard hanya memegang koneksi read-only + hasil agregasi kecil, jadi memori
+# tidak ikut naik saat histori bertambah, dan beberapa replika dashboard bisa membaca
+# file yang sama. Hasil setiap fungsi sama bentuknya dengan dashboard_agg.
+#   python dashboard_sql.py                      -> bangun output/dashboard_<waktu>.duckdb
+#   DASHBOARD_BACKEND=duckdb streamlit run dashboard.py
+# Setiap build ditulis ke file baru bernama waktu build; dashboard selalu membuka file
+# terbaru. File yang sedang dibuka read-only tidak pernah ditimpa (di Windows rename ke
+# file yang masih dibuka gagal), file lama dihapus setelah tidak dipakai lagi.
+
+ENV_BACKEND = "DASHBOARD_BACKEND"
+ENV_FILE = "DASHBOARD_DUCKDB"
+ENV_MEMORI = "DASHBOARD_DUCKDB_MEMORY"    # mis. "512MB", batas memori DuckDB per proses
+FILE_DB = os.path.join("output", "dashboard.duckdb")
+
+# dataset -> (tabel data bersih, tabel cube)
+TABEL = {'kartu': ('kartu', 'cube_kartu'), 'mesin': ('mesin', 'cube_mesin')}
+
+def aktif_dari_env():
+    return os.getenv(ENV_BACKEND, "").strip().lower() == "duckdb"
+
+def path_db():
+    """Path dasar (env / FILE_DB); file yang dibuka = file_aktif(path_db())."""
+    return os.getenv(ENV_FILE, FILE_DB)
+
+def _pola_versi(path):
+    stem, ext = os.path.splitext(os.path.basename(path))
+    return re.compile(re.escape(stem) + r"_\d{8}_\d{6}_\d{6}" + re.escape(ext))
+
+def file_versi(path):
+    """File build untuk path dasar, urut dari yang terlama (nama = waktu build)."""
+    folder = os.path.dirname(path) or "."
+    pola = _pola_versi(path)
+    try:
+        nama = os.listdir(folder)
+    except OSError:
+        return []
+    return [os.path.join(folder, f) for f in sorted(nama) if pola.fullmatch(f)]
+
+def file_aktif(path):
+    """File build terbaru; path dasar itu sendiri jika belum ada build berversi (format lama)."""
+    versi = file_versi(path)
+    return versi[-1] if versi else path
+
+def hapus_versi_lama(path):
+    """
+    Hapus file build selain yang terbaru (termasuk file format lama di path dasar).
+    File yang masih dibuka dashboard lain gagal dihapus di Windows -> dilewati, dicoba
+    lagi pada build berikutnya / saat koneksi lama ditutup.
+    """
+    versi = file_versi(path)
+    if not versi:
+        return
+    for f in versi[:-1] + [path]:
+        for target in (f, f + ".wal"):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                break
+
+def _q(col):
+    return '"' + col.replace('"', '""') + '"'
+
+# ================= BANGUN DATABASE =================
+def _untuk_sql(df):
+    """Kolom category -> teks biasa (VARCHAR), NaN tetap NULL."""
+    df = df.copy()
+    for c in df.columns:
+        if isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype(object)
+    return df.reset_index(drop=True)
+
+def bangun_database(path, datasets):
+    """
+    Tulis file DuckDB baru dari {dataset: (df_bersih, cube)} sebagai build berversi
+    (<path dasar>_<waktu>.duckdb) dan return path-nya. Ditulis ke file sementara lalu
+    di-rename ke nama yang belum ada, jadi file yang sedang dibuka dashboard tidak
+    pernah ditimpa; dashboard pindah ke file baru begitu file_aktif() berubah.
+    """
+    if duckdb is None:
+        raise ImportError("Backend DuckDB butuh paket duckdb (pip install duckdb)")
+    stem, ext = os.path.splitext(path)
+    path_baru = f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{ext}"
+    tmp_path = path_baru + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    con = duckdb.connect(tmp_path)
+    try:
+        con.execute("CREATE TABLE meta (nama VARCHAR, versi VARCHAR)")
+        for dataset, (df, cube) in datasets.items():
+            tabel_raw, tabel_cube = TABEL[dataset]
+            for tabel, data in [(tabel_raw, df), (tabel_cube, cube)]:
+                con.register('_sumber', _untuk_sql(data))
+                # Urut per Tanggal: zone map per row group membuat filter rentang tanggal
+                # cukup membaca blok yang relevan
+                con.execute(f"CREATE TABLE {tabel} AS SELECT * FROM _sumber ORDER BY Tanggal")
+                con.unregister('_sumber')
+                con.execute("INSERT INTO meta VALUES (?, ?)", [tabel, dashboard_data.versi_data(data)])
+    finally:
+        con.close()
+    os.replace(tmp_path, path_baru)
+    hapus_versi_lama(path)
+    return path_baru
+
+# ================= KONEKSI =================
+def buka(path):
+    """
+    Koneksi read-only ke file DuckDB + info skema. Return dict:
+    {'con', 'versi': {tabel: hash isi}, 'kolom': {tabel: set kolom}, 'kolom_int': {tabel: set kolom integer}}.
+    """
+    if duckdb is None:
+        raise ImportError("Backend DuckDB butuh paket duckdb (pip install duckdb)")
+    config = {'memory_limit': os.getenv(ENV_MEMORI)} if os.getenv(ENV_MEMORI) else {}
+    con = duckdb.connect(path, read_only=True, config=config)
+    versi = dict(con.execute("SELECT nama, versi FROM meta").fetchall())
+    kolom, kolom_int = {}, {}
+    for tabel, nama, tipe in con.execute("SELECT table_name, column_name, data_type FROM information_schema.columns").fetchall():
+        kolom.setdefault(tabel, set()).add(nama)
+        if tipe in ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT'):
+            kolom_int.setdefault(tabel, set()).add(nama)
+    return {'con': con, 'versi': versi, 'kolom': kolom, 'kolom_int': kolom_int}
+
+def tutup(sumber):
+    """Tutup koneksi hasil buka() (dipanggil setelah sumber diganti versi baru)."""
+    sumber['con'].close()
+
+def dataset_tersedia(sumber):
+    """Dataset yang tabel data bersih & cube-nya ada di file (build bisa tanpa salah satu dataset)."""
+    return [dataset for dataset, tabel in TABEL.items() if all(t in sumber['kolom'] for t in tabel)]
+
+def _query(sumber, sql, params=()):
+    # Satu cursor per query: koneksi DuckDB dipakai bersama oleh thread sesi Streamlit
+    cur = sumber['con'].cursor()
+    try:
+        return cur.execute(sql, list(params)).df()
+    finally:
+        cur.close()
+
+def info_dataset(sumber, dataset):
+    """Rentang tanggal, daftar toko & jumlah baris data bersih (untuk filter sidebar)."""
+    tabel_raw, tabel_cube = TABEL[dataset]
+    toko = _q(KOLOM_TOKO[dataset])
+    rentang = _query(sumber, f"SELECT MIN(Tanggal) AS awal, MAX(Tanggal) AS akhir FROM {tabel_cube}")
+    daftar_toko = _query(sumber, f"SELECT DISTINCT {toko} AS toko FROM {tabel_cube} WHERE {toko} IS NOT NULL")
+    n_raw = _query(sumber, f"SELECT COUNT(*) AS n FROM {tabel_raw}")
+    return {
+        'versi': sumber['versi'][tabel_cube],
+        'versi_raw': sumber['versi'][tabel_raw],
+        'tanggal_min': rentang['awal'].iat[0],
+        'tanggal_max': rentang['akhir'].iat[0],
+        'toko': sorted(daftar_toko['toko'].tolist()),
+        'n_raw': int(n_raw['n'].iat[0]),
+    }
+
+# ================= FILTER & AGREGASI =================
+def _where(dataset, start_date, end_date, tokos=(), filters=()):
+    """Predikat filter yang sama dengan dashboard_agg.filter_indeks, sebagai (sql, params)."""
+    kondisi = ["Tanggal BETWEEN ? AND ?"]
+    params = [pd.Timestamp(start_date).to_pydatetime(), pd.Timestamp(end_date).to_pydatetime()]
+    for col, values in [(KOLOM_TOKO[dataset], tokos), *filters]:
+        if not values:
+            continue
+        kondisi.append(f"{_q(col)} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    return " AND ".join(kondisi), params
+
+def _sum(sumber, tabel, col):
+    # SUM kolom integer di DuckDB bertipe HUGEINT (jadi float di pandas) -> BIGINT seperti pandas
+    if col in sumber['kolom_int'].get(tabel, ()):
+        return f"CAST(COALESCE(SUM({_q(col)}), 0) AS BIGINT)"
+    return f"COALESCE(SUM({_q(col)}), 0)"
+
+def _sum_per(sumber, tabel, by, metrik, where, params, order=None):
+    """Sama dengan dashboard_agg._sum_per: kunci non-NULL, urut per kunci, Tahun jadi teks."""
+    by = [by] if isinstance(by, str) else by
+    pilih = ", ".join(f"CAST({_q(c)} AS VARCHAR) AS {_q(c)}" if c == 'Tahun' else _q(c) for c in by)
+    kunci = ", ".join(_q(c) for c in by)
+    bukan_null = " AND ".join(f"{_q(c)} IS NOT NULL" for c in by)
+    return _query(sumber, f"""
+        SELECT {pilih}, {_sum(sumber, tabel, metrik)} AS {_q(metrik)}
+        FROM {tabel} WHERE {where} AND {bukan_null}
+        GROUP BY {kunci} ORDER BY {", ".join(_q(c) for c in (order or by))}
+    """, params)
+
+def _komponen(sumber, tabel, cols, where, params):
+    total = _query(sumber, f"SELECT {', '.join(_sum(sumber, tabel, c) + ' AS ' + _q(c) for c in cols)} FROM {tabel} WHERE {where}", params)
+    return pd.DataFrame({'Komponen': cols, 'Nilai': [total[c].iat[0] for c in cols]})
+
+def _tren_umum(sumber, tabel, metrik, where, params):
+    return {
+        'harian': _sum_per(sumber, tabel, 'Tanggal', metrik, where, params),
+    }
+
+def opsi_filter(sumber, dataset, start_date, end_date, tokos=()):
+    """(opsi filter lokal, jumlah baris cube) untuk rentang tanggal & toko terpilih."""
+    tabel = TABEL[dataset][1]
+    where, params = _where(dataset, start_date, end_date, tokos)
+    opsi = {}
+    for col in KOLOM_FILTER_LOKAL[dataset]:
+        if col not in sumber['kolom'][tabel]:
+            continue
+        nilai = _query(sumber, f"SELECT DISTINCT {_q(col)} AS v FROM {tabel} WHERE {where} AND {_q(col)} IS NOT NULL", params)
+        opsi[col] = sorted(nilai['v'].tolist())
+    n = _query(sumber, f"SELECT COUNT(*) AS n FROM {tabel} WHERE {where}", params)
+    return opsi, int(n['n'].iat[0])
+
+def kpi(sumber, dataset, where, params, metrik):
+    tabel = TABEL[dataset][1]
+    if dataset == 'kartu':
+        hitung, unik = 'Jumlah_Dibeli', {'toko_aktif': 'Folder_Asal', 'kategori_aktif': 'Tipe_Grup'}
+        nama_hitung = 'transaksi'
+    else:
+        hitung, unik = 'Jumlah Diaktifkan', {'mesin_aktif': 'GT_FINAL', 'toko_aktif': 'Center'}
+        nama_hitung = 'aktivasi'
+    row = _query(sumber, f"""
+        SELECT {_sum(sumber, tabel, metrik)} AS nilai, {_sum(sumber, tabel, hitung)} AS hitung,
+               {", ".join(f"COUNT(DISTINCT {_q(c)}) AS {k}" for k, c in unik.items())}
+        FROM {tabel} WHERE {where}
+    """, params).iloc[0]
+    return {'nilai': row['nilai'], nama_hitung: row['hitung'], **{k: int(row[k]) for k in unik}}
+
+def tren(sumber, dataset, where, params, metrik):
+    tabel = TABEL[dataset][1]
+    if dataset == 'kartu':
+        df_comp = _komponen(sumber, tabel, KOMPONEN_KARTU, where, params)
+        df_comp['Komponen'] = df_comp['Komponen'].map(LABEL_KOMPONEN_KARTU)
+    else:
+        df_comp = _komponen(sumber, tabel, KOMPONEN_MESIN, where, params)
+    return {
+        'komponen': df_comp,
+        **_tren_umum(sumber, tabel, metrik, where, params),
+        'proporsi_toko': _sum_per(sumber, tabel, KOLOM_TOKO[dataset], metrik, where, params),
+    }
+
+def peringkat(sumber, dataset, where, params, metrik):
+    """Total semua dimensi dalam satu query (GROUPING SETS), top/bottom dipilih di pandas."""
+    tabel = TABEL[dataset][1]
+    dims = {nama: col for nama, col in DIMENSI_PERINGKAT[dataset].items() if col in sumber['kolom'][tabel]}
+    kolom = list(dict.fromkeys(dims.values()))
+    hasil = _query(sumber, f"""
+        SELECT {", ".join(_q(c) for c in kolom)}, {_sum(sumber, tabel, metrik)} AS {_q(metrik)},
+               {", ".join(f"GROUPING({_q(c)}) AS g{i}" for i, c in enumerate(kolom))}
+        FROM {tabel} WHERE {where}
+        GROUP BY GROUPING SETS ({", ".join(f"({_q(c)})" for c in kolom)})
+    """, params)
+    total = {}
+    for i, col in enumerate(kolom):
+        bagian = hasil[(hasil[f"g{i}"] == 0) & hasil[col].notna()]
+        total[col] = bagian.set_index(col)[metrik].sort_index()
+    return {nama: top_bottom(total[col], col, metrik) for nama, col in dims.items()}
+
+def bulanan(sumber, dataset, where, params, metrik):
+    return _sum_per(sumber, TABEL[dataset][1], ['Tahun', 'Bulan_Urut'], metrik, where, params)
+
+AGREGASI = {'kpi': kpi, 'tren': tren, 'peringkat': peringkat, 'bulanan': bulanan}
+
+def agregasi(sumber, dataset, bagian, start_date, end_date, tokos, filters, metrik):
+    """Padanan dashboard_agg.agregasi(indeks, bagian, filter_indeks(...), metrik)."""
+    where, params = _where(dataset, start_date, end_date, tokos, filters)
+    return AGREGASI[bagian](sumber, dataset, where, params, metrik)
+
+def total_bulanan_toko(sumber, dataset, metrik):
+    """Total per (toko, bulan) semua metrik + jumlah baris, bahan dashboard_yoy.bangun_yoy(kolom_baris='baris')."""
+    tabel = TABEL[dataset][1]
+    toko = _q(KOLOM_TOKO[dataset])
+    metrik = [m for m in metrik if m in sumber['kolom'][tabel]]
+    return _query(sumber, f"""
+        SELECT {toko}, date_trunc('month', Tanggal) AS Tanggal, COUNT(*) AS baris,
+               {", ".join(f"{_sum(sumber, tabel, m)} AS {_q(m)}" for m in metrik)}
+        FROM {tabel} GROUP BY 1, 2
+    """)
+
+def tren_spesifik(sumber, dataset, start_date, end_date, tokos, filters, breakdown_col, metrik):
+    where, params = _where(dataset, start_date, end_date, tokos, filters)
+    return _sum_per(sumber, TABEL[dataset][1], ['Tanggal', breakdown_col], metrik, where, params)
+
+def data_mentah(sumber, dataset, limit=None):
+    """Data bersih urut Tanggal terbaru dulu; `limit` untuk pratinjau tabel."""
+    sql = f"SELECT * FROM {TABEL[dataset][0]} ORDER BY Tanggal DESC"
+    return _query(sumber, sql + (f" LIMIT {int(limit)}" if limit else ""))
+
+# ================= MAIN: BANGUN FILE DUCKDB DARI DATA BERSIH =================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bangun file DuckDB (data bersih + cube) untuk backend SQL dashboard.")
+    parser.add_argument("--output", default=path_db(), help=f"Path dasar file DuckDB; build ditulis sebagai <nama>_<waktu>.duckdb (default: env {ENV_FILE} atau {FILE_DB})")
+    args = parser.parse_args()
+
+    datasets = {}
+    for dataset, source_path, cube_path, bersihkan, bangun in [
+        ('kartu', dashboard_data.FILE_KARTU, dashboard_data.FILE_CUBE_KARTU, dashboard_data.bersihkan_kartu, dashboard_data.bangun_cube_kartu),
+        ('mesin', dashboard_data.FILE_MESIN, dashboard_data.FILE_CUBE_MESIN, dashboard_data.bersihkan_mesin, dashboard_data.bangun_cube_mesin),
+    ]:
+        if not os.path.exists(source_path):
+            print(f"⚠️ {dataset}: file tidak ditemukan, dilewati: {source_path}")
+            continue
+        print(f"📖 {dataset}: membaca {source_path}")
+        df = dashboard_data.baca_bersih(dataset, source_path, bersihkan)
+        if df is None:
+            print(f"❌ {dataset}: kolom Tanggal tidak ditemukan")
+            continue
+        cube = dashboard_data.baca_cube(cube_path, source_path)
+        if cube is None:
+            cube = bangun(df)
+        datasets[dataset] = (df, cube)
+        print(f"✅ {dataset}: {len(df):,} baris, cube {len(cube):,} baris")
+
+    if datasets:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        print(f"💾 File DuckDB: {bangun_database(args.output, datasets)}")
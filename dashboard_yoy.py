@@ -0,0 +1,117 @@
+import pandas as pd
+import numpy as np
+from dashboard_data import MAP_BULAN_INDO, NUM_COLS_KARTU, NUM_COLS_MESIN
+from dashboard_agg import KOLOM_TOKO
+
+# ================= MATRIKS YOY (TAHUN x BULAN) =================
+# Dibangun sekali saat data dimuat: untuk setiap metrik, array [toko, tahun, bulan]
+# berisi total bulanan, plus jumlah baris per sel (bulan tanpa data tidak digambar).
+# Rentang filter dashboard selalu per bulan penuh, jadi grafik tahunan / bulanan (YoY)
+# untuk pilihan toko + rentang bulan cukup dijumlahkan dari array ini, tanpa groupby.
+# Filter spesifik (kategori, mesin, dll.) tidak ada di matriks -> tabel bulanan hasil
+# agregasi terfilter diubah ke bentuk yang sama dengan dari_bulanan().
+# Semua tahun yang ada di data ikut (tidak ada tahun yang ditulis di kode).
+
+METRIK_YOY = {'kartu': NUM_COLS_KARTU, 'mesin': NUM_COLS_MESIN}
+
+# Warna grafik per tahun: tahun terakhir = warna utama halaman, tahun-tahun sebelumnya
+# abu-abu (makin lama makin pudar)
+WARNA_TAHUN_LAMA_BAR = ['#bdc3c7', '#d5d8dc', '#e5e7e9']
+WARNA_TAHUN_LAMA_GARIS = ['gray', 'darkgray', 'lightgray']
+
+def bangun_yoy(df, dataset, kolom_baris=None):
+    """
+    df: cube / data bersih (Tanggal, kolom toko, metrik) atau hasil agregasi per bulan
+    dengan kolom jumlah baris `kolom_baris`. Hasil dipakai read-only oleh semua sesi.
+    """
+    col_toko = KOLOM_TOKO[dataset]
+    metrik = [c for c in METRIK_YOY[dataset] if c in df.columns]
+    kolom = df[col_toko]
+    if isinstance(kolom.dtype, pd.CategoricalDtype):
+        kode_toko, toko = np.asarray(kolom.cat.codes), kolom.cat.categories
+    else:
+        kode_toko, toko = pd.factorize(kolom, sort=True)
+    # Slot terakhir untuk toko kosong (NaN): ikut dihitung hanya jika tidak ada filter toko
+    kode_toko = np.where(kode_toko < 0, len(toko), kode_toko)
+
+    tanggal = pd.to_datetime(df['Tanggal'])
+    nilai_tahun = tanggal.dt.year.to_numpy()
+    tahun = np.unique(nilai_tahun)
+    bentuk = (len(toko) + 1, len(tahun), 12)
+    sel = np.ravel_multi_index((kode_toko, np.searchsorted(tahun, nilai_tahun), tanggal.dt.month.to_numpy() - 1), bentuk)
+    ukuran = int(np.prod(bentuk))
+
+    bobot_baris = None if kolom_baris is None else df[kolom_baris].to_numpy(dtype='float64')
+    baris = np.bincount(sel, weights=bobot_baris, minlength=ukuran).reshape(bentuk)
+    nilai = {}
+    for m in metrik:
+        total = np.bincount(sel, weights=df[m].to_numpy(dtype='float64', na_value=0.0), minlength=ukuran).reshape(bentuk)
+        # float64 eksak untuk jumlah bilangan bulat < 2**53, jadi aman dikembalikan ke int
+        nilai[m] = total.astype(np.int64) if pd.api.types.is_integer_dtype(df[m].dtype) else total
+    return {'toko': pd.Index(toko), 'tahun': tahun, 'baris': baris, 'nilai': nilai}
+
+def pilih(yoy, metrik, start_date, end_date, tokos=()):
+    """Matriks {'tahun', 'nilai' [tahun, 12], 'ada' [tahun, 12]} untuk toko & rentang bulan terpilih."""
+    nilai, baris = yoy['nilai'][metrik], yoy['baris']
+    if tokos:
+        posisi = yoy['toko'].get_indexer(list(tokos))
+        posisi = posisi[posisi >= 0]
+        nilai, baris = nilai[posisi], baris[posisi]
+    nilai, baris = nilai.sum(axis=0), baris.sum(axis=0)
+
+    # Indeks bulan absolut (tahun*12 + bulan) untuk membatasi rentang filter
+    bulan_abs = yoy['tahun'][:, None] * 12 + np.arange(12)
+    awal, akhir = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    dalam = (bulan_abs >= awal.year * 12 + awal.month - 1) & (bulan_abs <= akhir.year * 12 + akhir.month - 1)
+    ada = dalam & (baris > 0)
+    tahun_ada = ada.any(axis=1)
+    return {
+        'tahun': [str(t) for t in yoy['tahun'][tahun_ada]],
+        'nilai': np.where(ada, nilai, 0)[tahun_ada],
+        'ada': ada[tahun_ada],
+    }
+
+def dari_bulanan(df, metrik):
+    """Matriks dengan bentuk yang sama dengan pilih(), dari tabel (Tahun, Bulan_Urut, metrik)."""
+    tahun = sorted(df['Tahun'].astype(str).unique())
+    baris = np.searchsorted(tahun, df['Tahun'].astype(str).to_numpy())
+    kolom = df['Bulan_Urut'].to_numpy().astype(np.int64) - 1
+    nilai = np.zeros((len(tahun), 12), dtype=df[metrik].dtype if len(df) else np.int64)
+    ada = np.zeros((len(tahun), 12), dtype=bool)
+    np.add.at(nilai, (baris, kolom), df[metrik].to_numpy())
+    ada[baris, kolom] = True
+    return {'tahun': tahun, 'nilai': nilai, 'ada': ada}
+
+def tabel_tahunan(mat, metrik):
+    """Total per tahun (Tahun, metrik) untuk grafik bar."""
+    return pd.DataFrame({'Tahun': mat['tahun'], metrik: mat['nilai'].sum(axis=1)})
+
+def tabel_bulanan(mat, metrik):
+    """Bulan yang ada datanya (Tahun, Bulan_Urut, Nama_Bulan, metrik), urut tahun lalu bulan."""
+    i_tahun, i_bulan = np.nonzero(mat['ada'])
+    return pd.DataFrame({
+        'Tahun': np.asarray(mat['tahun'], dtype=object)[i_tahun],
+        'Bulan_Urut': i_bulan + 1,
+        'Nama_Bulan': [MAP_BULAN_INDO[b + 1] for b in i_bulan],
+        metrik: mat['nilai'][i_tahun, i_bulan],
+    })
+
+def pertumbuhan(mat, tahun_dasar, tahun_banding):
+    """Growth (%) total tahun_banding terhadap tahun_dasar; 0 jika tahun dasar tidak ada / <= 0."""
+    total = dict(zip(mat['tahun'], mat['nilai'].sum(axis=1)))
+    dasar, banding = total.get(tahun_dasar, 0), total.get(tahun_banding, 0)
+    return ((banding - dasar) / dasar) * 100 if dasar > 0 else 0
+
+def pasangan_default(mat):
+    """(tahun dasar, tahun banding) = dua tahun terakhir yang ada datanya."""
+    tahun = mat['tahun']
+    if len(tahun) >= 2:
+        return tahun[-2], tahun[-1]
+    return (tahun[0], tahun[0]) if tahun else (None, None)
+
+def warna_tahun(tahun, warna_utama, warna_lama):
+    """color_discrete_map: tahun terakhir warna_utama, tahun sebelumnya dari warna_lama."""
+    warna = {}
+    for i, t in enumerate(reversed(tahun)):
+        warna[t] = warna_utama if i == 0 else warna_lama[min(i - 1, len(warna_lama) - 1)]
+    return warna
@@ -0,0 +1,141 @@
+import pandas as pd
+import os
+import time
+import pickle
+import re
+from gspread.utils import numericise_all, rowcol_to_a1
+
+# ================= SINKRONISASI GOOGLE SHEETS (INKREMENTAL) =================
+# Sheet transaksi hanya bertambah di bawah, jadi setelah load penuh pertama cukup
+# baris baru yang diunduh (batch_get berjangkauan) lalu dibersihkan dan digabung ke
+# cache lokal. Worksheet cukup punya get_values() dan batch_get(ranges), sehingga
+# bisa diuji dengan worksheet palsu tanpa akses ke Google.
+
+CACHE_DIR = "cache_gsheet"
+
+# Load penuh ulang secara berkala untuk menangkap edit di tengah sheet
+# (perubahan header / baris terakhir selalu memicu load penuh).
+INTERVAL_SINKRON_PENUH = 24 * 60 * 60  # detik
+
+# Naikkan jika format cache berubah. Versi logika cleaning dikirim pemanggil (`versi`,
+# mis. dashboard_data.VERSI_SNAPSHOT); keduanya disimpan di meta, cache dengan versi
+# lain tidak dipakai (load penuh) supaya baris bersih lama tidak terus dipakai.
+VERSI_CACHE = 1
+
+def _huruf_kolom(n):
+    return re.sub(r'\d', '', rowcol_to_a1(1, max(n, 1)))
+
+def _pad(row, n):
+    row = list(row)[:n]
+    return row + [""] * (n - len(row))
+
+def _ke_dataframe(header, rows, start_index=0):
+    """Sama dengan get_all_records(): angka dinumerisasi, sel kosong jadi ""."""
+    records = [dict(zip(header, numericise_all(row))) for row in rows]
+    df = pd.DataFrame(records)
+    df.index = pd.RangeIndex(start_index, start_index + len(df))
+    return df
+
+def _baca_cache(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+def _tulis_cache(path, meta, df):
+    # Meta dan data disimpan dalam satu file supaya selalu konsisten
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({'meta': meta, 'df': df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def _load_penuh(worksheet, nama, kunci, versi, bersihkan, path):
+    values = worksheet.get_values()
+    if not values or not values[0]:
+        return None
+    header = list(values[0])
+    rows = [_pad(r, len(header)) for r in values[1:]]
+    df = bersihkan(_ke_dataframe(header, rows))
+    if df is None:
+        return None
+    meta = {
+        'kunci': kunci,
+        'versi': versi,
+        'header': header,
+        'jumlah_baris': len(rows),
+        'baris_terakhir': rows[-1] if rows else header,
+        'sinkron_penuh': time.time(),
+    }
+    _tulis_cache(path, meta, df)
+    print(f"🔄 {nama}: load penuh {len(rows):,} baris dari Google Sheets")
+    return df
+
+def sinkron_worksheet(worksheet, nama, bersihkan, kunci=None, versi=None, cache_dir=CACHE_DIR,
+                      interval_penuh=INTERVAL_SINKRON_PENUH):
+    """
+    Ambil isi worksheet sebagai DataFrame bersih (hasil `bersihkan`) memakai cache lokal.
+
+    - Load pertama / cache tidak cocok: get_values() penuh.
+    - Selanjutnya: satu batch_get untuk header, baris terakhir yang sudah di-cache, dan
+      baris baru di bawahnya. Hanya baris baru yang dibersihkan lalu digabung ke cache.
+    - Header berubah, baris terakhir berubah (edit/hapus), `kunci` (mis. URL) berbeda,
+      `versi` (versi logika `bersihkan`) atau VERSI_CACHE berbeda, atau cache lebih tua
+      dari `interval_penuh` -> load penuh.
+
+    Return None jika sheet kosong atau `bersihkan` mengembalikan None.
+    """
+    path = os.path.join(cache_dir, f"{nama}.pkl")
+    versi = (VERSI_CACHE, versi)
+    cache = _baca_cache(path)
+    if (cache is None
+            or cache['meta'].get('kunci') != kunci
+            or cache['meta'].get('versi') != versi
+            or time.time() - cache['meta'].get('sinkron_penuh', 0) > interval_penuh):
+        return _load_penuh(worksheet, nama, kunci, versi, bersihkan, path)
+
+    meta, df_cache = cache['meta'], cache['df']
+    header = meta['header']
+    n_kolom = len(header)
+    n_baris = meta['jumlah_baris']
+    kolom_akhir = _huruf_kolom(n_kolom)
+
+    # Baris sheet: 1 = header, data ke-i ada di baris i + 1
+    baris_cek = n_baris + 1
+    baris_baru = n_baris + 2
+    ranges = ["1:1", f"A{baris_cek}:{kolom_akhir}{baris_cek}"]
+    row_count = getattr(worksheet, 'row_count', None)
+    ada_ruang = row_count is None or baris_baru <= row_count
+    if ada_ruang:
+        ranges.append(f"A{baris_baru}:{kolom_akhir}")
+    hasil = worksheet.batch_get(ranges)
+
+    header_now = list(hasil[0][0]) if hasil[0] else []
+    cek_now = _pad(hasil[1][0], n_kolom) if hasil[1] else _pad([], n_kolom)
+    if _pad(header_now, n_kolom) != _pad(header, n_kolom) or len(header_now) > n_kolom:
+        print(f"⚠️ {nama}: header berubah, load penuh ulang")
+        return _load_penuh(worksheet, nama, kunci, versi, bersihkan, path)
+    if cek_now != _pad(meta['baris_terakhir'], n_kolom):
+        print(f"⚠️ {nama}: baris terakhir berubah/terhapus, load penuh ulang")
+        return _load_penuh(worksheet, nama, kunci, versi, bersihkan, path)
+
+    rows = [_pad(r, n_kolom) for r in hasil[2]] if ada_ruang else []
+    if not rows:
+        return df_cache
+
+    df_baru = bersihkan(_ke_dataframe(header, rows, start_index=n_baris))
+    if df_baru is None:
+        return _load_penuh(worksheet, nama, kunci, versi, bersihkan, path)
+    df = pd.concat([df_cache, df_baru]) if len(df_cache) else df_baru
+    # concat kolom category dengan kategori berbeda jadi object; kembalikan ke category
+    for col in df_cache.select_dtypes('category').columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    meta = {**meta, 'jumlah_baris': n_baris + len(rows), 'baris_terakhir': rows[-1]}
+    _tulis_cache(path, meta, df)
+    print(f"➕ {nama}: {len(rows):,} baris baru digabung ke cache ({len(df):,} baris)")
+    return df
@@ -0,0 +1,136 @@
+import os
+import argparse
+import importlib
+import threading
+import concurrent.futures
+from dotenv import load_dotenv
+
+# Nama modul diawali angka, jadi diimpor lewat importlib
+transform_kartu = importlib.import_module("1_transform")
+transform_mesin = importlib.import_module("1_transform_mesin")
+
+# ================= INGEST KARTU + MESIN =================
+# Satu pintu masuk untuk kedua pipeline transform, dengan path yang bisa diatur:
+#   python ingest.py kartu --raw-kartu D:/raw_data --format parquet --workers 8
+#   python ingest.py mesin --raw-mesin D:/data-mesin --stream
+#   python ingest.py all --workers 8   (kartu & mesin bersamaan, berbagi 1 pool proses)
+# Default path: argumen CLI > env (INGEST_RAW_KARTU, INGEST_RAW_MESIN, INGEST_OUTPUT_DIR,
+# juga dari .env) > konfigurasi di 1_transform.py / 1_transform_mesin.py.
+# Output & state incremental (manifest SQLite) ditulis di --output-dir.
+# Filter scan (os.scandir, lihat ingest_umum.pindai), bisa diulang:
+#   --include "*.xlsx"  --exclude "*_draft*"  --prune "2023_*" (subfolder kartu yang sudah final)
+
+def ingest_kartu(raw, output_dir=".", fmt=transform_kartu.output_format, workers=1,
+                 laporan_dir=transform_kartu.laporan_dir, executor=None,
+                 include=None, exclude=(), prune=()):
+    """include menggantikan pola default; exclude & prune ditambahkan ke default."""
+    transform_kartu.jalankan_kartu(
+        raw,
+        os.path.join(output_dir, transform_kartu.output_file),
+        fmt,
+        os.path.join(output_dir, transform_kartu.output_parquet_dir),
+        os.path.join(output_dir, transform_kartu.manifest_file),
+        workers=workers, laporan_dir=laporan_dir, executor=executor,
+        pola=include or transform_kartu.pola_file,
+        kecuali=transform_kartu.pola_kecuali + list(exclude),
+        lewati=transform_kartu.folder_dilewati + list(prune),
+    )
+
+def ingest_mesin(raw, output_dir=".", stream=False, workers=1,
+                 laporan_dir=transform_mesin.LAPORAN_DIR, executor=None,
+                 include=None, exclude=()):
+    """Folder mesin tidak di-scan rekursif, jadi tidak ada opsi prune."""
+    transform_mesin.gabung_file_mesin(
+        raw, stream=stream, laporan_dir=laporan_dir,
+        output_file=os.path.join(output_dir, transform_mesin.OUTPUT_FILENAME),
+        parquet_dir=os.path.join(output_dir, transform_mesin.OUTPUT_PARQUET_DIR),
+        manifest_path=os.path.join(output_dir, transform_mesin.MANIFEST_FILE),
+        workers=workers, executor=executor,
+        pola=include or transform_mesin.POLA_FILE,
+        kecuali=transform_mesin.POLA_KECUALI_FILE + list(exclude),
+    )
+
+def ingest_semua(args):
+    """Kartu & mesin dijalankan di dua thread yang berbagi satu ProcessPoolExecutor."""
+    if args.workers <= 1:
+        jalankan_kartu(args)
+        jalankan_mesin(args)
+        return
+
+    print(f"⚙️ Ingest kartu & mesin bersamaan, pool {args.workers} proses")
+    errors = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as pool:
+        def _thread(fungsi, nama):
+            try:
+                fungsi(args, executor=pool)
+            except Exception as e:
+                errors.append((nama, e))
+                print(f"❌ Ingest {nama} gagal: {e}")
+
+        threads = [
+            threading.Thread(target=_thread, args=(jalankan_kartu, "kartu")),
+            threading.Thread(target=_thread, args=(jalankan_mesin, "mesin")),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0][1]
+
+def jalankan_kartu(args, executor=None):
+    ingest_kartu(args.raw_kartu, args.output_dir, args.format, args.workers, args.laporan, executor,
+                 args.include, args.exclude, args.prune)
+
+def jalankan_mesin(args, executor=None):
+    ingest_mesin(args.raw_mesin, args.output_dir, args.stream, args.workers, args.laporan, executor,
+                 args.include, args.exclude)
+
+def buat_parser():
+    load_dotenv()
+    umum = argparse.ArgumentParser(add_help=False)
+    umum.add_argument("--output-dir", default=os.getenv("INGEST_OUTPUT_DIR", "."),
+                      help="Folder output & state incremental (default: env INGEST_OUTPUT_DIR atau folder kerja)")
+    umum.add_argument("--workers", type=int, default=1,
+                      help="Jumlah proses paralel untuk membaca workbook (default 1 = tanpa paralel)")
+    umum.add_argument("--laporan", default=transform_kartu.laporan_dir,
+                      help=f"Folder laporan run JSON/CSV (default: {transform_kartu.laporan_dir})")
+    umum.add_argument("--include", action="append", metavar="POLA",
+                      help="Pola file yang diambil, menggantikan default (*.xlsx kartu, *.xlsx/*.xls mesin)")
+    umum.add_argument("--exclude", action="append", default=[], metavar="POLA",
+                      help="Pola file yang diabaikan, selain file lock ~$* dan file tersembunyi")
+
+    opsi_kartu = argparse.ArgumentParser(add_help=False)
+    opsi_kartu.add_argument("--raw-kartu", default=os.getenv("INGEST_RAW_KARTU", transform_kartu.root_folder),
+                            help="Folder raw_data kartu (default: env INGEST_RAW_KARTU)")
+    opsi_kartu.add_argument("--format", choices=["xlsx", "parquet"], default=transform_kartu.output_format,
+                            help="Output kartu: xlsx (1 file gabungan) atau parquet (partisi yang berubah saja)")
+    opsi_kartu.add_argument("--prune", action="append", default=[], metavar="POLA",
+                            help="Subfolder raw kartu yang tidak di-scan (mis. tahun yang sudah final); "
+                                 "baris lamanya di manifest tetap dipakai")
+
+    opsi_mesin = argparse.ArgumentParser(add_help=False)
+    opsi_mesin.add_argument("--raw-mesin", default=os.getenv("INGEST_RAW_MESIN", transform_mesin.FOLDER_PATH),
+                            help="Folder data-mesin (default: env INGEST_RAW_MESIN)")
+    opsi_mesin.add_argument("--stream", action="store_true",
+                            help="Output mesin: 1 parquet per file (incremental) alih-alih 1 file xlsx")
+
+    parser = argparse.ArgumentParser(description="Ingest data kartu dan/atau mesin dari file Excel mentah.")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+    sub.add_parser("kartu", parents=[umum, opsi_kartu], help="Ingest detail paket kartu")
+    sub.add_parser("mesin", parents=[umum, opsi_mesin], help="Ingest data mesin")
+    sub.add_parser("all", parents=[umum, opsi_kartu, opsi_mesin], help="Ingest kartu & mesin sekaligus")
+    return parser
+
+def main(argv=None):
+    args = buat_parser().parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.perintah == "kartu":
+        jalankan_kartu(args)
+    elif args.perintah == "mesin":
+        jalankan_mesin(args)
+    else:
+        ingest_semua(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import pandas as pd
+import os
+import re
+import fnmatch
+import hashlib
+import sqlite3
+import datetime
+from transform_metrik import Stopwatch
+
+# ================= KOMPONEN INGEST BERSAMA =================
+# Dipakai oleh 1_transform.py (kartu) dan 1_transform_mesin.py (mesin):
+# - baca_excel  : calamine (cepat) dengan fallback ke engine default pandas
+# - state incremental: tabel `sumber` (path, size, mtime_ns, sha256) di file SQLite,
+#   startup cukup stat per file; hash hanya jika size/mtime berubah
+# - pindai      : scan folder dengan os.scandir (Windows & Linux), pola include/exclude
+#   dan folder yang dilewati (prune)
+
+def baca_excel(path, metrik=None, **kwargs):
+    """
+    pd.read_excel dengan engine calamine, fallback ke openpyxl/xlrd jika gagal.
+    `metrik` (dict, opsional) diisi engine yang dipakai dan waktu baca (baca_s).
+    Error dari engine fallback diteruskan ke pemanggil.
+    """
+    if metrik is None:
+        metrik = {}
+    sw = Stopwatch()
+    try:
+        try:
+            df = pd.read_excel(path, engine='calamine', **kwargs)
+            metrik['engine'] = 'calamine'
+        except Exception:
+            df = pd.read_excel(path, **kwargs)
+            metrik['engine'] = 'xlrd' if str(path).lower().endswith('.xls') else 'openpyxl'
+    finally:
+        metrik['baca_s'] = round(sw.lap(), 4)
+    return df
+
+# ================= PEMINDAIAN FOLDER =================
+POLA_EXCEL = ("*.xlsx", "*.xls")
+POLA_KECUALI = ("~$*", ".*")   # file lock Excel yang sedang dibuka & file tersembunyi
+POLA_LEWATI = (".*",)          # folder tersembunyi (sama seperti glob "**")
+
+def path_panjang(path):
+    r"""
+    Di Windows, path absolut diberi prefix \\?\ supaya path > 260 karakter tetap bisa
+    dibuka (UNC -> \\?\UNC\...). Cukup dilakukan sekali di root: path hasil scandir
+    mewarisi prefix-nya. Di OS lain path dikembalikan apa adanya.
+    """
+    if os.name != "nt" or path.startswith("\\\\?\\"):
+        return path
+    path = os.path.abspath(path)
+    if path.startswith("\\\\"):
+        return "\\\\?\\UNC\\" + path[2:]
+    return "\\\\?\\" + path
+
+def _kompilasi(pola_list):
+    """
+    Satu regex untuk pola nama & satu untuk pola path relatif (pola yang mengandung '/').
+    Tidak case-sensitive, sama seperti Windows. Return fungsi cocok(nama, rel).
+    """
+    per_nama, per_rel = [], []
+    for pola in pola_list:
+        pola = pola.replace("\\", "/")
+        (per_rel if "/" in pola else per_nama).append(fnmatch.translate(pola))
+    cek_nama = re.compile("|".join(per_nama), re.IGNORECASE).match if per_nama else None
+    cek_rel = re.compile("|".join(per_rel), re.IGNORECASE).match if per_rel else None
+
+    def cocok(nama, rel):
+        return bool((cek_nama and cek_nama(nama)) or (cek_rel and cek_rel(rel)))
+    return cocok
+
+def pindai(root, pola=POLA_EXCEL, kecuali=POLA_KECUALI, lewati=POLA_LEWATI, rekursif=True):
+    """
+    Scan root dengan os.scandir. Return list (path, key, stat) urut berdasarkan key,
+    key = path relatif terhadap root (sama dengan os.path.relpath, jadi cocok dengan
+    state lama). Stat diambil dari DirEntry: di Windows ikut terbawa dari listing
+    (tanpa syscall tambahan), di Linux tipe file dari listing sehingga stat hanya
+    dilakukan untuk file yang lolos filter.
+    - pola    : pola file yang diambil (mis. "*.xlsx")
+    - kecuali : pola file yang diabaikan (mis. "~$*", "arsip/*")
+    - lewati  : pola subfolder yang tidak di-scan sama sekali (mis. folder yang sudah
+                selesai di-ingest, "2023_*" atau "Toko_A/lama")
+    """
+    root = path_panjang(root)
+    cocok_pola, cocok_kecuali, cocok_lewati = _kompilasi(pola), _kompilasi(kecuali), _kompilasi(lewati)
+    hasil = []
+    stack = [(root, "")]
+    while stack:
+        folder, rel_folder = stack.pop()
+        with os.scandir(folder) as it:
+            for entry in it:
+                rel = rel_folder + "/" + entry.name if rel_folder else entry.name
+                if entry.is_dir():
+                    if rekursif and not cocok_lewati(entry.name, rel):
+                        stack.append((entry.path, rel))
+                elif entry.is_file():
+                    if cocok_pola(entry.name, rel) and not cocok_kecuali(entry.name, rel):
+                        hasil.append((entry.path, rel.replace("/", os.sep), entry.stat()))
+    # Urutan deterministik (sama seperti sorted(glob)), baik mode single maupun paralel
+    hasil.sort(key=lambda f: f[1])
+    return hasil
+
+def di_folder_dilewati(key, lewati):
+    """True jika key berada di bawah subfolder yang cocok dengan salah satu pola lewati."""
+    cocok = _kompilasi(lewati)
+    bagian = key.replace(os.sep, "/").split("/")[:-1]
+    return any(cocok(bagian[i], "/".join(bagian[:i + 1])) for i in range(len(bagian)))
+
+# ================= STATE INCREMENTAL =================
+def buka_state(path):
+    """Buka (atau buat) file state SQLite dengan tabel `sumber`."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    con = sqlite3.connect(path, timeout=60)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS sumber (
+            path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT,
+            jumlah_baris INTEGER, diproses_pada TEXT
+        )""")
+    return con
+
+def baca_state(con):
+    """Return dict path -> (size, mtime_ns, sha256)."""
+    return {
+        path: (size, mtime_ns, sha256)
+        for path, size, mtime_ns, sha256 in con.execute("SELECT path, size, mtime_ns, sha256 FROM sumber")
+    }
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def catat_sumber(con, key, stat, sha256, jumlah_baris):
+    con.execute(
+        "INSERT OR REPLACE INTO sumber VALUES (?, ?, ?, ?, ?, ?)",
+        (key, stat.st_size, stat.st_mtime_ns, sha256, jumlah_baris,
+         datetime.datetime.now().isoformat(timespec='seconds')),
+    )
+
+def pilah_file(con, state, files):
+    """
+    files: iterable (path, key, stat). Return (perlu_diproses, jumlah_skip) dengan
+    perlu_diproses = [(path, key, stat, sha256), ...] untuk file baru / isinya berubah.
+    File yang hanya berubah stat-nya (mis. di-copy ulang) cukup di-update stat-nya.
+    """
+    perlu_diproses = []
+    skipped = 0
+    for path, key, stat in files:
+        lama = state.get(key)
+        if lama is not None and lama[0] == stat.st_size and lama[1] == stat.st_mtime_ns:
+            skipped += 1
+            continue
+
+        sha256 = hash_file(path)
+        if lama is not None and lama[2] == sha256:
+            # Isi sama (mis. file hanya di-copy ulang) -> update stat saja
+            con.execute("UPDATE sumber SET size = ?, mtime_ns = ? WHERE path = ?",
+                        (stat.st_size, stat.st_mtime_ns, key))
+            skipped += 1
+            continue
+
+        perlu_diproses.append((path, key, stat, sha256))
+    return perlu_diproses, skipped
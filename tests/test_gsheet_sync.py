@@ -0,0 +1,174 @@
+import pandas as pd
+import pytest
+from gspread.utils import a1_range_to_grid_range
+
+import gsheet_sync
+
+# ================= WORKSHEET PALSU =================
+# Meniru bagian gspread.Worksheet yang dipakai gsheet_sync, termasuk perilaku API
+# Sheets: sel kosong di akhir baris dan baris kosong di akhir range tidak dikembalikan.
+class FakeWorksheet:
+    def __init__(self, values, row_count=1000):
+        self.values = [list(r) for r in values]
+        self.row_count = row_count
+        self.panggilan = []
+
+    def _rapikan(self, rows):
+        rows = [list(r) for r in rows]
+        for r in rows:
+            while r and r[-1] == "":
+                r.pop()
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+    def _range(self, a1):
+        grid = a1_range_to_grid_range(a1)
+        awal_baris, akhir_baris = grid.get('startRowIndex', 0), grid.get('endRowIndex', len(self.values))
+        awal_kolom, akhir_kolom = grid.get('startColumnIndex', 0), grid.get('endColumnIndex')
+        return self._rapikan(r[awal_kolom:akhir_kolom] for r in self.values[awal_baris:akhir_baris])
+
+    def get_values(self):
+        self.panggilan.append('get_values')
+        lebar = max((len(r) for r in self.values), default=0)
+        return [r + [""] * (lebar - len(r)) for r in self._rapikan(self.values)]
+
+    def get_all_values(self):
+        return self.get_values()
+
+    def row_values(self, row):
+        self.panggilan.append('row_values')
+        rows = self._range(f"{row}:{row}")
+        return rows[0] if rows else []
+
+    def batch_get(self, ranges):
+        self.panggilan.append('batch_get')
+        return [self._range(r) for r in ranges]
+
+HEADER = ['Tanggal', 'Toko', 'Total']
+
+def _baris(i):
+    return [f"2024-01-{i % 28 + 1:02d}", f"T{i % 3}", str(i * 100)]
+
+def _sheet(n):
+    return [HEADER] + [_baris(i) for i in range(n)]
+
+class Pembersih:
+    """bersihkan palsu: mencatat jumlah baris yang dibersihkan per panggilan."""
+    def __init__(self):
+        self.ukuran = []
+
+    def __call__(self, df):
+        self.ukuran.append(len(df))
+        return df.copy()
+
+def _sinkron(ws, tmp_path, bersihkan, **kwargs):
+    return gsheet_sync.sinkron_worksheet(ws, "uji", bersihkan, kunci="url", cache_dir=str(tmp_path), **kwargs)
+
+def _harapan(values):
+    return gsheet_sync._ke_dataframe(values[0], values[1:])
+
+# ================= TES =================
+def test_load_pertama_penuh(tmp_path):
+    ws, bersihkan = FakeWorksheet(_sheet(5)), Pembersih()
+    df = _sinkron(ws, tmp_path, bersihkan)
+    assert ws.panggilan == ['get_values']
+    assert bersihkan.ukuran == [5]
+    pd.testing.assert_frame_equal(df, _harapan(ws.values))
+
+def test_tanpa_perubahan_pakai_cache(tmp_path):
+    ws, bersihkan = FakeWorksheet(_sheet(5)), Pembersih()
+    _sinkron(ws, tmp_path, bersihkan)
+    df = _sinkron(ws, tmp_path, bersihkan)
+    assert ws.panggilan == ['get_values', 'batch_get']
+    assert bersihkan.ukuran == [5]
+    pd.testing.assert_frame_equal(df, _harapan(ws.values))
+
+def test_baris_baru_hanya_ekor_yang_dibaca(tmp_path):
+    ws, bersihkan = FakeWorksheet(_sheet(5)), Pembersih()
+    _sinkron(ws, tmp_path, bersihkan)
+    ws.values += [_baris(i) for i in range(5, 8)]
+    df = _sinkron(ws, tmp_path, bersihkan)
+    assert ws.panggilan == ['get_values', 'batch_get']
+    assert bersihkan.ukuran == [5, 3]
+    pd.testing.assert_frame_equal(df, _harapan(ws.values))
+
+    # Pertumbuhan berikutnya dicek terhadap baris terakhir yang baru
+    ws.values.append(_baris(8))
+    df = _sinkron(ws, tmp_path, bersihkan)
+    assert ws.panggilan[-1] == 'batch_get'
+    assert bersihkan.ukuran == [5, 3, 1]
+    pd.testing.assert_frame_equal(df, _harapan(ws.values))
+
+def test_grid_penuh_tanpa_ruang_baris_baru(tmp_path):
+    ws, bersihkan = FakeWorksheet(_sheet(5), row_count=6), Pembersih()
+    _sinkron(ws, tmp_path, bersihkan)
+    df = _sinkron(ws, tmp_path, bersihkan)
+    assert ws.panggilan == ['get_values', 'batch_get']
+    pd.testing.assert_frame_equal(df, _harapan(ws.values))
+
+@pytest.mark.parametrize("ubah", [
+    lambda v: v[-1].__setitem__(2, "999"),   # baris terakhir diedit
+    lambda v: v.pop(),                       # baris terakhir dihapus
+])
+def test_baris_terakhir_berubah_load_penuh(tmp_path, ubah):
+    ws, bersihkan = FakeWorksheet(_sheet(5)), Pembersih()
+    _sinkron(ws, tmp_path, bersihkan)
+    ubah(ws.values)
+    ws.values.append(_baris(9))
+    df = _sinkron(ws, tmp_path, bersihkan)
+    assert ws.panggilan == ['get_values', 'batch_get', 'get_values']
+    assert bersihkan.ukuran[-1] == len(ws.values) - 1
+    pd.testing.assert_frame_equal(df, _harapan(ws.values))
+
+def test_header_berubah_load_penuh(tmp_path):
+    ws, bersihkan = FakeWorksheet(_sheet(5)), Pembersih()
+    _sinkron(ws, tmp_path, bersihkan)
+    ws.values[0] = HEADER + ['Catatan']
+    ws.values.append(_baris(5) + ['baru'])
+    df = _sinkron(ws, tmp_path, bersihkan)
+    assert ws.panggilan == ['get_values', 'batch_get', 'get_values']
+    assert list(df.columns) == HEADER + ['Catatan']
+    pd.testing.assert_frame_equal(df, _harapan(FakeWorksheet(ws.values).get_values()))
+
+def test_interval_habis_load_penuh(tmp_path, monkeypatch):
+    ws, bersihkan = FakeWorksheet(_sheet(5)), Pembersih()
+    sekarang = [1_000_000.0]
+    monkeypatch.setattr(gsheet_sync.time, 'time', lambda: sekarang[0])
+    _sinkron(ws, tmp_path, bersihkan, interval_penuh=3600)
+
+    # Edit di tengah sheet tidak terdeteksi sebelum interval habis
+    ws.values[2][2] = "12345"
+    sekarang[0] += 3599
+    df = _sinkron(ws, tmp_path, bersihkan, interval_penuh=3600)
+    assert ws.panggilan == ['get_values', 'batch_get']
+    assert df['Total'].iat[1] != 12345
+
+    sekarang[0] += 2
+    df = _sinkron(ws, tmp_path, bersihkan, interval_penuh=3600)
+    assert ws.panggilan == ['get_values', 'batch_get', 'get_values']
+    assert df['Total'].iat[1] == 12345
+
+def test_kunci_berbeda_load_penuh(tmp_path):
+    ws, bersihkan = FakeWorksheet(_sheet(5)), Pembersih()
+    _sinkron(ws, tmp_path, bersihkan)
+    gsheet_sync.sinkron_worksheet(ws, "uji", bersihkan, kunci="url-lain", cache_dir=str(tmp_path))
+    assert ws.panggilan == ['get_values', 'get_values']
+
+def test_versi_cleaning_berbeda_load_penuh(tmp_path):
+    ws, bersihkan = FakeWorksheet(_sheet(5)), Pembersih()
+    _sinkron(ws, tmp_path, bersihkan, versi=1)
+    _sinkron(ws, tmp_path, bersihkan, versi=1)
+    _sinkron(ws, tmp_path, bersihkan, versi=2)
+    assert ws.panggilan == ['get_values', 'batch_get', 'get_values']
+    assert bersihkan.ukuran == [5, 5]
+
+def test_cache_lama_tanpa_versi_load_penuh(tmp_path):
+    ws, bersihkan = FakeWorksheet(_sheet(5)), Pembersih()
+    _sinkron(ws, tmp_path, bersihkan)
+    path = str(tmp_path / "uji.pkl")
+    cache = gsheet_sync._baca_cache(path)
+    del cache['meta']['versi']
+    gsheet_sync._tulis_cache(path, cache['meta'], cache['df'])
+    _sinkron(ws, tmp_path, bersihkan)
+    assert ws.panggilan == ['get_values', 'get_values']
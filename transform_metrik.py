@@ -0,0 +1,123 @@
+import os
+import sys
+import csv
+import json
+import time
+import datetime
+import contextlib
+import psutil
+
+# ================= LAPORAN RUN TRANSFORM =================
+# Waktu per tahap (glob, parsing, tulis output), waktu per file (baca excel per engine,
+# ekstraksi baris), baris per file, dan peak RSS. Ditulis sebagai JSON (ringkasan +
+# file paling lambat) dan CSV (satu baris per file) supaya workbook bermasalah dan
+# throughput ingest bisa dilacak dari run ke run.
+
+LAPORAN_DIR = "LAPORAN_TRANSFORM"
+JUMLAH_TERLAMBAT = 10
+
+KOLOM_FILE = ['file', 'ukuran_bytes', 'status', 'engine', 'baca_s', 'ekstrak_s', 'total_s', 'baris', 'rss_mb']
+
+def peak_rss_mb(children=False):
+    """Peak RSS proses ini (atau semua child yang sudah selesai) dalam MB."""
+    try:
+        import resource
+        who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+        peak = resource.getrusage(who).ru_maxrss
+        # Linux: KB, macOS: bytes
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        # Windows: tidak ada modul resource; peak_wset hanya untuk proses ini
+        if children:
+            return None
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+
+def rss_mb():
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+class Stopwatch:
+    """Pengukur waktu sederhana untuk bagian di dalam fungsi: sw.lap() -> detik sejak lap sebelumnya."""
+    def __init__(self):
+        self._t = time.perf_counter()
+
+    def lap(self):
+        now = time.perf_counter()
+        dt, self._t = now - self._t, now
+        return dt
+
+class LaporanRun:
+    def __init__(self, nama, laporan_dir=LAPORAN_DIR, **info):
+        self.nama = nama
+        self.laporan_dir = laporan_dir
+        self.mulai = datetime.datetime.now()
+        self._t0 = time.perf_counter()
+        self.info = info
+        self.tahap = {}
+        self.file = []
+
+    @contextlib.contextmanager
+    def ukur(self, tahap):
+        """with laporan.ukur('glob'): ... -> durasi ditambahkan ke tahap tersebut."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tambah(tahap, time.perf_counter() - t0)
+
+    def tambah(self, tahap, detik):
+        """Tambahkan durasi yang diukur di tempat lain (mis. di proses worker) ke suatu tahap."""
+        self.tahap[tahap] = round(self.tahap.get(tahap, 0.0) + detik, 4)
+
+    def catat_file(self, file, metrik):
+        """metrik: dict dari proses per file (engine, baca_s, ekstrak_s, baris, status, ...)."""
+        row = {k: metrik.get(k) for k in KOLOM_FILE}
+        row['file'] = file
+        if row['total_s'] is None:
+            row['total_s'] = round((row['baca_s'] or 0) + (row['ekstrak_s'] or 0), 4)
+        self.file.append(row)
+
+    def ringkasan(self):
+        durasi = time.perf_counter() - self._t0
+        total_baris = sum(r['baris'] or 0 for r in self.file)
+        waktu_file = sum(r['total_s'] or 0 for r in self.file)
+        engine = {}
+        for r in self.file:
+            if r['engine']:
+                engine[r['engine']] = engine.get(r['engine'], 0) + 1
+        peak_worker = peak_rss_mb(children=True) if self.info.get('workers', 1) > 1 else None
+        terlambat = sorted(self.file, key=lambda r: r['total_s'] or 0, reverse=True)[:JUMLAH_TERLAMBAT]
+        return {
+            'nama': self.nama,
+            'mulai': self.mulai.isoformat(timespec='seconds'),
+            'durasi_s': round(durasi, 3),
+            **self.info,
+            'tahap_s': self.tahap,
+            'jumlah_file': len(self.file),
+            'file_gagal': sum(1 for r in self.file if r['status'] == 'gagal'),
+            'engine': engine,
+            'total_baris': total_baris,
+            'baris_per_detik': round(total_baris / waktu_file) if waktu_file > 0 else None,
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'peak_rss_worker_mb': round(peak_worker, 1) if peak_worker is not None else None,
+            'file_terlambat': terlambat,
+        }
+
+    def tulis(self):
+        """Tulis <nama>_<waktu>.json (ringkasan) dan <nama>_<waktu>_file.csv. Return path JSON."""
+        os.makedirs(self.laporan_dir, exist_ok=True)
+        base = os.path.join(self.laporan_dir, f"{self.nama}_{self.mulai:%Y%m%d_%H%M%S}")
+        ringkasan = self.ringkasan()
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(ringkasan, f, indent=2, ensure_ascii=False)
+        with open(base + "_file.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=KOLOM_FILE)
+            writer.writeheader()
+            writer.writerows(self.file)
+
+        print(f"\n⏱️ Laporan run: {base}.json")
+        print(f"   Durasi {ringkasan['durasi_s']:.1f} s | {ringkasan['total_baris']:,} baris | "
+              f"peak RSS {ringkasan['peak_rss_mb']:,.0f} MB")
+        print("   Tahap: " + ", ".join(f"{k} {v:.2f}s" for k, v in self.tahap.items()))
+        for r in ringkasan['file_terlambat'][:3]:
+            print(f"   🐢 {r['total_s']:.2f}s  {r['baris'] or 0:>7,} baris  {r['file']}")
+        return base + ".json"